@@ -24,13 +24,29 @@ from bpy.types import (
     Preferences
 )
 
+import time
+
+_import_start = time.perf_counter()
+
 from . import (
     bl_class_registry,
+    functions,
     operators,
     prefs,
+    properties,
     menus
 )
 
+# The time (in seconds) it took to import and register the add-on.
+TIMINGS: dict = {
+    "import": time.perf_counter() - _import_start,
+    "register": 0.0,
+}
+
+# Importing and registering the add-on shouldn't noticeably slow down the startup of Blender.
+# NumPy and the widget library are only loaded once they're needed.
+TIME_BUDGET = 0.05
+
 bl_info = {
     "name": "Bone Widget",
     "author": "Blender Defender, Manuel Rais, Christophe Seux",
@@ -68,6 +84,9 @@ def check_version(major: int, minor: int, _):
 
 
 def register():
+    register_start = time.perf_counter()
+
+    properties.register()
     operators.register()
     menus.register()
     bl_class_registry.BlClassRegistry.register()
@@ -80,12 +99,25 @@ def register():
         pref.panel_category = "Rig Tools"
     prefs.BONEWIDGET_APT_Preferences.panel_category_update_fn(pref, context)
 
+    # Parse the widget library in the background, before the panel is opened.
+    functions.warm_up_library()
+
+    TIMINGS["register"] = time.perf_counter() - register_start
+
+    # benchmarks/bench_register.py reads TIMINGS, only print them when debugging.
+    if bpy.app.debug:
+        print(f"Bone Widget: Import took {TIMINGS['import'] * 1000:.1f} ms, registration took {TIMINGS['register'] * 1000:.1f} ms "
+              f"(budget: {TIME_BUDGET * 1000:.0f} ms)")
+
 
 def unregister():
-    operators.unregister()
-    menus.unregister()
-    # TODO: Unregister by BlClassRegistry
+    functions.cancel_library_warm_up()
+
+    # Unregister in the reverse order of the registration.
     bl_class_registry.BlClassRegistry.unregister()
+    menus.unregister()
+    operators.unregister()
+    properties.unregister()
 
 
 if __name__ == "__main__":
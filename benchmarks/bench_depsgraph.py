@@ -0,0 +1,161 @@
+# ##### BEGIN GPL LICENSE BLOCK #####
+#
+#     This program is free software: you can redistribute it and/or modify
+#     it under the terms of the GNU General Public License as published by
+#     the Free Software Foundation, either version 3 of the License, or
+#     (at your option) any later version.
+
+#     This program is distributed in the hope that it will be useful,
+#     but WITHOUT ANY WARRANTY; without even the implied warranty of
+#     MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#     GNU General Public License for more details.
+
+#     You should have received a copy of the GNU General Public License
+#     along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""Measure the depsgraph update time of a large rig for each widget collection mode.
+
+Run it with:
+
+    blender --background --factory-startup --python benchmarks/bench_depsgraph.py -- --bones 1000 --repeat 20
+
+A rig with one widget per bone is built, then the pose of every bone is changed and
+the view layer is updated, once with the widget collection hidden, excluded and unlinked.
+Each run is appended as a JSON line to the output file.
+"""
+
+import addon_utils
+import bpy
+
+import argparse
+import importlib
+import json
+import os
+import statistics
+import sys
+import time
+
+ADDON_DIRECTORY = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+MODES = ("HIDDEN", "EXCLUDED", "UNLINKED")
+
+
+def parse_args() -> argparse.Namespace:
+    argv = sys.argv[sys.argv.index("--") + 1:] if "--" in sys.argv else []
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--module", default=os.path.basename(ADDON_DIRECTORY),
+                        help="The module name of the add-on")
+    parser.add_argument("--bones", type=int, default=1000,
+                        help="The number of bones of the rig")
+    parser.add_argument("--repeat", type=int, default=20,
+                        help="How often the pose is changed per mode")
+    parser.add_argument("--shape", default="Circle",
+                        help="The library or procedural shape of the widgets")
+    parser.add_argument("--output", default=os.path.join(ADDON_DIRECTORY, "bench_output.txt"),
+                        help="The file to append the results to")
+
+    return parser.parse_args(argv)
+
+
+def build_rig(bone_count: int) -> 'bpy.types.Object':
+    """Create an armature with a grid of bones."""
+
+    armature = bpy.data.objects.new("BenchRig", bpy.data.armatures.new("BenchRig"))
+    bpy.context.scene.collection.objects.link(armature)
+    bpy.context.view_layer.objects.active = armature
+
+    bpy.ops.object.mode_set(mode='EDIT')
+    for i in range(bone_count):
+        bone = armature.data.edit_bones.new(f"Bone_{i:04d}")
+        bone.head = ((i % 32) * 0.2, (i // 32) * 0.2, 0.0)
+        bone.tail = ((i % 32) * 0.2, (i // 32) * 0.2, 0.15)
+    bpy.ops.object.mode_set(mode='POSE')
+
+    return armature
+
+
+def measure_updates(armature: 'bpy.types.Object', repeat: int) -> dict:
+    """Change the pose of every bone and measure the view layer update."""
+
+    view_layer = bpy.context.view_layer
+    times = []
+
+    for i in range(repeat):
+        angle = 0.01 * (i + 1)
+        for bone in armature.pose.bones:
+            bone.rotation_quaternion = (1.0, angle, 0.0, 0.0)
+
+        start = time.perf_counter()
+        view_layer.update()
+        times.append(time.perf_counter() - start)
+
+    depsgraph = bpy.context.evaluated_depsgraph_get()
+
+    return {
+        "update_median": statistics.median(times),
+        "update_min": min(times),
+        "evaluated_objects": len(depsgraph.objects),
+    }
+
+
+def main() -> None:
+    args = parse_args()
+
+    if os.path.dirname(ADDON_DIRECTORY) not in sys.path:
+        sys.path.insert(0, os.path.dirname(ADDON_DIRECTORY))
+
+    if not addon_utils.enable(args.module, default_set=True):
+        raise RuntimeError(f"The add-on '{args.module}' couldn't be enabled")
+
+    functions = importlib.import_module(args.module + ".functions")
+    objects = importlib.import_module(args.module + ".objects")
+    prefs = bpy.context.preferences.addons[args.module].preferences
+
+    armature = build_rig(args.bones)
+
+    wgts = functions.read_widgets()
+    widget_data = wgts.get(args.shape) or functions.get_procedural_widget(args.shape)
+
+    prefs.widget_collection_mode = "HIDDEN"
+    bw_collection = objects.BonewidgetCollection(layer_collection=False, armature=armature)
+    if not bw_collection.collection:
+        bw_collection.create_collection()
+
+    start = time.perf_counter()
+    functions.create_widgets(bpy.context, armature,
+                             [(bone, widget_data) for bone in armature.pose.bones], bw_collection.collection)
+    create_time = time.perf_counter() - start
+
+    results = {}
+    for mode in MODES:
+        prefs.widget_collection_mode = mode
+        bw_collection = objects.BonewidgetCollection(layer_collection=False, armature=armature)
+        bw_collection.show_collection()
+        bw_collection.hide_collection()
+        bpy.context.view_layer.update()
+
+        results[mode] = measure_updates(armature, args.repeat)
+
+    result = {
+        "date": time.strftime("%Y-%m-%d %H:%M:%S"),
+        "blender": bpy.app.version_string,
+        "benchmark": "depsgraph",
+        "bones": args.bones,
+        "create": create_time,
+        "modes": results,
+    }
+
+    with open(args.output, "a", encoding="utf-8") as f:
+        f.write(json.dumps(result) + "\n")
+
+    print(f"Created {args.bones} widgets in {create_time * 1000:.1f} ms")
+    baseline = results["HIDDEN"]["update_median"]
+    for mode, mode_result in results.items():
+        median = mode_result["update_median"] * 1000
+        print(f"{mode:>10}: median update {median:8.2f} ms ({median / (baseline * 1000):6.1%} of hidden), "
+              f"{mode_result['evaluated_objects']} evaluated objects")
+
+
+if __name__ == "__main__":
+    main()
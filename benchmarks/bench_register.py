@@ -0,0 +1,123 @@
+# ##### BEGIN GPL LICENSE BLOCK #####
+#
+#     This program is free software: you can redistribute it and/or modify
+#     it under the terms of the GNU General Public License as published by
+#     the Free Software Foundation, either version 3 of the License, or
+#     (at your option) any later version.
+
+#     This program is distributed in the hope that it will be useful,
+#     but WITHOUT ANY WARRANTY; without even the implied warranty of
+#     MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#     GNU General Public License for more details.
+
+#     You should have received a copy of the GNU General Public License
+#     along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""Measure how long it takes to import and register Bone Widget.
+
+Run it with:
+
+    blender --background --factory-startup --python benchmarks/bench_register.py -- --repeat 10
+
+The name of the add-on directory has to be a valid module name, or the module
+has to be passed with --module (e.g. bl_ext.user_default.blenderdefender_bone_widget).
+Each run is appended as a JSON line to the output file.
+"""
+
+import addon_utils
+
+import argparse
+import importlib
+import json
+import os
+import statistics
+import sys
+import time
+
+ADDON_DIRECTORY = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def parse_args() -> argparse.Namespace:
+    argv = sys.argv[sys.argv.index("--") + 1:] if "--" in sys.argv else []
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--module", default=os.path.basename(ADDON_DIRECTORY),
+                        help="The module name of the add-on")
+    parser.add_argument("--repeat", type=int, default=5,
+                        help="How often to import and register the add-on")
+    parser.add_argument("--output", default=os.path.join(ADDON_DIRECTORY, "bench_output.txt"),
+                        help="The file to append the results to")
+
+    return parser.parse_args(argv)
+
+
+def purge_modules(module_name: str) -> None:
+    """Remove the add-on from the module cache, so the next import starts from scratch."""
+
+    for name in list(sys.modules):
+        if name == module_name or name.startswith(module_name + "."):
+            del sys.modules[name]
+
+
+def measure(module_name: str) -> dict:
+    """Import, register and unregister the add-on once."""
+
+    numpy_loaded = "numpy" in sys.modules
+    purge_modules(module_name)
+
+    start = time.perf_counter()
+    module = importlib.import_module(module_name)
+    import_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    addon_utils.enable(module_name, default_set=True)
+    register_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    addon_utils.disable(module_name, default_set=True)
+    unregister_time = time.perf_counter() - start
+
+    return {
+        "import": import_time,
+        "register": register_time,
+        "unregister": unregister_time,
+        "numpy_imported": not numpy_loaded and "numpy" in sys.modules,
+        "budget": getattr(module, "TIME_BUDGET", None),
+    }
+
+
+def main() -> None:
+    args = parse_args()
+
+    if os.path.dirname(ADDON_DIRECTORY) not in sys.path:
+        sys.path.insert(0, os.path.dirname(ADDON_DIRECTORY))
+
+    runs = [measure(args.module) for _ in range(args.repeat)]
+
+    import bpy
+    result = {
+        "date": time.strftime("%Y-%m-%d %H:%M:%S"),
+        "blender": bpy.app.version_string,
+        "runs": runs,
+    }
+
+    with open(args.output, "a", encoding="utf-8") as f:
+        f.write(json.dumps(result) + "\n")
+
+    for phase in ("import", "register", "unregister"):
+        times = [run[phase] * 1000 for run in runs]
+        print(f"{phase:>10}: min {min(times):7.2f} ms, median {statistics.median(times):7.2f} ms")
+
+    # The first import also loads Blender's own modules, judge the budget by the fastest run.
+    budget = runs[0]["budget"]
+    fastest = min(run["import"] + run["register"] for run in runs)
+    if budget is not None:
+        print(f"{'budget':>10}: {fastest * 1000:.2f} ms of {budget * 1000:.0f} ms "
+              f"({'ok' if fastest <= budget else 'exceeded'})")
+
+    if runs[0]["numpy_imported"]:
+        print("Warning: NumPy was imported during registration")
+
+
+if __name__ == "__main__":
+    main()
@@ -20,9 +20,12 @@
 
 import bpy
 
+import time
+
 
 class BlClassRegistry:
-    class_list = []
+    # Classes keyed by (bl_idname, legacy), in the order they have been added.
+    class_list = {}
 
     def __init__(self, *_, **kwargs):
         self.legacy = kwargs.get('legacy', False)
@@ -39,29 +42,47 @@ class BlClassRegistry:
 
     @classmethod
     def add_class(cls, bl_idname, op_class, legacy):
-        for class_ in cls.class_list:
-            if (class_["bl_idname"] == bl_idname) and \
-               (class_["legacy"] == legacy):
-                raise RuntimeError("{} is already registered"
-                                   .format(bl_idname))
-
-        new_op = {
-            "bl_idname": bl_idname,
-            "class": op_class,
-            "legacy": legacy,
-        }
-        cls.class_list.append(new_op)
+        key = (bl_idname, legacy)
+        class_ = cls.class_list.get(key)
+
+        # A reloaded module defines its classes again, replace them in place.
+        if class_ is not None and \
+           (class_.__module__, class_.__qualname__) != (op_class.__module__, op_class.__qualname__):
+            raise RuntimeError("{} is already registered"
+                               .format(bl_idname))
+
+        cls.class_list[key] = op_class
 
     @classmethod
     def register(cls):
-        for class_ in cls.class_list:
-            bpy.utils.register_class(class_["class"])
+        start = time.perf_counter()
+
+        for class_ in cls.class_list.values():
+            if getattr(class_, "is_registered", False):
+                continue
+            bpy.utils.register_class(class_)
+
+        cls._print_timing("Registered", start)
 
     @classmethod
     def unregister(cls):
-        for class_ in cls.class_list:
-            bpy.utils.unregister_class(class_["class"])
+        start = time.perf_counter()
+
+        for class_ in reversed(list(cls.class_list.values())):
+            if not getattr(class_, "is_registered", False):
+                continue
+            bpy.utils.unregister_class(class_)
+
+        cls._print_timing("Unregistered", start)
 
     @classmethod
     def cleanup(cls):
-        cls.class_list = []
+        cls.class_list = {}
+
+    @classmethod
+    def _print_timing(cls, action, start):
+        if not bpy.app.debug:
+            return
+
+        print("{} {} classes in {:.2f} ms".format(
+            action, len(cls.class_list), (time.perf_counter() - start) * 1000))
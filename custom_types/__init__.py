@@ -10,3 +10,27 @@ class AddonPreferences():
 
     panel_category: str
     """The category to show Bone-Widgets panel in."""
+
+    widget_collection_mode: str
+    """How the widget collection is hidden: HIDDEN, EXCLUDED or UNLINKED."""
+
+    use_bone_shape_transform: bool
+    """Store widget transformations in the custom shape offsets of the bones instead of the widget mesh."""
+
+    widget_lod_mode: str
+    """Which level of detail new widgets use: FULL, BONE_LENGTH or DENSITY."""
+
+    widget_lod_length: float
+    """The bone length from which on widgets use the full detail, for the BONE_LENGTH mode."""
+
+    widget_lod_density: int
+    """The level of detail of all widgets, for the DENSITY mode."""
+
+    library_compression: str
+    """Compression of the encoded widget library: NONE, ZLIB or LZMA."""
+
+    library_quantization: str
+    """Quantization of the vertices in the encoded widget library: LOSSLESS, DECIMALS or INT16."""
+
+    library_precision: int
+    """Number of decimals for the DECIMALS quantization."""
@@ -1,2 +1,9 @@
 from .main_functions import *
 from .json_functions import *
+from .procedural_functions import *
+from .widget_functions import *
+from .rule_functions import *
+from .manifest_functions import *
+
+# The geometry_functions and transform_functions modules depend on NumPy.
+# They're imported where they're used, to keep the registration of the add-on fast.
@@ -0,0 +1,500 @@
+# ##### BEGIN GPL LICENSE BLOCK #####
+#
+# Copyright (C) 2020 Manuel Rais
+# manu@g-lul.com
+
+# Created by Manuel Rais and Christophe Seux
+
+#     This program is free software: you can redistribute it and/or modify
+#     it under the terms of the GNU General Public License as published by
+#     the Free Software Foundation, either version 3 of the License, or
+#     (at your option) any later version.
+
+#     This program is distributed in the hope that it will be useful,
+#     but WITHOUT ANY WARRANTY; without even the implied warranty of
+#     MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#     GNU General Public License for more details.
+
+#     You should have received a copy of the GNU General Public License
+#     along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import hashlib
+import itertools
+import math
+import typing
+
+import numpy
+
+# The number of reduced levels of detail generated for library widgets. Every level halves the vertices.
+LOD_LEVELS = 3
+
+# Levels of detail with fewer vertices than this aren't generated.
+MIN_LOD_VERTICES = 8
+
+
+def widget_data_to_arrays(widget_data: dict) -> typing.Tuple[numpy.ndarray, numpy.ndarray, typing.List[typing.List[int]]]:
+    """Convert JSON widget data to arrays.
+
+    Args:
+        widget_data (dict): The JSON Data of the widget.
+
+    Returns:
+        Tuple[numpy.ndarray, numpy.ndarray, List[List[int]]]: The (n, 3) vertices, (m, 2) edges and the faces.
+    """
+
+    vertices = numpy.array(widget_data["vertices"], dtype=numpy.float64).reshape(-1, 3)
+    edges = numpy.array(widget_data["edges"], dtype=numpy.int64).reshape(-1, 2)
+    faces = [list(face) for face in widget_data["faces"]]
+
+    return vertices, edges, faces
+
+
+def arrays_to_widget_data(vertices: numpy.ndarray, edges: numpy.ndarray, faces: typing.List[typing.List[int]]) -> dict:
+    """Convert arrays to JSON widget data.
+
+    Args:
+        vertices (numpy.ndarray): The (n, 3) vertices.
+        edges (numpy.ndarray): The (m, 2) edges.
+        faces (List[List[int]]): The faces.
+
+    Returns:
+        dict: The JSON Data of the widget.
+    """
+
+    return {"vertices": vertices.tolist(), "edges": edges.tolist(), "faces": [list(face) for face in faces]}
+
+
+def face_loops(faces: typing.List[typing.List[int]]) -> typing.Tuple[numpy.ndarray, numpy.ndarray, numpy.ndarray]:
+    """Flatten faces into loops.
+
+    Args:
+        faces (List[List[int]]): The faces.
+
+    Returns:
+        Tuple[numpy.ndarray, numpy.ndarray, numpy.ndarray]: The vertex index of every loop,
+        the index of the next loop in the same face and the face index of every loop.
+    """
+
+    sizes = numpy.fromiter((len(face) for face in faces), dtype=numpy.int64, count=len(faces))
+    loops = numpy.fromiter(itertools.chain.from_iterable(faces), dtype=numpy.int64, count=int(sizes.sum()))
+
+    starts = numpy.cumsum(sizes) - sizes
+    next_loops = numpy.arange(len(loops)) + 1
+    next_loops[starts + sizes - 1] = starts
+
+    return loops, next_loops, numpy.repeat(numpy.arange(len(faces)), sizes)
+
+
+def unique_edges(edges: numpy.ndarray) -> numpy.ndarray:
+    """Remove degenerate and duplicate edges, regardless of their direction.
+
+    Args:
+        edges (numpy.ndarray): The (m, 2) edges.
+
+    Returns:
+        numpy.ndarray: The remaining edges with the lower vertex index first.
+    """
+
+    edges = numpy.sort(edges.reshape(-1, 2), axis=1)
+    edges = edges[edges[:, 0] != edges[:, 1]]
+
+    if not len(edges):
+        return edges
+
+    return numpy.unique(edges, axis=0)
+
+
+def remap_vertices(vertices: numpy.ndarray, edges: numpy.ndarray, faces: typing.List[typing.List[int]], remap: numpy.ndarray) -> typing.Tuple[numpy.ndarray, numpy.ndarray, typing.List[typing.List[int]]]:
+    """Replace vertices by the vertex they're remapped to and remove all vertices that aren't referenced anymore.
+
+    Args:
+        vertices (numpy.ndarray): The (n, 3) vertices.
+        edges (numpy.ndarray): The (m, 2) edges.
+        faces (List[List[int]]): The faces.
+        remap (numpy.ndarray): The index of the vertex that replaces each vertex.
+
+    Returns:
+        Tuple[numpy.ndarray, numpy.ndarray, List[List[int]]]: The cleaned up vertices, edges and faces.
+    """
+
+    edges = unique_edges(remap[edges])
+
+    remapped_faces: typing.List[typing.List[int]] = []
+    for face in faces:
+        face = [int(v) for v, _ in itertools.groupby(remap[face])]
+        if len(face) > 1 and face[0] == face[-1]:
+            face.pop()
+        if len(set(face)) >= 3:
+            remapped_faces.append(face)
+
+    used = numpy.zeros(len(vertices), dtype=bool)
+    used[edges.ravel()] = True
+    used[list(itertools.chain.from_iterable(remapped_faces))] = True
+
+    new_index = numpy.cumsum(used) - 1
+    faces = [new_index[face].tolist() for face in remapped_faces]
+
+    return vertices[used], new_index[edges].reshape(-1, 2), faces
+
+
+def merge_by_distance(vertices: numpy.ndarray, distance: float) -> numpy.ndarray:
+    """Find the vertices that are closer to each other than a given distance. Every vertex is merged into
+    the first vertex within the distance that isn't merged itself. The candidate pairs are found by
+    hashing the vertices into a grid with the merge distance as cell size.
+
+    Args:
+        vertices (numpy.ndarray): The (n, 3) vertices.
+        distance (float): The merge distance.
+
+    Returns:
+        numpy.ndarray: The index of the vertex that replaces each vertex.
+    """
+
+    vertex_count = len(vertices)
+    remap = numpy.arange(vertex_count)
+
+    if vertex_count < 2 or distance <= 0:
+        return remap
+
+    # The cells are padded by one, so the neighbours of every cell have valid keys.
+    cells = numpy.floor((vertices - vertices.min(axis=0)) / distance).astype(numpy.int64) + 1
+    dims = cells.max(axis=0) + 2
+
+    def cell_keys(cells: numpy.ndarray) -> numpy.ndarray:
+        return (cells[:, 0] * dims[1] + cells[:, 1]) * dims[2] + cells[:, 2]
+
+    order = numpy.argsort(cell_keys(cells), kind="stable")
+    sorted_keys = cell_keys(cells)[order]
+
+    first: typing.List[numpy.ndarray] = []
+    second: typing.List[numpy.ndarray] = []
+
+    for offset in itertools.product((-1, 0, 1), repeat=3):
+        neighbour_keys = cell_keys(cells + offset)
+        start = numpy.searchsorted(sorted_keys, neighbour_keys, side="left")
+        counts = numpy.searchsorted(sorted_keys, neighbour_keys, side="right") - start
+
+        # Expand the range of vertices in the neighbouring cell of every vertex.
+        within = numpy.arange(counts.sum()) - numpy.repeat(numpy.cumsum(counts) - counts, counts)
+        a = numpy.repeat(remap, counts)
+        b = order[numpy.repeat(start, counts) + within]
+
+        first.append(a[a < b])
+        second.append(b[a < b])
+
+    i, j = numpy.concatenate(first), numpy.concatenate(second)
+    close = numpy.linalg.norm(vertices[i] - vertices[j], axis=1) <= distance
+    i, j = i[close], j[close]
+
+    # Resolve which vertices are kept in batches: a vertex is kept once none of the lower vertices within
+    # the distance can be kept anymore, and merged as soon as one of them is kept.
+    UNDECIDED, KEPT, MERGED = 0, 1, 2
+    state = numpy.full(vertex_count, UNDECIDED, dtype=numpy.int8)
+
+    while (state == UNDECIDED).any():
+        blocked = numpy.zeros(vertex_count, dtype=bool)
+        blocked[j[state[i] != MERGED]] = True
+        state[(state == UNDECIDED) & ~blocked] = KEPT
+
+        claimed = numpy.zeros(vertex_count, dtype=bool)
+        claimed[j[state[i] == KEPT]] = True
+        state[(state == UNDECIDED) & claimed] = MERGED
+
+    target = numpy.full(vertex_count, vertex_count)
+    kept = state[i] == KEPT
+    numpy.minimum.at(target, j[kept], i[kept])
+
+    merged = state == MERGED
+    remap[merged] = target[merged]
+
+    return remap
+
+
+def outline_edges(vertices: numpy.ndarray, edges: numpy.ndarray, faces: typing.List[typing.List[int]], angle: float = math.radians(30)) -> numpy.ndarray:
+    """Reduce faces to the edges that define their silhouette: boundary edges,
+    non-manifold edges and edges between faces that meet at a sharp angle.
+    Loose edges are kept.
+
+    Args:
+        vertices (numpy.ndarray): The (n, 3) vertices.
+        edges (numpy.ndarray): The (m, 2) edges.
+        faces (List[List[int]]): The faces.
+        angle (float, optional): The minimum angle between two faces for their shared edge to be kept. Defaults to 30°.
+
+    Returns:
+        numpy.ndarray: The outline edges.
+    """
+
+    edges = unique_edges(edges)
+
+    if not faces:
+        return edges
+
+    loops, next_loops, loop_faces = face_loops(faces)
+
+    # Newell's method, summing the cross products of the loops per face.
+    cross = numpy.cross(vertices[loops], vertices[loops[next_loops]])
+    normals = numpy.zeros((len(faces), 3))
+    numpy.add.at(normals, loop_faces, cross)
+    lengths = numpy.linalg.norm(normals, axis=1)
+    normals /= numpy.where(lengths == 0, 1, lengths)[:, None]
+
+    face_edges = numpy.sort(numpy.stack(
+        [loops, loops[next_loops]], axis=1), axis=1)
+    face_edges, inverse, counts = numpy.unique(
+        face_edges, axis=0, return_inverse=True, return_counts=True)
+    inverse = inverse.ravel()
+
+    # Group the faces that share an edge.
+    edge_faces = loop_faces[numpy.argsort(inverse, kind="stable")]
+    first_face = numpy.cumsum(counts) - counts
+
+    keep = counts != 2
+    manifold = numpy.flatnonzero(counts == 2)
+    cos_angle = numpy.einsum("ij,ij->i",
+                             normals[edge_faces[first_face[manifold]]],
+                             normals[edge_faces[first_face[manifold] + 1]])
+    keep[manifold[cos_angle < math.cos(angle)]] = True
+
+    vertex_count = len(vertices)
+    face_edge_keys = face_edges[:, 0] * vertex_count + face_edges[:, 1]
+    loose = edges[~numpy.isin(edges[:, 0] * vertex_count + edges[:, 1], face_edge_keys)]
+
+    return unique_edges(numpy.concatenate([face_edges[keep], loose]))
+
+
+def simplify_edges(vertices: numpy.ndarray, edges: numpy.ndarray, vertex_budget: int) -> numpy.ndarray:
+    """Dissolve vertices that connect exactly two edges, starting with the vertices that
+    deviate the least from the line between their neighbours, until the vertex budget is met.
+    Every pass dissolves a batch of vertices that aren't adjacent to each other.
+
+    Args:
+        vertices (numpy.ndarray): The (n, 3) vertices.
+        edges (numpy.ndarray): The (m, 2) edges.
+        vertex_budget (int): The number of vertices to reduce the edges to.
+
+    Returns:
+        numpy.ndarray: The simplified edges. Dissolved vertices aren't referenced anymore.
+    """
+
+    edges = unique_edges(edges)
+    vertex_count = len(vertices)
+
+    while len(edges):
+        degree = numpy.bincount(edges.ravel(), minlength=vertex_count)
+        excess = numpy.count_nonzero(degree) - vertex_budget
+        if excess <= 0:
+            break
+
+        # Collect the two neighbours of every vertex with degree 2.
+        half_edges = numpy.concatenate([edges, edges[:, ::-1]])
+        half_edges = half_edges[degree[half_edges[:, 0]] == 2]
+        half_edges = half_edges[numpy.argsort(half_edges[:, 0], kind="stable")]
+
+        candidates = half_edges[0::2, 0]
+        neighbours = numpy.stack(
+            [half_edges[0::2, 1], half_edges[1::2, 1]], axis=1)
+
+        valid = neighbours[:, 0] != neighbours[:, 1]
+        candidates = candidates[valid]
+        neighbours = neighbours[valid]
+        if not len(candidates):
+            break
+
+        # The distance of each candidate to the line between its neighbours.
+        start = vertices[neighbours[:, 0]]
+        direction = vertices[neighbours[:, 1]] - start
+        offset = vertices[candidates] - start
+        length = numpy.linalg.norm(direction, axis=1)
+        cost = numpy.linalg.norm(numpy.cross(direction, offset), axis=1) / \
+            numpy.where(length == 0, 1, length)
+
+        # Only dissolve candidates that are cheaper than their neighbours.
+        rank = numpy.full(vertex_count, numpy.inf)
+        order = numpy.argsort(cost, kind="stable")[:excess]
+        rank[candidates[order]] = numpy.arange(len(order))
+
+        chosen = (rank[candidates] < rank[neighbours[:, 0]]) & \
+            (rank[candidates] < rank[neighbours[:, 1]])
+        if not chosen.any():
+            break
+
+        dissolved = numpy.zeros(vertex_count, dtype=bool)
+        dissolved[candidates[chosen]] = True
+
+        edges = edges[~(dissolved[edges[:, 0]] | dissolved[edges[:, 1]])]
+        edges = unique_edges(numpy.concatenate([edges, neighbours[chosen]]))
+
+    return edges
+
+
+def reduce_widget_data(widget_data: dict, vertex_budget: int) -> dict:
+    """Reduce the geometry of a widget to a vertex budget. Coincident vertices are merged first.
+    If that isn't enough, faces are reduced to their outline and the edges are simplified.
+    As a last resort, vertices are merged with a growing distance.
+
+    Args:
+        widget_data (dict): The JSON Data of the widget.
+        vertex_budget (int): The maximum number of vertices.
+
+    Returns:
+        dict: The JSON Data of the reduced widget.
+    """
+
+    vertices, edges, faces = widget_data_to_arrays(widget_data)
+
+    if vertex_budget <= 0 or len(vertices) <= vertex_budget:
+        return widget_data
+
+    extent = float(numpy.ptp(vertices, axis=0).max())
+    distance = max(extent * 1e-5, 1e-6)
+
+    vertices, edges, faces = remap_vertices(
+        vertices, edges, faces, merge_by_distance(vertices, distance))
+
+    if len(vertices) > vertex_budget and faces:
+        edges = outline_edges(vertices, edges, faces)
+        faces = []
+        vertices, edges, faces = remap_vertices(
+            vertices, edges, faces, numpy.arange(len(vertices)))
+
+    if len(vertices) > vertex_budget:
+        edges = simplify_edges(vertices, edges, vertex_budget)
+        vertices, edges, faces = remap_vertices(
+            vertices, edges, faces, numpy.arange(len(vertices)))
+
+    while len(vertices) > vertex_budget and distance < extent:
+        distance *= 2
+        vertices, edges, faces = remap_vertices(
+            vertices, edges, faces, merge_by_distance(vertices, distance))
+
+    return arrays_to_widget_data(vertices, edges, faces)
+
+
+def generate_widget_lods(widget_data: dict, levels: int = LOD_LEVELS) -> typing.List[dict]:
+    """Generate reduced levels of detail of a widget. Every level has half the vertices of the previous one.
+
+    Args:
+        widget_data (dict): The JSON Data of the widget.
+        levels (int, optional): The maximum number of levels. Defaults to LOD_LEVELS.
+
+    Returns:
+        List[dict]: The JSON Data of the levels, from the most to the least detailed. Levels that can't be reduced
+        any further, would collapse the shape or would have fewer than MIN_LOD_VERTICES vertices are left out.
+    """
+
+    lods: typing.List[dict] = []
+    previous = {key: widget_data[key] for key in ("vertices", "edges", "faces")}
+
+    for _ in range(levels):
+        vertex_budget = len(previous["vertices"]) // 2
+        if vertex_budget < MIN_LOD_VERTICES:
+            break
+
+        lod = reduce_widget_data(previous, vertex_budget)
+
+        # Stop when the shape can't be simplified, or only by merging vertices far beyond the budget.
+        vertex_count = len(lod["vertices"])
+        if vertex_count >= len(previous["vertices"]) or vertex_count < max(vertex_budget // 2, MIN_LOD_VERTICES):
+            break
+
+        lods.append(lod)
+        previous = lod
+
+    return lods
+
+
+def geometry_hash(vertices: numpy.ndarray, edges: numpy.ndarray, loop_totals: numpy.ndarray, loop_vertices: numpy.ndarray, tolerance: float) -> str:
+    """Hash geometry buffers. Vertex coordinates are quantized to a tolerance,
+    so geometry that only differs by floating point noise gets the same hash.
+
+    Args:
+        vertices (numpy.ndarray): The (n, 3) vertex coordinates.
+        edges (numpy.ndarray): The (m, 2) edges.
+        loop_totals (numpy.ndarray): The number of loops of every face.
+        loop_vertices (numpy.ndarray): The vertex index of every loop.
+        tolerance (float): The quantization step of the vertex coordinates.
+
+    Returns:
+        str: The hex digest of the geometry.
+    """
+
+    quantized = numpy.round(numpy.asarray(vertices, dtype=numpy.float64) / tolerance)
+
+    digest = hashlib.blake2b(digest_size=16)
+    for array in (quantized, edges, loop_totals, loop_vertices):
+        array = numpy.ascontiguousarray(array, dtype=numpy.int64)
+        digest.update(numpy.int64(array.size).tobytes())
+        digest.update(array.tobytes())
+
+    return digest.hexdigest()
+
+
+def widget_data_hash(widget_data: dict, precision: int = 4) -> str:
+    """Hash the geometry of a widget, independent of its location, size and vertex order.
+    The vertices are centered on their bounding box, scaled to a unit size and
+    rounded to a number of decimals before they're hashed.
+
+    Args:
+        widget_data (dict): The JSON Data of the widget.
+        precision (int, optional): The number of decimals to round the normalized vertices to. Defaults to 4.
+
+    Returns:
+        str: The hex digest of the geometry.
+    """
+
+    vertices, edges, faces = widget_data_to_arrays(widget_data)
+
+    if len(vertices):
+        low, high = vertices.min(axis=0), vertices.max(axis=0)
+        extent = float((high - low).max()) or 1.0
+        vertices = (vertices - (low + high) / 2) / extent
+
+    quantized = numpy.round(vertices * 10 ** precision).astype(numpy.int64)
+
+    # Sort the vertices, so the hash doesn't depend on their order.
+    order = numpy.lexsort(quantized.T[::-1]) if len(quantized) else numpy.arange(0)
+    new_index = numpy.empty(len(order), dtype=numpy.int64)
+    new_index[order] = numpy.arange(len(order))
+
+    edges = unique_edges(new_index[edges]) if len(edges) else edges
+
+    loops: typing.List[int] = []
+    loop_totals: typing.List[int] = []
+    for face in sorted(_canonical_face(new_index[face].tolist()) for face in faces):
+        loops.extend(face)
+        loop_totals.append(len(face))
+
+    return geometry_hash(quantized[order], edges, numpy.array(loop_totals), numpy.array(loops), 1)
+
+
+def widget_mesh_hash(widget_data: dict, tolerance: float = 1e-6) -> str:
+    """Hash the exact geometry of a widget, as it is stored. Unlike `widget_data_hash`,
+    widgets with the same shape but a different location, size or vertex order get different hashes.
+
+    Args:
+        widget_data (dict): The JSON Data of the widget.
+        tolerance (float, optional): The quantization step of the vertex coordinates. Defaults to 1e-6.
+
+    Returns:
+        str: The hex digest of the geometry.
+    """
+
+    vertices, edges, faces = widget_data_to_arrays(widget_data)
+    loop_totals = numpy.fromiter((len(face) for face in faces), dtype=numpy.int64, count=len(faces))
+
+    return geometry_hash(vertices, edges, loop_totals, face_loops(faces)[0], tolerance)
+
+
+def _canonical_face(face: typing.List[int]) -> typing.Tuple[int, ...]:
+    """Rotate a face to start at its lowest vertex index, keeping its winding order.
+
+    Args:
+        face (List[int]): The vertex indices of the face.
+
+    Returns:
+        Tuple[int, ...]: The rotated face.
+    """
+
+    start = face.index(min(face))
+    return tuple(face[start:] + face[:start])
@@ -30,84 +30,481 @@ from os import path as p
 
 import json
 
-import numpy
+import threading
+import time
+import typing
 
 
+# Import the package name under an alias, binding it as __package__ would break relative imports of this module.
 from .. import (
-    __package__
+    __package__ as ADDON_PACKAGE,
+    custom_types
+)
+
+from ..library import (
+    LibrarySnapshot,
+    commit_library_file,
+    encode_library,
+    library_version,
+    read_library_file,
+    read_library_snapshot
 )
 
 
-def object_data_to_dico(context: 'Context', object: 'Object') -> dict:
+def object_data_to_dico(context: 'Context', object: 'Object', cache: dict = None) -> dict:
     """Convert an object to JSON data.
 
     Args:
         context (Context): The current Blender context.
         object (Object): The object that should be converted to JSON data.
+        cache (dict, optional): Conversions keyed by object and mesh identity. If given, an object is only converted once.
 
     Returns:
         dict: The JSON representation of the object in the following format: `{ "vertices": [], "edges": [], "faces": [] }`
     """
 
-    verts: list = []
+    key = (object.as_pointer(), object.data.as_pointer())
+    if cache is not None and key in cache:
+        return cache[key]
 
     depsgraph = context.evaluated_depsgraph_get()
-    mesh: 'Mesh' = object.evaluated_get(depsgraph).to_mesh()
-    for v in mesh.vertices:
-        verts.append(list(numpy.array(tuple(v.co)) *
-                           (object.scale[0], object.scale[1], object.scale[2])))
+    evaluated_object: 'Object' = object.evaluated_get(depsgraph)
+    mesh: 'Mesh' = evaluated_object.to_mesh()
+
+    wgts = mesh_data_to_dico(mesh, tuple(object.scale))
+
+    # Release the temporary mesh of the evaluated object.
+    evaluated_object.to_mesh_clear()
+
+    if cache is not None:
+        cache[key] = wgts
+
+    return wgts
 
-    polygons: list = []
-    for pol in mesh.polygons:
-        polygons.append(list(pol.vertices))
 
-    edges: list = []
+def mesh_data_to_dico(mesh: 'Mesh', scale: tuple = (1, 1, 1)) -> dict:
+    """Convert mesh data to JSON data.
 
-    for e in mesh.edges:
-        if len(polygons) == 0:
-            edges.append(list(e.key))
-            continue
+    Args:
+        mesh (Mesh): The mesh that should be converted to JSON data.
+        scale (tuple, optional): The scale to apply to the vertices. Defaults to (1, 1, 1).
 
-        for vert_indices in polygons:
-            if e.key[0] and e.key[1] not in vert_indices:
-                edges.append(list(e.key))
+    Returns:
+        dict: The JSON representation of the mesh in the following format: `{ "vertices": [], "edges": [], "faces": [] }`
+    """
 
-    wgts: dict = {"vertices": verts, "edges": edges, "faces": polygons}
+    import numpy
+
+    verts, edges, loop_totals, loop_vertices = read_mesh_buffers(mesh)
+    verts = verts.astype(numpy.float64) * scale
+
+    polygons: list = [
+        face.tolist() for face in numpy.split(loop_vertices, numpy.cumsum(loop_totals)[:-1])] if len(loop_totals) else []
+
+    # Edges of faces are recreated from the faces, only keep loose edges.
+    if polygons:
+        is_loose = numpy.empty(len(mesh.edges), dtype=bool)
+        mesh.edges.foreach_get("is_loose", is_loose)
+        edges = edges[is_loose]
+
+    wgts: dict = {"vertices": verts.tolist(), "edges": edges.tolist(), "faces": polygons}
     # print(wgts)
+
     return wgts
 
 
-def read_widgets() -> dict:
+def read_mesh_buffers(mesh: 'Mesh') -> typing.Tuple['numpy.ndarray', 'numpy.ndarray', 'numpy.ndarray', 'numpy.ndarray']:
+    """Bulk read the geometry of a mesh instead of iterating over every element.
+
+    Args:
+        mesh (Mesh): The mesh to read.
+
+    Returns:
+        Tuple[numpy.ndarray, numpy.ndarray, numpy.ndarray, numpy.ndarray]: The (n, 3) vertex coordinates,
+        the (m, 2) edges, the number of loops of every face and the vertex index of every loop.
+    """
+
+    import numpy
+
+    verts = numpy.empty(len(mesh.vertices) * 3, dtype=numpy.float32)
+    mesh.vertices.foreach_get("co", verts)
+
+    edges = numpy.empty(len(mesh.edges) * 2, dtype=numpy.int32)
+    mesh.edges.foreach_get("vertices", edges)
+
+    loop_totals = numpy.empty(len(mesh.polygons), dtype=numpy.int32)
+    mesh.polygons.foreach_get("loop_total", loop_totals)
+
+    loop_vertices = numpy.empty(len(mesh.loops), dtype=numpy.int32)
+    mesh.loops.foreach_get("vertex_index", loop_vertices)
+
+    return verts.reshape(-1, 3), edges.reshape(-1, 2), loop_totals, loop_vertices
+
+
+# The last read state of the widget library, so the file is only parsed again after it changed.
+_library_cache: dict = {
+    "path": None,
+    "version": None,
+    "widgets": {},
+    "index": None,
+}
+
+
+# Counters of how the widget library is loaded and written, to find out whether it slows Blender down.
+# Times are in seconds.
+_library_stats: dict = {
+    "loads": 0,
+    "load_time": 0.0,
+    "last_load_time": 0.0,
+    "read_time": 0.0,
+    "parse_time": 0.0,
+    "bytes_read": 0,
+    "shapes": 0,
+    "cache_hits": 0,
+    "cache_misses": 0,
+    "check_time": 0.0,
+    "writes": 0,
+    "write_time": 0.0,
+    "bytes_written": 0,
+    "write_conflicts": 0,
+    "last_invalidation": None,
+}
+
+
+# The state of the background warm-up of the widget library.
+_warm_up: dict = {
+    "thread": None,
+    "path": None,
+    "version": None,
+    "result": {},
+}
+
+# How often (in seconds) to check whether the warm-up has finished.
+WARM_UP_INTERVAL = 0.2
+
+
+def get_library_path(encoded: bool = None) -> str:
+    """Get the path of the widgets file.
+
+    Args:
+        encoded (bool, optional): Whether to get the path of the encoded or the JSON widgets file.
+            Defaults to the encoded file, if it exists.
+
+    Returns:
+        str: The path of the widgets file.
+    """
+
+    directory = p.dirname(p.dirname(__file__))
+    encoded_file = p.join(directory, 'widgets.bwl')
+
+    if encoded is None:
+        encoded = p.exists(encoded_file)
+
+    if encoded:
+        return encoded_file
+
+    return p.join(directory, 'widgets.json')
+
+
+def get_library_version(json_file: str) -> tuple:
+    """Get a token that changes whenever the widgets file is modified.
+
+    Args:
+        json_file (str): The path of the widgets file.
+
+    Returns:
+        tuple: The modification time, size and inode of the file.
+    """
+
+    return library_version(json_file)
+
+
+def read_widgets() -> LibrarySnapshot:
     """Read the widgets file and return the JSON data.
+    The file is only parsed again, if it has been modified since it was last read.
 
     Returns:
-        dict: The JSON data dictionary.
+        LibrarySnapshot: The JSON data dictionary, which remembers the version of the file it was read from.
     """
 
-    json_file = p.join(p.dirname(
-        p.dirname(__file__)), 'widgets.json')
+    start = time.perf_counter()
+    json_file = get_library_path()
 
     if not p.exists(json_file):
-        return {}
+        return LibrarySnapshot({}, None)
 
-    with open(json_file, "r", encoding="utf-8") as f:
-        wgts: dict = json.load(f)
+    version = get_library_version(json_file)
 
-    return wgts
+    # Use the result of the warm-up, if it has completed already.
+    if _warm_up["thread"] is not None and not _warm_up["thread"].is_alive():
+        _publish_warm_up()
+
+    if _library_cache["path"] is None:
+        cause = "first read"
+    elif _library_cache["path"] != json_file:
+        cause = "library path changed"
+    elif _library_cache["version"] != version:
+        cause = "library file modified"
+    else:
+        cause = None
+
+    if cause:
+        stats: dict = {}
+        snapshot = read_library_snapshot(json_file, stats)
 
+        _library_cache.update(path=json_file, version=snapshot.version,
+                              widgets=snapshot.base, index=None)
 
-def write_widgets(wgts: dict) -> None:
-    """Write to the widgets file.
+        _library_stats["cache_misses"] += 1
+        _record_library_load(cause, stats, len(snapshot.base), time.perf_counter() - start)
+    else:
+        _library_stats["cache_hits"] += 1
+        _library_stats["check_time"] += time.perf_counter() - start
+
+    # Callers may add or remove widgets, don't let that change the cache.
+    # The cached widgets are replaced, never modified, so they can be the base of the snapshot.
+    return LibrarySnapshot(_library_cache["widgets"], _library_cache["version"])
+
+
+def write_widgets(wgts: dict, snapshot: LibrarySnapshot = None) -> typing.List[str]:
+    """Write to the widgets file. The file is replaced atomically, so it is never left half-written.
+    Widgets that other users added, removed or changed since the library was read are kept, so several
+    users can share one library file.
 
     Args:
         wgts (dict): The updated widgets object.
+        snapshot (LibrarySnapshot, optional): The widgets as returned by `read_widgets`, that were updated.
+            Defaults to `wgts` itself, or to the last read state of the library.
+
+    Returns:
+        List[str]: The names of the widgets that another user changed as well, which were overwritten.
     """
 
-    json_file = p.join(p.dirname(
-        p.dirname(__file__)), 'widgets.json')
+    start = time.perf_counter()
+    json_file = get_library_path()
 
     if not p.exists(json_file):
+        return []
+
+    if snapshot is None:
+        if isinstance(wgts, LibrarySnapshot):
+            snapshot = wgts
+        elif _library_cache["path"] == json_file:
+            snapshot = LibrarySnapshot(_library_cache["widgets"], _library_cache["version"])
+        else:
+            snapshot = LibrarySnapshot({}, None)
+
+    from .geometry_functions import widget_data_hash
+
+    written: typing.List[int] = []
+
+    def dumps(merged: dict) -> bytes:
+        for widget in merged.values():
+            if "hash" not in widget:
+                widget["hash"] = widget_data_hash(widget)
+
+        data = dumps_widgets(merged, json_file)
+        written.append(len(data))
+        return data
+
+    merged, conflicts, version = commit_library_file(json_file, wgts, snapshot, dumps)
+
+    for name in conflicts:
+        print(f"Bone Widget: The widget '{name}' was changed by another user as well, their change was overwritten")
+
+    _library_cache.update(path=json_file, version=version,
+                          widgets=dict(merged), index=None)
+
+    _library_stats["writes"] += 1
+    _library_stats["write_time"] += time.perf_counter() - start
+    _library_stats["bytes_written"] += written[-1]
+    _library_stats["write_conflicts"] += len(conflicts)
+    _library_stats["shapes"] = len(merged)
+    _library_stats["last_invalidation"] = "written"
+
+    return conflicts
+
+
+def get_library_stats() -> dict:
+    """Get the counters of how the widget library was loaded and written since Blender was started.
+
+    Returns:
+        dict: The counters, with the library path and the cache hit rate.
+    """
+
+    lookups = _library_stats["cache_hits"] + _library_stats["cache_misses"]
+
+    return {
+        "path": get_library_path(),
+        **_library_stats,
+        "cache_hit_rate": _library_stats["cache_hits"] / lookups if lookups else None,
+    }
+
+
+def reset_library_stats() -> None:
+    """Reset the counters of the widget library, the cached library is kept."""
+
+    for key, value in _library_stats.items():
+        if isinstance(value, (int, float)) and key != "shapes":
+            _library_stats[key] = type(value)()
+
+    _library_stats["last_invalidation"] = None
+
+
+def _record_library_load(cause: str, stats: dict, shapes: int, load_time: float) -> None:
+    """Add a load of the widget library to the counters."""
+
+    _library_stats["loads"] += 1
+    _library_stats["load_time"] += load_time
+    _library_stats["last_load_time"] = load_time
+    _library_stats["read_time"] += stats.get("read_time", 0.0)
+    _library_stats["parse_time"] += stats.get("parse_time", 0.0)
+    _library_stats["bytes_read"] += stats.get("bytes_read", 0)
+    _library_stats["shapes"] = shapes
+    _library_stats["last_invalidation"] = cause
+
+
+def dumps_widgets(wgts: dict, json_file: str) -> bytes:
+    """Serialize the widgets in the format of a widgets file.
+    Encoded widgets files are compressed and quantized according to the add-on preferences.
+
+    Args:
+        wgts (dict): The widgets object.
+        json_file (str): The path of the widgets file.
+
+    Returns:
+        bytes: The content of the widgets file.
+    """
+
+    if not json_file.endswith(".bwl"):
+        return json.dumps(wgts).encode("utf-8")
+
+    prefs: 'custom_types.AddonPreferences' = bpy.context.preferences.addons[ADDON_PACKAGE].preferences
+
+    return encode_library(wgts, prefs.library_compression,
+                          prefs.library_quantization, prefs.library_precision)
+
+
+def get_widget_index() -> typing.Dict[str, str]:
+    """Get the index of the geometry hashes of all widgets in the library.
+
+    Returns:
+        Dict[str, str]: The names of the widgets, keyed by their geometry hash.
+        If multiple widgets have the same geometry, the first name in alphabetical order is used.
+        Callers may modify the index, it only changes the cached index when the library is written.
+    """
+
+    from .geometry_functions import widget_data_hash
+
+    read_widgets()
+
+    if _library_cache["index"] is None:
+        index: typing.Dict[str, str] = {}
+
+        for name, widget in sorted(_library_cache["widgets"].items()):
+            if "hash" not in widget:
+                widget["hash"] = widget_data_hash(widget)
+            index.setdefault(widget["hash"], name)
+
+        _library_cache["index"] = index
+
+    return dict(_library_cache["index"])
+
+
+def find_duplicate_widget(widget_data: dict) -> typing.Optional[str]:
+    """Find a widget in the library with the same geometry.
+
+    Args:
+        widget_data (dict): The JSON Data of the widget.
+
+    Returns:
+        Optional[str]: The name of the widget with the same geometry, if one exists.
+    """
+
+    from .geometry_functions import widget_data_hash
+
+    if "hash" not in widget_data:
+        widget_data["hash"] = widget_data_hash(widget_data)
+
+    return get_widget_index().get(widget_data["hash"])
+
+
+def warm_up_library() -> None:
+    """Parse the widget library in a worker thread. The worker doesn't access bpy or import NumPy,
+    the geometry hashes are computed on the main thread when the widget index is first needed.
+    The result is published to the library cache on the main thread, by a timer or by `read_widgets`.
+    Until then, `read_widgets` loads the library synchronously.
+    """
+
+    json_file = get_library_path()
+
+    if not p.exists(json_file) or _warm_up["thread"] is not None:
         return
 
-    with open(json_file, "w+", encoding="utf-8") as f:
-        json.dump(wgts, f)
+    result: dict = {"stats": {}}
+
+    def warm_up():
+        try:
+            result["widgets"] = read_library_file(json_file, result["stats"])
+        except Exception as e:
+            result["error"] = e
+
+    thread = threading.Thread(target=warm_up, name="BoneWidgetLibraryWarmUp", daemon=True)
+    _warm_up.update(thread=thread, path=json_file,
+                    version=get_library_version(json_file), result=result)
+    thread.start()
+
+    # Keep polling when a file is loaded before the worker has finished.
+    bpy.app.timers.register(_poll_warm_up, first_interval=WARM_UP_INTERVAL, persistent=True)
+
+
+def cancel_library_warm_up() -> None:
+    """Stop waiting for the warm-up of the widget library. The worker thread is left to finish on its own.
+    """
+
+    if bpy.app.timers.is_registered(_poll_warm_up):
+        bpy.app.timers.unregister(_poll_warm_up)
+
+    _warm_up.update(thread=None, result={})
+
+
+def _poll_warm_up() -> typing.Optional[float]:
+    """Timer callback, that publishes the warm-up result once the worker thread has finished.
+
+    Returns:
+        Optional[float]: The time until the next check, or None if the warm-up has been published.
+    """
+
+    if _warm_up["thread"] is None:
+        return None
+
+    if _warm_up["thread"].is_alive():
+        return WARM_UP_INTERVAL
+
+    _publish_warm_up()
+    return None
+
+
+def _publish_warm_up() -> None:
+    """Move the warm-up result to the library cache, unless the library has been read or modified in the meantime.
+    """
+
+    result: dict = _warm_up["result"]
+    _warm_up.update(thread=None, result={})
+
+    if "error" in result:
+        print(f"Bone Widget: Loading the widget library failed: {result['error']}")
+        return
+
+    if _library_cache["version"] is not None or not p.exists(_warm_up["path"]):
+        return
+
+    if get_library_version(_warm_up["path"]) != _warm_up["version"]:
+        return
+
+    _library_cache.update(path=_warm_up["path"], version=_warm_up["version"],
+                          widgets=result["widgets"], index=None)
+
+    stats: dict = result["stats"]
+    _record_library_load("warm-up", stats, len(result["widgets"]),
+                         stats.get("read_time", 0.0) + stats.get("parse_time", 0.0))
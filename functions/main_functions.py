@@ -19,30 +19,77 @@
 #     along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
 from bpy.types import (
-    Context
+    Context,
+    Object,
+    PoseBone
 )
 
+import typing
+
 
 from .. import (
-    __package__,
+    __package__ as ADDON_PACKAGE,
     custom_types
 )
 
-def get_widget_prefix(context: 'Context') -> str:
+def get_widget_prefix(context: 'Context', armature: 'Object' = None) -> str:
     """Get the widget prefix.
 
     Args:
         context (Context): The current Blender context
+        armature (Object, optional): The armature to resolve the {object} variable with. Defaults to the active object.
 
     Returns:
         str: The widget prefix
     """
-    prefs: 'custom_types.AddonPreferences' = context.preferences.addons[__package__].preferences
+    prefs: 'custom_types.AddonPreferences' = context.preferences.addons[ADDON_PACKAGE].preferences
 
     prefix = prefs.widget_prefix
 
-    if context.active_object:
-        prefix = prefix.replace("{object}", context.active_object.name)
+    if armature is None:
+        armature = context.active_object
+
+    if armature:
+        prefix = prefix.replace("{object}", armature.name)
 
     return prefix
 
+
+
+def get_pose_armatures(context: 'Context') -> typing.List['Object']:
+    """Get all armatures in pose mode, including multi-object pose mode. The active armature comes first.
+
+    Args:
+        context (Context): The current Blender context
+
+    Returns:
+        List[Object]: The armatures.
+    """
+
+    armatures: typing.List['Object'] = [ob for ob in (context.objects_in_mode or ()) if ob.type == 'ARMATURE']
+
+    active = context.object
+    if active and active.type == 'ARMATURE':
+        if active in armatures:
+            armatures.remove(active)
+        armatures.insert(0, active)
+
+    return armatures
+
+
+def group_bones_by_armature(bones: typing.Iterable['PoseBone']) -> typing.Dict['Object', typing.List['PoseBone']]:
+    """Group pose bones by their armature, e.g. the selected bones in multi-object pose mode.
+
+    Args:
+        bones (Iterable[PoseBone]): The bones.
+
+    Returns:
+        Dict[Object, List[PoseBone]]: The bones, keyed by their armature, in the order of the bones.
+    """
+
+    groups: typing.Dict['Object', typing.List['PoseBone']] = {}
+
+    for bone in bones:
+        groups.setdefault(bone.id_data, []).append(bone)
+
+    return groups
@@ -0,0 +1,199 @@
+# ##### BEGIN GPL LICENSE BLOCK #####
+#
+#     This program is free software: you can redistribute it and/or modify
+#     it under the terms of the GNU General Public License as published by
+#     the Free Software Foundation, either version 3 of the License, or
+#     (at your option) any later version.
+
+#     This program is distributed in the hope that it will be useful,
+#     but WITHOUT ANY WARRANTY; without even the implied warranty of
+#     MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#     GNU General Public License for more details.
+
+#     You should have received a copy of the GNU General Public License
+#     along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+from bpy.types import (
+    Collection,
+    Context,
+    Object,
+    PoseBone
+)
+
+import math
+import typing
+
+from .json_functions import (
+    get_widget_index,
+    mesh_data_to_dico,
+    read_widgets
+)
+from .procedural_functions import (
+    PROCEDURAL_WIDGETS,
+    get_procedural_widget
+)
+from .widget_functions import (
+    WidgetAssignment,
+    WidgetTransform,
+    create_widgets,
+    get_widget_metadata
+)
+
+MANIFEST_VERSION = 1
+
+# The parameters of procedural widgets, which are stored in the source of a widget.
+PROCEDURAL_PARAMETERS = ("segments", "radius", "thickness")
+
+# The tolerance for comparing the transformation of an existing widget with the manifest.
+TRANSFORM_TOLERANCE = 1e-5
+
+
+def export_widget_manifest(armature: 'Object') -> dict:
+    """Export the widget assignments of an armature. Widgets that weren't created by Bone Widget
+    are identified by the hash of their geometry.
+
+    Args:
+        armature (Object): The armature.
+
+    Returns:
+        dict: The manifest, with the shape, hash and transformation of the widget of every bone.
+    """
+
+    from .geometry_functions import widget_data_hash
+
+    mesh_hashes: typing.Dict[int, str] = {}
+    bones: typing.Dict[str, dict] = {}
+
+    for bone in armature.pose.bones:
+        widget: 'Object' = bone.custom_shape
+        if widget is None or widget.type != 'MESH':
+            continue
+
+        metadata = get_widget_metadata(widget)
+
+        if metadata is None:
+            key = widget.data.as_pointer()
+            if key not in mesh_hashes:
+                mesh_hashes[key] = widget_data_hash(mesh_data_to_dico(widget.data))
+            metadata = {"hash": mesh_hashes[key]}
+
+        bones[bone.name] = _compact_entry(metadata)
+
+    return {"version": MANIFEST_VERSION, "armature": armature.name, "bones": bones}
+
+
+def replay_widget_manifest(context: 'Context', armature: 'Object', manifest: dict, collection: 'Collection',
+                           wgts: dict = None) -> typing.Tuple[typing.List['Object'], int, typing.List[str]]:
+    """Create the widgets of a manifest in one batch. Bones whose widget already matches the manifest are skipped.
+
+    Args:
+        context (Context): The current Blender context.
+        armature (Object): The armature.
+        manifest (dict): The manifest.
+        collection (Collection): The collection to create the widgets in.
+        wgts (dict, optional): The widget library. Defaults to the library of the add-on.
+
+    Returns:
+        Tuple[List[Object], int, List[str]]: The created widgets, the number of skipped bones
+        and the names of the bones that don't exist or whose shape wasn't found.
+    """
+
+    if manifest.get("version", MANIFEST_VERSION) > MANIFEST_VERSION:
+        raise ValueError(f"The manifest version {manifest['version']} isn't supported")
+
+    if wgts is None:
+        wgts = read_widgets()
+
+    index: typing.Optional[typing.Dict[str, str]] = None
+    assignments: typing.List[WidgetAssignment] = []
+    skipped = 0
+    missing: typing.List[str] = []
+
+    for bone_name, entry in manifest.get("bones", {}).items():
+        bone: 'PoseBone' = armature.pose.bones.get(bone_name)
+        if bone is None:
+            missing.append(bone_name)
+            continue
+
+        source, transform = _expand_entry(entry)
+
+        if bone.custom_shape and _widget_matches(bone.custom_shape, entry.get("hash"), source, transform):
+            skipped += 1
+            continue
+
+        shape = source.get("shape")
+        widget_data = None
+
+        if shape in wgts:
+            widget_data = wgts[shape]
+        elif shape in PROCEDURAL_WIDGETS:
+            parameters = {key: source[key] for key in PROCEDURAL_PARAMETERS if key in source}
+            widget_data = get_procedural_widget(shape, **parameters)
+        elif entry.get("hash"):
+            if index is None:
+                index = get_widget_index()
+            if entry["hash"] in index:
+                source = {"shape": index[entry["hash"]]}
+                widget_data = wgts[source["shape"]]
+
+        if widget_data is None:
+            missing.append(bone_name)
+            continue
+
+        assignments.append(WidgetAssignment(bone, widget_data, transform, source))
+
+    return create_widgets(context, armature, assignments, collection), skipped, missing
+
+
+def _compact_entry(metadata: dict) -> dict:
+    """Convert widget metadata to a manifest entry. Default values are left out, the rotation is stored in degrees."""
+
+    entry = {key: value for key, value in metadata.items()
+             if key not in ("slide", "rotation", "scale", "relative_size", "bone_transform", "lod")}
+
+    if metadata.get("slide", 0.0):
+        entry["slide"] = metadata["slide"]
+    if any(metadata.get("rotation", ())):
+        entry["rotation"] = [round(math.degrees(angle), 6) for angle in metadata["rotation"]]
+    if list(metadata.get("scale", (1.0, 1.0, 1.0))) != [1.0, 1.0, 1.0]:
+        entry["scale"] = list(metadata["scale"])
+    if not metadata.get("relative_size", True):
+        entry["relative_size"] = False
+
+    return entry
+
+
+def _expand_entry(entry: dict) -> typing.Tuple[dict, WidgetTransform]:
+    """Split a manifest entry into the source and the transformation of the widget."""
+
+    source = {key: value for key, value in entry.items()
+              if key not in ("hash", "slide", "rotation", "scale", "relative_size")}
+
+    transform = WidgetTransform(
+        slide=float(entry.get("slide", 0.0)),
+        rotation=tuple(math.radians(float(angle)) for angle in entry.get("rotation", (0.0, 0.0, 0.0))),
+        scale=tuple(float(factor) for factor in entry.get("scale", (1.0, 1.0, 1.0))),
+        relative_size=bool(entry.get("relative_size", True))
+    )
+
+    return source, transform
+
+
+def _widget_matches(widget: 'Object', hash: typing.Optional[str], source: dict, transform: WidgetTransform) -> bool:
+    """Check whether a widget was created from the same source and with the same transformation."""
+
+    metadata = get_widget_metadata(widget)
+    if metadata is None:
+        return False
+
+    if hash and metadata.get("hash") != hash:
+        return False
+
+    if any(metadata.get(key) != value for key, value in source.items()):
+        return False
+
+    values = [metadata.get("slide", 0.0), *metadata.get("rotation", (0.0, 0.0, 0.0)), *metadata.get("scale", (1.0, 1.0, 1.0))]
+    expected = [transform.slide, *transform.rotation, *transform.scale]
+
+    return (bool(metadata.get("relative_size", True)) == transform.relative_size
+            and all(abs(a - b) <= TRANSFORM_TOLERANCE for a, b in zip(values, expected)))
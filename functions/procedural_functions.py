@@ -0,0 +1,165 @@
+# ##### BEGIN GPL LICENSE BLOCK #####
+#
+# Copyright (C) 2020 Manuel Rais
+# manu@g-lul.com
+
+# Created by Manuel Rais and Christophe Seux
+
+#     This program is free software: you can redistribute it and/or modify
+#     it under the terms of the GNU General Public License as published by
+#     the Free Software Foundation, either version 3 of the License, or
+#     (at your option) any later version.
+
+#     This program is distributed in the hope that it will be useful,
+#     but WITHOUT ANY WARRANTY; without even the implied warranty of
+#     MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#     GNU General Public License for more details.
+
+#     You should have received a copy of the GNU General Public License
+#     along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import functools
+import math
+import typing
+
+
+class ProceduralWidget():
+    """A widget shape, that is generated from parameters instead of being stored in the library."""
+
+    def __init__(self, name: str, generator: typing.Callable, parameters: typing.Dict[str, float]) -> None:
+        self.name = name
+        self.parameters = parameters
+
+        # Every parameter set is only generated once.
+        self.generate = functools.lru_cache(maxsize=32)(generator)
+
+
+PROCEDURAL_WIDGETS: typing.Dict[str, ProceduralWidget] = {}
+
+# Lower levels of detail don't reduce round shapes below this number of segments.
+MIN_LOD_SEGMENTS = 8
+
+
+def procedural_widget(name: str, **parameters: float):
+    """Register a function as generator of a procedural widget.
+    The function receives the segments, radius and thickness and returns the arrays of the vertices and edges.
+
+    Args:
+        name (str): The name of the widget.
+        parameters (float): The defaults of the parameters the generator uses, out of "segments", "radius" and "thickness".
+    """
+
+    def decorator(generator: typing.Callable) -> typing.Callable:
+        PROCEDURAL_WIDGETS[name] = ProceduralWidget(name, generator, parameters)
+        return generator
+
+    return decorator
+
+
+def get_procedural_widget(name: str, segments: int = 0, radius: float = 0.0, thickness: float = 0.0) -> dict:
+    """Generate the JSON Data of a procedural widget.
+
+    Args:
+        name (str): The name of the widget.
+        segments (int, optional): The number of segments of round shapes. 0 uses the default of the widget.
+        radius (float, optional): The radius of round shapes. 0 uses the default of the widget.
+        thickness (float, optional): The distance between double lines. 0 uses the default of the widget.
+
+    Returns:
+        dict: The JSON Data of the widget.
+    """
+
+    widget = PROCEDURAL_WIDGETS[name]
+
+    segments = segments or widget.parameters.get("segments", 32)
+    radius = radius or widget.parameters.get("radius", 1.0)
+    thickness = thickness or widget.parameters.get("thickness", 0.1)
+
+    vertices, edges = widget.generate(max(int(segments), 3), round(radius, 6), round(thickness, 6))
+
+    return {"vertices": vertices.tolist(), "edges": edges.tolist(), "faces": []}
+
+
+def get_procedural_lod_segments(name: str, level: int) -> int:
+    """Get the number of segments of a procedural widget for a level of detail. Every level halves the segments.
+
+    Args:
+        name (str): The name of the widget.
+        level (int): The level of detail, 0 is the full detail.
+
+    Returns:
+        int: The number of segments.
+    """
+
+    segments = int(PROCEDURAL_WIDGETS[name].parameters.get("segments", 32))
+
+    return max(segments >> level, min(segments, MIN_LOD_SEGMENTS))
+
+
+def _ring(segments: int, radius: float, axes: typing.Tuple[int, int] = (0, 2), offset: typing.Sequence[float] = (0, 0, 0)):
+    """Generate the vertices and edges of a closed ring.
+
+    Args:
+        segments (int): The number of segments.
+        radius (float): The radius.
+        axes (Tuple[int, int], optional): The axes of the plane of the ring. Defaults to the XZ plane.
+        offset (Sequence[float], optional): The center of the ring. Defaults to the origin.
+    """
+
+    import numpy
+
+    angles = numpy.linspace(0, 2 * math.pi, segments, endpoint=False)
+
+    vertices = numpy.zeros((segments, 3))
+    vertices[:, axes[0]] = -numpy.sin(angles) * radius
+    vertices[:, axes[1]] = numpy.cos(angles) * radius
+    vertices += offset
+
+    indices = numpy.arange(segments)
+    edges = numpy.stack([indices, numpy.roll(indices, -1)], axis=1)
+
+    return vertices, edges
+
+
+def _join(*parts):
+    """Join vertex and edge arrays into one shape."""
+
+    import numpy
+
+    offsets = numpy.cumsum([0] + [len(vertices) for vertices, _ in parts[:-1]])
+
+    vertices = numpy.concatenate([vertices for vertices, _ in parts])
+    edges = numpy.concatenate([edges + offset for (_, edges), offset in zip(parts, offsets)])
+
+    return vertices, edges
+
+
+@procedural_widget("Circle", segments=32, radius=1.0)
+def _circle(segments: int, radius: float, thickness: float):
+    return _ring(segments, radius)
+
+
+@procedural_widget("Circle (double)", segments=32, radius=1.0, thickness=0.1)
+def _double_circle(segments: int, radius: float, thickness: float):
+    return _join(_ring(segments, radius + thickness / 2), _ring(segments, radius - thickness / 2))
+
+
+@procedural_widget("Cylinder", segments=32, radius=1.0)
+def _cylinder(segments: int, radius: float, thickness: float):
+    import numpy
+
+    vertices, edges = _join(_ring(segments, radius),
+                            _ring(segments, radius, offset=(0, 1, 0)))
+
+    # Connect the rings with four lines.
+    quarter = numpy.arange(4) * segments // 4
+    edges = numpy.concatenate([edges, numpy.stack([quarter, quarter + segments], axis=1)])
+
+    return vertices, edges
+
+
+@procedural_widget("Sphere", segments=24, radius=0.1)
+def _sphere(segments: int, radius: float, thickness: float):
+    return _join(_ring(segments, radius, axes=(0, 1)),
+                 _ring(segments, radius, axes=(0, 2)),
+                 _ring(segments, radius, axes=(1, 2)))
@@ -0,0 +1,289 @@
+# ##### BEGIN GPL LICENSE BLOCK #####
+#
+#     This program is free software: you can redistribute it and/or modify
+#     it under the terms of the GNU General Public License as published by
+#     the Free Software Foundation, either version 3 of the License, or
+#     (at your option) any later version.
+
+#     This program is distributed in the hope that it will be useful,
+#     but WITHOUT ANY WARRANTY; without even the implied warranty of
+#     MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#     GNU General Public License for more details.
+
+#     You should have received a copy of the GNU General Public License
+#     along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+from bpy.types import (
+    Collection,
+    Context,
+    Object,
+    PoseBone
+)
+
+from fnmatch import translate
+import json
+import math
+import re
+import typing
+
+from .json_functions import read_widgets
+from .procedural_functions import (
+    PROCEDURAL_WIDGETS,
+    get_procedural_widget
+)
+from .widget_functions import (
+    WidgetAssignment,
+    WidgetTransform,
+    create_widgets
+)
+
+# The properties of a bone that rules can match.
+RULE_TARGETS = ("NAME", "COLLECTION", "PARENT")
+
+
+class WidgetRule(typing.NamedTuple):
+    """Assign a widget shape to all bones whose name, bone collection or parent matches a pattern.
+    Rules without a shape exclude the matching bones."""
+
+    pattern: str
+    shape: str
+    transform: WidgetTransform = WidgetTransform()
+    target: str = "NAME"
+    regex: bool = False
+
+
+# A numbered backreference or group reference of a conditional pattern, which isn't escaped itself.
+NUMBERED_BACKREFERENCE = re.compile(r"(?<!\\)(?:\\\\)*(?:\\[1-9]|\(\?\(\d)")
+
+
+class WidgetRuleMatcher:
+    """A set of widget rules, compiled into one regular expression per target.
+    Each rule is an alternative of the expression, so a single match finds the first matching rule."""
+
+    def __init__(self, rules: typing.List[WidgetRule]) -> None:
+        self.rules = list(rules)
+        self.expressions: typing.Dict[str, typing.Tuple[typing.Optional[re.Pattern], typing.Dict[str, int],
+                                                        typing.List[typing.Tuple[re.Pattern, int]]]] = {}
+
+        for target in RULE_TARGETS:
+            indices = [i for i, rule in enumerate(self.rules) if rule.target == target]
+            if not indices:
+                continue
+
+            # Wrapping a rule in a group shifts its group numbers, so rules with numbered backreferences are kept apart.
+            standalone = [(re.compile(self._to_regex(self.rules[i])), i) for i in indices
+                          if self.rules[i].regex and NUMBERED_BACKREFERENCE.search(self.rules[i].pattern)]
+            combined = [i for i in indices if i not in {index for _, index in standalone}]
+
+            groups = {f"_bw_rule_{i}": i for i in combined}
+            expression = "|".join(f"(?P<_bw_rule_{i}>{self._to_regex(self.rules[i])})" for i in combined)
+
+            try:
+                self.expressions[target] = (re.compile(expression) if combined else None, groups, standalone)
+            except re.error:
+                # Rules with conflicting group names can't be combined, fall back to one alternative per expression.
+                self.expressions[target] = (None, {}, sorted(
+                    [(re.compile(self._to_regex(self.rules[i])), i) for i in combined] + standalone,
+                    key=lambda item: item[1]))
+
+    @staticmethod
+    def _to_regex(rule: WidgetRule) -> str:
+        """Get the regular expression of a rule. Raises a ValueError if a regex rule has an invalid pattern."""
+
+        if rule.regex:
+            try:
+                re.compile(rule.pattern)
+            except re.error as e:
+                raise ValueError(f"Invalid pattern {rule.pattern!r}: {e}") from e
+
+            return rule.pattern
+
+        return translate(rule.pattern)
+
+    def _first_match(self, target: str, values: typing.Iterable[str]) -> typing.Optional[int]:
+        """Get the index of the first rule of a target that matches any of the values."""
+
+        expression, groups, standalone = self.expressions[target]
+        first: typing.Optional[int] = None
+
+        for value in values:
+            index: typing.Optional[int] = None
+
+            if expression is not None:
+                match = expression.fullmatch(value)
+                index = groups[match.lastgroup] if match else None
+
+            # The rules that aren't combined are only tried if they come before the combined match.
+            for pattern, i in standalone:
+                if index is not None and i > index:
+                    break
+                if pattern.fullmatch(value):
+                    index = i
+                    break
+
+            if index is not None and (first is None or index < first):
+                first = index
+
+        return first
+
+    def match(self, bone: 'PoseBone') -> typing.Optional[WidgetRule]:
+        """Find the first rule that matches a bone.
+
+        Args:
+            bone (PoseBone): The bone.
+
+        Returns:
+            Optional[WidgetRule]: The rule, or None if no rule matches.
+        """
+
+        indices: typing.List[int] = []
+
+        for target in self.expressions:
+            if target == "NAME":
+                values = (bone.name,)
+            elif target == "COLLECTION":
+                values = [collection.name for collection in bone.bone.collections]
+            else:
+                values = (bone.parent.name,) if bone.parent else ()
+
+            index = self._first_match(target, values)
+            if index is not None:
+                indices.append(index)
+
+        return self.rules[min(indices)] if indices else None
+
+
+def parse_widget_rules(data: typing.Union[dict, list]) -> typing.List[WidgetRule]:
+    """Parse widget rules from a mapping. The mapping is either a list of rules or a dictionary with a "rules" list.
+    Each rule matches a glob pattern against the bone "name", a bone "collection" or the "parent" of the bone
+    ("pattern" is the same as "name"), or a regular expression if "regex" is true. It assigns a "shape",
+    and optionally "slide", "rotation" (in degrees), "scale" and "relative_size". Rules without a shape exclude bones.
+
+    Args:
+        data (Union[dict, list]): The mapping.
+
+    Returns:
+        List[WidgetRule]: The rules, in the order of the mapping.
+    """
+
+    if isinstance(data, dict):
+        data = data.get("rules", [])
+
+    rules: typing.List[WidgetRule] = []
+
+    for rule in data:
+        keys = {"pattern": "NAME", "name": "NAME", "collection": "COLLECTION", "parent": "PARENT"}
+        targets = [(key, target) for key, target in keys.items() if key in rule]
+
+        if len(targets) != 1:
+            raise ValueError(f"Widget rules need exactly one of pattern, name, collection or parent: {rule}")
+
+        key, target = targets[0]
+
+        transform = WidgetTransform(
+            slide=float(rule.get("slide", 0.0)),
+            rotation=tuple(math.radians(float(angle)) for angle in rule.get("rotation", (0.0, 0.0, 0.0))),
+            scale=tuple(float(factor) for factor in rule.get("scale", (1.0, 1.0, 1.0))),
+            relative_size=bool(rule.get("relative_size", True))
+        )
+        rules.append(WidgetRule(str(rule[key]), rule.get("shape") or "", transform,
+                                target, bool(rule.get("regex", False))))
+
+    return rules
+
+
+def load_widget_rules(path: str) -> typing.List[WidgetRule]:
+    """Load widget rules from a JSON mapping file.
+
+    Args:
+        path (str): The path of the mapping file.
+
+    Returns:
+        List[WidgetRule]: The rules, in the order of the file.
+    """
+
+    with open(path, "r", encoding="utf-8") as f:
+        return parse_widget_rules(json.load(f))
+
+
+def compile_widget_rules(rules: typing.Union[typing.List[WidgetRule], WidgetRuleMatcher]) -> WidgetRuleMatcher:
+    """Compile widget rules into a matcher. Matchers are returned as they are.
+
+    Args:
+        rules (Union[List[WidgetRule], WidgetRuleMatcher]): The rules.
+
+    Returns:
+        WidgetRuleMatcher: The compiled rules.
+    """
+
+    if isinstance(rules, WidgetRuleMatcher):
+        return rules
+
+    return WidgetRuleMatcher(rules)
+
+
+def match_widget_rules(rules: typing.Union[typing.List[WidgetRule], WidgetRuleMatcher],
+                       bones: typing.Iterable['PoseBone']) -> typing.List[typing.Tuple['PoseBone', WidgetRule]]:
+    """Find the rule of each bone. The first matching rule wins, bones without a matching rule
+    and bones excluded by a rule without a shape are skipped.
+
+    Args:
+        rules (Union[List[WidgetRule], WidgetRuleMatcher]): The rules, or the compiled rules.
+        bones (Iterable[PoseBone]): The bones.
+
+    Returns:
+        List[Tuple[PoseBone, WidgetRule]]: The bones, paired with their rule.
+    """
+
+    matcher = compile_widget_rules(rules)
+    matches: typing.List[typing.Tuple['PoseBone', WidgetRule]] = []
+
+    for bone in bones:
+        rule = matcher.match(bone)
+        if rule and rule.shape:
+            matches.append((bone, rule))
+
+    return matches
+
+
+def apply_widget_rules(context: 'Context', armature: 'Object', rules: typing.Union[typing.List[WidgetRule], WidgetRuleMatcher],
+                       collection: 'Collection', wgts: dict = None,
+                       bones: typing.Iterable['PoseBone'] = None) -> typing.Tuple[typing.List['Object'], typing.List[str]]:
+    """Create the widgets of all bones of an armature that match a rule, in one batch.
+
+    Args:
+        context (Context): The current Blender context.
+        armature (Object): The armature.
+        rules (Union[List[WidgetRule], WidgetRuleMatcher]): The rules, or the compiled rules.
+        collection (Collection): The collection to create the widgets in.
+        wgts (dict, optional): The widget library. Defaults to the library of the add-on.
+        bones (Iterable[PoseBone], optional): The bones to match. Defaults to all bones of the armature.
+
+    Returns:
+        Tuple[List[Object], List[str]]: The created widgets and the names of shapes that don't exist.
+    """
+
+    if wgts is None:
+        wgts = read_widgets()
+
+    if bones is None:
+        bones = armature.pose.bones
+
+    shapes: typing.Dict[str, typing.Optional[dict]] = {}
+    assignments: typing.List[WidgetAssignment] = []
+
+    for bone, rule in match_widget_rules(rules, bones):
+        if rule.shape not in shapes:
+            if rule.shape in wgts:
+                shapes[rule.shape] = wgts[rule.shape]
+            elif rule.shape in PROCEDURAL_WIDGETS:
+                shapes[rule.shape] = get_procedural_widget(rule.shape)
+            else:
+                shapes[rule.shape] = None
+
+        if shapes[rule.shape] is not None:
+            assignments.append(WidgetAssignment(bone, shapes[rule.shape], rule.transform, {"shape": rule.shape}))
+
+    missing = sorted(shape for shape, widget in shapes.items() if widget is None)
+
+    return create_widgets(context, armature, assignments, collection), missing
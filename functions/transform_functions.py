@@ -0,0 +1,151 @@
+# ##### BEGIN GPL LICENSE BLOCK #####
+#
+# Copyright (C) 2020 Manuel Rais
+# manu@g-lul.com
+
+# Created by Manuel Rais and Christophe Seux
+
+#     This program is free software: you can redistribute it and/or modify
+#     it under the terms of the GNU General Public License as published by
+#     the Free Software Foundation, either version 3 of the License, or
+#     (at your option) any later version.
+
+#     This program is distributed in the hope that it will be useful,
+#     but WITHOUT ANY WARRANTY; without even the implied warranty of
+#     MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#     GNU General Public License for more details.
+
+#     You should have received a copy of the GNU General Public License
+#     along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+from bpy.types import (
+    Object,
+    PoseBone,
+)
+
+import typing
+
+import numpy
+
+
+class ArmatureMatrices():
+    """Bulk read of the rest matrices and lengths of all bones of an armature."""
+
+    def __init__(self, armature: 'Object') -> None:
+        bones = armature.data.bones
+        bone_count = len(bones)
+
+        # Blender stores matrices column major, transpose them to row major.
+        matrices = numpy.empty(bone_count * 16, dtype=numpy.float32)
+        bones.foreach_get("matrix_local", matrices)
+        self.matrix_local = matrices.reshape(
+            bone_count, 4, 4).transpose(0, 2, 1).astype(numpy.float64)
+
+        lengths = numpy.empty(bone_count, dtype=numpy.float32)
+        bones.foreach_get("length", lengths)
+        self.length = lengths.astype(numpy.float64)
+
+        self.matrix_world = numpy.array(armature.matrix_world, dtype=numpy.float64)
+        self.scale = numpy.array(armature.scale, dtype=numpy.float64)
+
+        self.index: typing.Dict[str, int] = {
+            name: i for i, name in enumerate(bones.keys())}
+
+    def world_matrices(self, bone_names: typing.List[str]) -> typing.Tuple[numpy.ndarray, numpy.ndarray]:
+        """Get the world space rest matrices of bones.
+
+        Args:
+            bone_names (List[str]): The names of the bones.
+
+        Returns:
+            Tuple[numpy.ndarray, numpy.ndarray]: The (n, 4, 4) world matrices of the bones and their
+            (n, 3) size, which is the bone length multiplied with the scale of the armature object.
+        """
+
+        indices = [self.index[name] for name in bone_names]
+        matrices = numpy.matmul(self.matrix_world, self.matrix_local[indices])
+        sizes = self.length[indices][:, None] * self.scale
+
+        return matrices, sizes
+
+
+def decompose_matrices(matrices: numpy.ndarray) -> typing.Tuple[numpy.ndarray, numpy.ndarray, numpy.ndarray]:
+    """Split (n, 4, 4) matrices into their location, rotation and scale.
+
+    Args:
+        matrices (numpy.ndarray): The matrices to decompose.
+
+    Returns:
+        Tuple[numpy.ndarray, numpy.ndarray, numpy.ndarray]: The (n, 3) locations, (n, 3, 3) rotations and (n, 3) scales.
+    """
+
+    location = matrices[:, :3, 3]
+    scale = numpy.linalg.norm(matrices[:, :3, :3], axis=1)
+    rotation = matrices[:, :3, :3] / numpy.where(scale == 0, 1, scale)[:, None, :]
+
+    return location, rotation, scale
+
+
+def compose_matrices(location: numpy.ndarray, rotation: numpy.ndarray, scale: numpy.ndarray) -> numpy.ndarray:
+    """Build (n, 4, 4) matrices from locations, rotations and scales.
+
+    Args:
+        location (numpy.ndarray): The (n, 3) locations.
+        rotation (numpy.ndarray): The (n, 3, 3) rotations.
+        scale (numpy.ndarray): The (n, 3) scales.
+
+    Returns:
+        numpy.ndarray: The composed matrices.
+    """
+
+    matrices = numpy.zeros((len(location), 4, 4), dtype=numpy.float64)
+    matrices[:, :3, :3] = rotation * scale[:, None, :]
+    matrices[:, :3, 3] = location
+    matrices[:, 3, 3] = 1
+
+    return matrices
+
+
+def get_widget_matrices(bones: typing.List['PoseBone']) -> numpy.ndarray:
+    """Compute the world matrices that match the widgets of the bones to the bone transforms.
+
+    Args:
+        bones (List[PoseBone]): The bones to match the widgets of.
+
+    Returns:
+        numpy.ndarray: The (n, 4, 4) world matrices of the widgets, in the order of the bones.
+    """
+
+    armature_matrices: typing.Dict['Object', ArmatureMatrices] = {}
+
+    def world_matrices(bones: typing.List['PoseBone']) -> typing.Tuple[numpy.ndarray, numpy.ndarray]:
+        matrices = numpy.empty((len(bones), 4, 4), dtype=numpy.float64)
+        sizes = numpy.empty((len(bones), 3), dtype=numpy.float64)
+        groups: typing.Dict['Object', typing.List[int]] = {}
+
+        for i, bone in enumerate(bones):
+            groups.setdefault(bone.id_data, []).append(i)
+
+        for armature, indices in groups.items():
+            if armature not in armature_matrices:
+                armature_matrices[armature] = ArmatureMatrices(armature)
+
+            matrices[indices], sizes[indices] = armature_matrices[armature].world_matrices(
+                [bones[i].name for i in indices])
+
+        return matrices, sizes
+
+    matrices, sizes = world_matrices(bones)
+    location, rotation, scale = decompose_matrices(matrices)
+
+    # If a bone has a transform override, use its location and rotation.
+    overrides = [i for i, bone in enumerate(bones) if bone.custom_shape_transform]
+    if overrides:
+        targets, _ = world_matrices(
+            [bones[i].custom_shape_transform for i in overrides])
+        location[overrides], rotation[overrides], _ = decompose_matrices(targets)
+
+    sized = [i for i, bone in enumerate(bones) if bone.use_custom_shape_bone_size]
+    scale[sized] = sizes[sized]
+
+    return compose_matrices(location, rotation, scale)
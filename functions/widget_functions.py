@@ -0,0 +1,370 @@
+# ##### BEGIN GPL LICENSE BLOCK #####
+#
+#     This program is free software: you can redistribute it and/or modify
+#     it under the terms of the GNU General Public License as published by
+#     the Free Software Foundation, either version 3 of the License, or
+#     (at your option) any later version.
+
+#     This program is distributed in the hope that it will be useful,
+#     but WITHOUT ANY WARRANTY; without even the implied warranty of
+#     MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#     GNU General Public License for more details.
+
+#     You should have received a copy of the GNU General Public License
+#     along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import bpy
+from bpy.types import (
+    Collection,
+    Context,
+    Mesh,
+    Object,
+    PoseBone
+)
+
+from mathutils import (
+    Euler,
+    Matrix,
+    Vector
+)
+
+import math
+import typing
+
+from .. import (
+    __package__ as ADDON_PACKAGE,
+    custom_types
+)
+from .main_functions import get_widget_prefix
+
+# The name of the ID property that stores how a widget was created.
+WIDGET_METADATA = "bonewidget"
+
+
+class WidgetTransform(typing.NamedTuple):
+    """The transformation of a widget relative to its bone."""
+
+    slide: float = 0.0
+    rotation: typing.Tuple[float, float, float] = (0.0, 0.0, 0.0)
+    scale: typing.Tuple[float, float, float] = (1.0, 1.0, 1.0)
+    relative_size: bool = True
+
+
+class WidgetAssignment(typing.NamedTuple):
+    """A widget to create for a bone. The source describes where the widget comes from,
+    e.g. `{"shape": "Circle"}` or the parameters of a procedural widget, and is stored on the widget."""
+
+    bone: 'PoseBone'
+    widget_data: dict
+    transform: WidgetTransform = WidgetTransform()
+    source: typing.Optional[dict] = None
+
+
+def get_widget_metadata(widget: 'Object') -> typing.Optional[dict]:
+    """Get the information about how a widget was created.
+
+    Args:
+        widget (Object): The widget object.
+
+    Returns:
+        Optional[dict]: The source (e.g. shape), the geometry hash and the transformation of the widget,
+        or None if the widget wasn't created by Bone Widget.
+    """
+
+    metadata = widget.get(WIDGET_METADATA)
+    if metadata is None or not hasattr(metadata, "to_dict"):
+        return None
+
+    return metadata.to_dict()
+
+
+def retire_widget(context: 'Context', bone: 'PoseBone') -> None:
+    """Rename the current widget of a bone to "_old" and unlink it from the scene collection.
+
+    Args:
+        context (Context): The current Blender context.
+        bone (PoseBone): The bone whose widget is replaced.
+    """
+
+    if not bone.custom_shape:
+        return
+
+    bone.custom_shape.name = bone.custom_shape.name + "_old"
+    # Meshes shared with other widgets keep their name.
+    if bone.custom_shape.data.users == 1:
+        bone.custom_shape.data.name = bone.custom_shape.data.name + "_old"
+    if context.scene.collection.objects.get(bone.custom_shape.name):
+        context.scene.collection.objects.unlink(bone.custom_shape)
+
+
+def build_widget_mesh(mesh: 'Mesh', widget_data: dict, bone: 'PoseBone', transform: typing.Optional[WidgetTransform]) -> None:
+    """Fill a mesh with the geometry of a widget. Scale, slide and rotation are applied to the vertices.
+
+    Args:
+        mesh (Mesh): The empty mesh.
+        widget_data (dict): The JSON Data of the widget.
+        bone (PoseBone): The bone the widget is created for.
+        transform (Optional[WidgetTransform]): The transformation of the widget, or None to keep the geometry as it is.
+    """
+
+    import numpy
+
+    vertices = numpy.array(widget_data["vertices"], dtype=float).reshape(-1, 3)
+
+    if transform is not None:
+        vertices = vertices * get_shape_scale(bone, transform)
+
+        # Rotate, then slide along the y axis of the bone.
+        rotation = numpy.array(Euler(transform.rotation).to_matrix())
+        vertices = vertices @ rotation.T + (0.0, transform.slide, 0.0)
+
+    mesh.from_pydata(vertices, widget_data['edges'], widget_data['faces'])
+    mesh.update(calc_edges=True)
+
+
+def get_shape_scale(bone: 'PoseBone', transform: WidgetTransform) -> typing.Tuple[float, float, float]:
+    """Get the scale of the widget geometry, relative to the bone length.
+
+    Args:
+        bone (PoseBone): The bone of the widget.
+        transform (WidgetTransform): The transformation of the widget.
+
+    Returns:
+        Tuple[float, float, float]: The scale of the widget. The Y and Z factors of the transformation are swapped.
+    """
+
+    bone_length = 1
+    if not transform.relative_size:
+        bone_length = 1 / bone.bone.length
+
+    return (transform.scale[0] * bone_length,
+            transform.scale[2] * bone_length,
+            transform.scale[1] * bone_length)
+
+
+def use_bone_shape_transform(context: 'Context') -> bool:
+    """Check whether widget transformations are stored on the bones instead of the widget geometry.
+
+    Args:
+        context (Context): The current Blender context.
+
+    Returns:
+        bool: True, if the non-destructive transformations are enabled and supported by this Blender version.
+    """
+
+    prefs: 'custom_types.AddonPreferences' = context.preferences.addons[ADDON_PACKAGE].preferences
+
+    return prefs.use_bone_shape_transform and hasattr(bpy.types.PoseBone, "custom_shape_translation")
+
+
+def get_widget_lod_level(context: 'Context', armature: 'Object', bone: 'PoseBone') -> int:
+    """Get the level of detail to use for the widget of a bone, according to the add-on preferences.
+    With "BONE_LENGTH", every halving of the bone length below the reference length uses the next level.
+
+    Args:
+        context (Context): The current Blender context.
+        armature (Object): The armature of the bone.
+        bone (PoseBone): The bone.
+
+    Returns:
+        int: The level of detail, 0 is the full detail.
+    """
+
+    from .geometry_functions import LOD_LEVELS
+
+    prefs: 'custom_types.AddonPreferences' = context.preferences.addons[ADDON_PACKAGE].preferences
+
+    if prefs.widget_lod_mode == "DENSITY":
+        return prefs.widget_lod_density
+
+    if prefs.widget_lod_mode == "BONE_LENGTH":
+        length = bone.bone.length * armature.matrix_world.median_scale
+        if length <= 0:
+            return LOD_LEVELS
+
+        return min(max(int(math.floor(math.log2(prefs.widget_lod_length / length))), 0), LOD_LEVELS)
+
+    return 0
+
+
+def select_widget_lod(widget_data: dict, level: int) -> typing.Tuple[dict, int]:
+    """Select a level of detail of a widget. Widgets without enough levels use their least detailed one.
+
+    Args:
+        widget_data (dict): The JSON Data of the widget, with its levels of detail under "lods".
+        level (int): The requested level of detail, 0 is the full detail.
+
+    Returns:
+        Tuple[dict, int]: The JSON Data of the level and the level.
+    """
+
+    level = min(level, len(widget_data.get("lods", ())))
+
+    if level == 0:
+        return widget_data, 0
+
+    return widget_data["lods"][level - 1], level
+
+
+def set_bone_shape_transform(armature: 'Object', bone: 'PoseBone', transform: typing.Optional[WidgetTransform]) -> None:
+    """Store the transformation of a widget in the custom shape offsets of its bone, which leaves the widget mesh unchanged.
+    The widget object is placed where the bone displays it, so it lines up while editing.
+
+    Args:
+        armature (Object): The armature of the bone.
+        bone (PoseBone): The bone.
+        transform (Optional[WidgetTransform]): The transformation of the widget, or None to reset the offsets.
+    """
+
+    length = bone.bone.length
+
+    if transform is None:
+        translation, rotation, scale = (0.0, 0.0, 0.0), (0.0, 0.0, 0.0), (1.0, 1.0, 1.0)
+    else:
+        translation = (0.0, transform.slide * length, 0.0)
+        rotation = transform.rotation
+        scale = get_shape_scale(bone, transform)
+
+    if hasattr(bone, "custom_shape_translation"):
+        bone.custom_shape_translation = translation
+        bone.custom_shape_rotation_euler = rotation
+        bone.custom_shape_scale_xyz = scale
+        bone.use_custom_shape_bone_size = True
+
+    widget: 'Object' = bone.custom_shape
+    if widget is not None:
+        widget.matrix_world = (armature.matrix_world @ bone.bone.matrix_local
+                               @ Matrix.LocRotScale(Vector(translation), Euler(rotation), Vector(scale) * length))
+
+        if WIDGET_METADATA in widget and transform is not None:
+            metadata = widget[WIDGET_METADATA]
+            metadata["slide"] = transform.slide
+            metadata["rotation"] = list(transform.rotation)
+            metadata["scale"] = list(transform.scale)
+            metadata["relative_size"] = transform.relative_size
+
+
+def create_widgets(context: 'Context', armature: 'Object',
+                   assignments: typing.Iterable[typing.Union[WidgetAssignment, tuple]],
+                   collection: 'Collection') -> typing.List['Object']:
+    """Create widgets for many bones of an armature at once. The view layer is updated only once.
+    Every widget stores its source, geometry hash, transformation and level of detail in an ID property.
+
+    Args:
+        context (Context): The current Blender context.
+        armature (Object): The armature of the bones.
+        assignments (Iterable[Union[WidgetAssignment, tuple]]): The bones, paired with the JSON Data,
+            the transformation and the source of their widget.
+        collection (Collection): The collection to create the widgets in.
+
+    Returns:
+        List[Object]: The created widget objects.
+    """
+
+    from .geometry_functions import (
+        widget_data_hash,
+        widget_mesh_hash
+    )
+
+    bw_widget_prefix = get_widget_prefix(context, armature)
+    non_destructive = use_bone_shape_transform(context)
+    shared_meshes: typing.Dict[str, 'Mesh'] = {}
+    created: typing.List['Object'] = []
+
+    for assignment in assignments:
+        bone, widget_data, transform, source = WidgetAssignment(*assignment)
+        widget_name = bw_widget_prefix + bone.name
+
+        if "hash" not in widget_data:
+            widget_data["hash"] = widget_data_hash(widget_data)
+
+        geometry, lod = select_widget_lod(widget_data, get_widget_lod_level(context, armature, bone))
+
+        # Only reset offsets the add-on set itself, users and other add-ons may use them as well.
+        previous = get_widget_metadata(bone.custom_shape) if bone.custom_shape else None
+        owns_offsets = bool(previous and previous.get("bone_transform"))
+
+        retire_widget(context, bone)
+
+        if non_destructive:
+            # The geometry isn't transformed, so all widgets with the same geometry share one mesh.
+            # The shape hash ignores the size, so the mesh is keyed by the exact geometry.
+            mesh_hash = widget_mesh_hash(geometry)
+            new_data = shared_meshes.get(mesh_hash)
+            if new_data is None:
+                new_data = get_shared_mesh(bw_widget_prefix, geometry, mesh_hash)
+                shared_meshes[mesh_hash] = new_data
+        else:
+            new_data = bpy.data.meshes.new(widget_name)
+            build_widget_mesh(new_data, geometry, bone, transform)
+
+        new_object = bpy.data.objects.new(widget_name, new_data)
+        new_object.name = widget_name
+
+        collection.objects.link(new_object)
+
+        new_object[WIDGET_METADATA] = {
+            **(source or {}),
+            "hash": widget_data["hash"],
+            "slide": transform.slide,
+            "rotation": list(transform.rotation),
+            "scale": list(transform.scale),
+            "relative_size": transform.relative_size,
+            "bone_transform": non_destructive,
+            "lod": lod,
+        }
+
+        bone.custom_shape = new_object
+        bone.bone.show_wire = True
+
+        if non_destructive:
+            set_bone_shape_transform(armature, bone, transform)
+        else:
+            # Reset offsets of non-destructive widgets, the transformation is part of the geometry.
+            if owns_offsets:
+                set_bone_shape_transform(armature, bone, None)
+            new_object.matrix_world = armature.matrix_world @ bone.bone.matrix_local
+            new_object.scale = [bone.bone.length, bone.bone.length, bone.bone.length]
+
+        created.append(new_object)
+
+    if created:
+        context.view_layer.update()
+
+    return created
+
+
+def get_shared_mesh(prefix: str, widget_data: dict, mesh_hash: str) -> 'Mesh':
+    """Get the untransformed mesh of a widget geometry, which is shared by all widgets with that geometry.
+
+    Args:
+        prefix (str): The widget prefix.
+        widget_data (dict): The JSON Data of the widget.
+        mesh_hash (str): The exact geometry hash of the widget, see `widget_mesh_hash`.
+
+    Returns:
+        Mesh: The existing shared mesh, or a new one.
+    """
+
+    mesh_name = f"{prefix}Shape_{mesh_hash[:8]}"
+    mesh: 'Mesh' = bpy.data.meshes.get(mesh_name)
+
+    # Reuse the mesh only if it still has the geometry of the widget.
+    if (mesh is not None and mesh.library is None and mesh.get(WIDGET_METADATA, {}).get("mesh_hash") == mesh_hash
+            and len(mesh.vertices) == len(widget_data["vertices"])):
+        return mesh
+
+    # The mesh was edited since it was created: free its name, otherwise every new mesh would be a numbered
+    # copy and the edited mesh would be found again the next time.
+    if mesh is not None and mesh.library is None:
+        if mesh.users == 0:
+            bpy.data.meshes.remove(mesh)
+        else:
+            mesh.pop(WIDGET_METADATA, None)
+            mesh.name = f"{prefix}Shape"
+
+    mesh = bpy.data.meshes.new(mesh_name)
+    build_widget_mesh(mesh, widget_data, None, None)
+    mesh[WIDGET_METADATA] = {"mesh_hash": mesh_hash}
+
+    return mesh
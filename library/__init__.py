@@ -0,0 +1,7 @@
+# The library package reads and writes widget library files.
+# It doesn't depend on Blender or NumPy, so it can be used from plain Python as well.
+
+from .codec import *
+from .storage import *
+from .importer import *
+from .maintenance import *
@@ -0,0 +1,212 @@
+# ##### BEGIN GPL LICENSE BLOCK #####
+#
+#     This program is free software: you can redistribute it and/or modify
+#     it under the terms of the GNU General Public License as published by
+#     the Free Software Foundation, either version 3 of the License, or
+#     (at your option) any later version.
+
+#     This program is distributed in the hope that it will be useful,
+#     but WITHOUT ANY WARRANTY; without even the implied warranty of
+#     MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#     GNU General Public License for more details.
+
+#     You should have received a copy of the GNU General Public License
+#     along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""Command line interface for the widget library.
+
+Usage, from the add-on directory:
+    python library/cli.py import [--library PATH] [--processes N] [--on-conflict RENAME|SKIP|REPLACE] FILE_OR_DIRECTORY...
+    python library/cli.py convert SOURCE DESTINATION [--compression NONE|ZLIB|LZMA] [--quantization ...] [--precision N]
+    python library/cli.py compact [--library PATH] [--decimals N] [--top N] [--dry-run]
+
+Or inside Blender:
+    blender --background --python library/cli.py -- import ...
+"""
+
+import argparse
+import os
+import sys
+import time
+import typing
+
+ADDON_DIRECTORY = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+if __package__:
+    from . import (
+        COMPRESSIONS,
+        LibrarySnapshot,
+        ON_CONFLICT,
+        QUANTIZATIONS,
+        commit_library_file,
+        compact_library,
+        convert_library_file,
+        default_library_path,
+        dumps_library,
+        find_widget_files,
+        format_compaction_report,
+        measure_parse_time,
+        merge_widgets,
+        parse_widget_files,
+        read_library_snapshot
+    )
+else:
+    # Run as a script: import the library package without importing the add-on, which requires Blender.
+    if ADDON_DIRECTORY not in sys.path:
+        sys.path.insert(0, ADDON_DIRECTORY)
+
+    from library import (
+        COMPRESSIONS,
+        LibrarySnapshot,
+        ON_CONFLICT,
+        QUANTIZATIONS,
+        commit_library_file,
+        compact_library,
+        convert_library_file,
+        default_library_path,
+        dumps_library,
+        find_widget_files,
+        format_compaction_report,
+        measure_parse_time,
+        merge_widgets,
+        parse_widget_files,
+        read_library_snapshot
+    )
+
+
+def import_command(args: argparse.Namespace) -> int:
+    """Import widget files into the library with a single atomic write."""
+
+    library_path = args.library or default_library_path(ADDON_DIRECTORY)
+
+    start = time.perf_counter()
+    files = find_widget_files(args.paths)
+    widgets, errors = parse_widget_files(files, args.processes)
+    parse_time = time.perf_counter() - start
+
+    for path, error in errors.items():
+        print(f"Failed to import {path}: {error}", file=sys.stderr)
+
+    wgts = read_library_snapshot(library_path)
+    added, skipped = merge_widgets(wgts, widgets, args.on_conflict)
+
+    if added and not args.dry_run:
+        commit_library(library_path, wgts, wgts, args)
+
+    print(f"Parsed {len(files)} files in {parse_time:.3f}s: "
+          f"{len(added)} widgets added, {len(skipped)} skipped, {len(errors)} files failed"
+          + (" (dry run)" if args.dry_run else f" -> {library_path}"))
+
+    return 1 if errors else 0
+
+
+def convert_command(args: argparse.Namespace) -> int:
+    """Convert a library file to another encoding."""
+
+    compression = None if args.compression == "NONE" else args.compression
+    source_size, destination_size = convert_library_file(args.source, args.destination, compression,
+                                                         args.quantization, args.precision)
+
+    print(f"Converted {args.source} ({source_size} bytes) -> {args.destination} ({destination_size} bytes)")
+
+    return 0
+
+
+def compact_command(args: argparse.Namespace) -> int:
+    """Compact the geometry of all widgets and rewrite the library atomically."""
+
+    library_path = args.library or default_library_path(ADDON_DIRECTORY)
+
+    with open(library_path, "rb") as f:
+        data = f.read()
+
+    wgts = read_library_snapshot(library_path)
+    compacted, reports = compact_library(wgts, args.decimals)
+
+    for line in format_compaction_report(reports, args.top):
+        print(line)
+
+    size_before, parse_time_before = len(data), measure_parse_time(data)
+
+    if args.dry_run:
+        print(f"Compacted {len(reports)} widgets (dry run)")
+        return 0
+
+    commit_library(library_path, compacted, wgts, args)
+
+    with open(library_path, "rb") as f:
+        data = f.read()
+        size_after, parse_time_after = len(data), measure_parse_time(data)
+
+    print(f"Compacted {len(reports)} widgets -> {library_path}: "
+          f"{size_before} -> {size_after} bytes, parsed in {parse_time_before * 1e3:.2f} -> {parse_time_after * 1e3:.2f} ms")
+
+    return 0
+
+
+def commit_library(library_path: str, wgts: dict, snapshot: LibrarySnapshot, args: argparse.Namespace) -> None:
+    """Write the library, merging the changes that others made since it was read."""
+
+    def dumps(merged: dict) -> bytes:
+        return dumps_library(library_path, merged, compression=args.compression,
+                             quantization=args.quantization, precision=args.precision)
+
+    _, conflicts, _ = commit_library_file(library_path, wgts, snapshot, dumps)
+
+    for name in conflicts:
+        print(f"The widget '{name}' was changed by another writer as well, their change was overwritten", file=sys.stderr)
+
+
+def add_encoding_arguments(parser: argparse.ArgumentParser, compression: str) -> None:
+    """Add the options for the encoding of written library files."""
+
+    parser.add_argument("--compression", choices=list(COMPRESSIONS), default=compression,
+                        help="compression of encoded (.bwl) libraries")
+    parser.add_argument("--quantization", choices=QUANTIZATIONS, default="LOSSLESS",
+                        help="quantization of the vertex coordinates of encoded libraries")
+    parser.add_argument("--precision", type=int, default=5,
+                        help="number of decimals for the DECIMALS quantization")
+
+
+def main(argv: typing.List[str] = None) -> int:
+    if argv is None:
+        # Blender passes the arguments of the script after "--".
+        argv = sys.argv[sys.argv.index("--") + 1:] if "--" in sys.argv else sys.argv[1:]
+
+    parser = argparse.ArgumentParser(prog="bonewidget-library", description="Manage the Bone Widget library.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    import_parser = commands.add_parser("import", help="import OBJ and JSON widget files into the library")
+    import_parser.add_argument("paths", nargs="+", help="widget files or directories to search for widget files")
+    import_parser.add_argument("--library", help="the library file, defaults to the library of the add-on")
+    import_parser.add_argument("--processes", type=int, default=None,
+                               help="number of worker processes, defaults to the number of CPUs")
+    import_parser.add_argument("--on-conflict", choices=ON_CONFLICT, default="RENAME",
+                               help="what to do with widgets whose name is already in the library")
+    import_parser.add_argument("--dry-run", action="store_true", help="parse the files without writing the library")
+    add_encoding_arguments(import_parser, "ZLIB")
+    import_parser.set_defaults(function=import_command)
+
+    convert_parser = commands.add_parser("convert", help="convert a library file to another encoding")
+    convert_parser.add_argument("source")
+    convert_parser.add_argument("destination")
+    add_encoding_arguments(convert_parser, "NONE")
+    convert_parser.set_defaults(function=convert_command)
+
+    compact_parser = commands.add_parser("compact", help="weld, deduplicate and round the geometry of all widgets")
+    compact_parser.add_argument("--library", help="the library file, defaults to the library of the add-on")
+    compact_parser.add_argument("--decimals", type=int, default=5,
+                                help="number of decimals to round the vertex coordinates to")
+    compact_parser.add_argument("--top", type=int, default=None,
+                                help="only list the widgets with the largest size reduction")
+    compact_parser.add_argument("--dry-run", action="store_true", help="report the reductions without writing the library")
+    add_encoding_arguments(compact_parser, "ZLIB")
+    compact_parser.set_defaults(function=compact_command)
+
+    args = parser.parse_args(argv)
+
+    return args.function(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
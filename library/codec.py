@@ -0,0 +1,250 @@
+# ##### BEGIN GPL LICENSE BLOCK #####
+#
+#     This program is free software: you can redistribute it and/or modify
+#     it under the terms of the GNU General Public License as published by
+#     the Free Software Foundation, either version 3 of the License, or
+#     (at your option) any later version.
+
+#     This program is distributed in the hope that it will be useful,
+#     but WITHOUT ANY WARRANTY; without even the implied warranty of
+#     MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#     GNU General Public License for more details.
+
+#     You should have received a copy of the GNU General Public License
+#     along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+from array import array
+import base64
+import json
+import lzma
+import sys
+import typing
+import zlib
+
+# Encoded libraries start with the magic bytes, followed by the format version and the compression.
+MAGIC = b"BWLIB"
+FORMAT_VERSION = 1
+
+COMPRESSIONS: typing.Dict[str, int] = {
+    "NONE": 0,
+    "ZLIB": 1,
+    "LZMA": 2,
+}
+
+QUANTIZATIONS: typing.Tuple[str, ...] = (
+    "LOSSLESS",
+    "DECIMALS",
+    "INT16",
+)
+
+# The largest value of an unsigned 16 bit integer.
+INT16_STEPS = 65535
+
+
+def is_encoded_library(data: bytes) -> bool:
+    """Check if data is an encoded widget library.
+
+    Args:
+        data (bytes): The content of a library file.
+
+    Returns:
+        bool: Whether the data starts with the magic bytes of an encoded library.
+    """
+
+    return data[:len(MAGIC)] == MAGIC
+
+
+def encode_library(wgts: dict, compression: str = "ZLIB", quantization: str = "LOSSLESS", precision: int = 5) -> bytes:
+    """Encode a widget library.
+
+    Args:
+        wgts (dict): The widgets, in the format returned by `read_widgets`.
+        compression (str, optional): One of "NONE", "ZLIB" or "LZMA". Defaults to "ZLIB".
+        quantization (str, optional): "LOSSLESS" keeps the vertices as they are, "DECIMALS" rounds them to
+            a number of decimals and "INT16" stores them as 16 bit integers within the bounding box of each widget.
+            Defaults to "LOSSLESS".
+        precision (int, optional): The number of decimals for the "DECIMALS" quantization. Defaults to 5.
+
+    Returns:
+        bytes: The encoded library.
+    """
+
+    if compression not in COMPRESSIONS:
+        raise ValueError(f"Unknown compression '{compression}'")
+
+    if quantization not in QUANTIZATIONS:
+        raise ValueError(f"Unknown quantization '{quantization}'")
+
+    payload = {
+        "quantization": quantization,
+        "widgets": {name: _encode_widget(widget, quantization, precision) for name, widget in wgts.items()},
+    }
+    data = json.dumps(payload, separators=(",", ":")).encode("utf-8")
+
+    if compression == "ZLIB":
+        data = zlib.compress(data, 9)
+    elif compression == "LZMA":
+        data = lzma.compress(data, preset=9)
+
+    return MAGIC + bytes((FORMAT_VERSION, COMPRESSIONS[compression])) + data
+
+
+def decode_library(data: bytes) -> dict:
+    """Decode an encoded widget library.
+
+    Args:
+        data (bytes): The encoded library.
+
+    Returns:
+        dict: The widgets, in the format returned by `read_widgets`.
+    """
+
+    if not is_encoded_library(data):
+        raise ValueError("Not an encoded widget library")
+
+    version, compression = data[len(MAGIC)], data[len(MAGIC) + 1]
+    if version > FORMAT_VERSION:
+        raise ValueError(f"Unsupported widget library version {version}")
+
+    data = data[len(MAGIC) + 2:]
+
+    if compression == COMPRESSIONS["ZLIB"]:
+        data = zlib.decompress(data)
+    elif compression == COMPRESSIONS["LZMA"]:
+        data = lzma.decompress(data)
+
+    payload = json.loads(data.decode("utf-8"))
+
+    return {name: _decode_widget(widget) for name, widget in payload["widgets"].items()}
+
+
+def loads_library(data: bytes) -> dict:
+    """Read a widget library from the content of a library file, which is either JSON or encoded.
+
+    Args:
+        data (bytes): The content of the library file.
+
+    Returns:
+        dict: The widgets.
+    """
+
+    if is_encoded_library(data):
+        return decode_library(data)
+
+    return json.loads(data.decode("utf-8"))
+
+
+def convert_library_file(source: str, destination: str, compression: str = None, quantization: str = "LOSSLESS", precision: int = 5) -> typing.Tuple[int, int]:
+    """Convert a library file to another encoding.
+
+    Args:
+        source (str): The path of the library file to convert.
+        destination (str): The path of the converted library file.
+        compression (str, optional): The compression of the encoded library, or None to write plain JSON. Defaults to None.
+        quantization (str, optional): The quantization of the encoded library. Defaults to "LOSSLESS".
+        precision (int, optional): The number of decimals for the "DECIMALS" quantization. Defaults to 5.
+
+    Returns:
+        Tuple[int, int]: The size of the source and the destination file in bytes.
+    """
+
+    with open(source, "rb") as f:
+        data = f.read()
+
+    wgts = loads_library(data)
+
+    if compression is None:
+        converted = json.dumps(wgts).encode("utf-8")
+    else:
+        converted = encode_library(wgts, compression, quantization, precision)
+
+    with open(destination, "wb") as f:
+        f.write(converted)
+
+    return len(data), len(converted)
+
+
+def _encode_widget(widget: dict, quantization: str, precision: int) -> dict:
+    """Encode the geometry of a single widget and its levels of detail. Keys other than the geometry are kept as they are."""
+
+    encoded = {key: value for key, value in widget.items()
+               if key not in ("vertices", "edges", "faces", "lods")}
+
+    if "lods" in widget:
+        encoded["lods"] = [_encode_widget(lod, quantization, precision) for lod in widget["lods"]]
+
+    vertices = widget["vertices"]
+
+    if quantization == "LOSSLESS":
+        encoded["vertices"] = vertices
+    elif quantization == "DECIMALS":
+        encoded["vertices"] = [[round(c, precision) for c in co] for co in vertices]
+    else:
+        low = [min((co[axis] for co in vertices), default=0.0) for axis in range(3)]
+        high = [max((co[axis] for co in vertices), default=0.0) for axis in range(3)]
+        step = [(high[axis] - low[axis]) / INT16_STEPS for axis in range(3)]
+
+        quantized = array("H", (
+            round((co[axis] - low[axis]) / step[axis]) if step[axis] else 0
+            for co in vertices for axis in range(3)))
+
+        encoded["bounds"] = low + step
+        encoded["vertices_int16"] = _pack(quantized)
+
+    encoded["edges"] = _pack(array("I", (v for edge in widget["edges"] for v in edge)))
+    encoded["face_sizes"] = _pack(array("I", (len(face) for face in widget["faces"])))
+    encoded["face_loops"] = _pack(array("I", (v for face in widget["faces"] for v in face)))
+
+    return encoded
+
+
+def _decode_widget(encoded: dict) -> dict:
+    """Decode the geometry of a single widget and its levels of detail."""
+
+    widget = {key: value for key, value in encoded.items()
+              if key not in ("bounds", "vertices_int16", "edges", "face_sizes", "face_loops", "lods")}
+
+    if "lods" in encoded:
+        widget["lods"] = [_decode_widget(lod) for lod in encoded["lods"]]
+
+    if "vertices_int16" in encoded:
+        low, step = encoded["bounds"][:3], encoded["bounds"][3:]
+        quantized = _unpack("H", encoded["vertices_int16"])
+        widget["vertices"] = [
+            [low[axis] + quantized[i + axis] * step[axis] for axis in range(3)]
+            for i in range(0, len(quantized), 3)]
+
+    edges = _unpack("I", encoded["edges"])
+    widget["edges"] = [[edges[i], edges[i + 1]] for i in range(0, len(edges), 2)]
+
+    face_sizes = _unpack("I", encoded["face_sizes"])
+    face_loops = _unpack("I", encoded["face_loops"])
+    faces = []
+    start = 0
+    for size in face_sizes:
+        faces.append(face_loops[start:start + size].tolist())
+        start += size
+    widget["faces"] = faces
+
+    return widget
+
+
+def _pack(values: array) -> str:
+    """Pack an array as little endian, base64 encoded bytes."""
+
+    if sys.byteorder != "little":
+        values.byteswap()
+
+    return base64.b64encode(values.tobytes()).decode("ascii")
+
+
+def _unpack(typecode: str, data: str) -> array:
+    """Unpack an array from little endian, base64 encoded bytes."""
+
+    values = array(typecode)
+    values.frombytes(base64.b64decode(data))
+
+    if sys.byteorder != "little":
+        values.byteswap()
+
+    return values
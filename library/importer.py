@@ -0,0 +1,250 @@
+# ##### BEGIN GPL LICENSE BLOCK #####
+#
+#     This program is free software: you can redistribute it and/or modify
+#     it under the terms of the GNU General Public License as published by
+#     the Free Software Foundation, either version 3 of the License, or
+#     (at your option) any later version.
+
+#     This program is distributed in the hope that it will be useful,
+#     but WITHOUT ANY WARRANTY; without even the implied warranty of
+#     MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#     GNU General Public License for more details.
+
+#     You should have received a copy of the GNU General Public License
+#     along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+import json
+import os
+import typing
+
+from .codec import (
+    is_encoded_library,
+    loads_library
+)
+
+# The file extensions that can be imported.
+WIDGET_FILE_EXTENSIONS = (".obj", ".json", ".bwl")
+
+ON_CONFLICT = ("RENAME", "SKIP", "REPLACE")
+
+
+def normalize_widget(widget: dict) -> dict:
+    """Bring widget data into the `{"vertices", "edges", "faces"}` schema used by the library.
+
+    Args:
+        widget (dict): The widget data, possibly with missing keys or differently typed values.
+
+    Returns:
+        dict: The normalized widget.
+    """
+
+    vertices = [[float(c) for c in co][:3] for co in widget.get("vertices", [])]
+    vertices = [co + [0.0] * (3 - len(co)) for co in vertices]
+
+    vertex_count = len(vertices)
+
+    edges = [[int(edge[0]), int(edge[1])] for edge in widget.get("edges", [])
+             if len(edge) == 2 and edge[0] != edge[1]]
+    faces = [[int(v) for v in face] for face in widget.get("faces", []) if len(face) >= 3]
+
+    for indices in edges + faces:
+        for index in indices:
+            if not 0 <= index < vertex_count:
+                raise ValueError(f"Vertex index {index} is out of range")
+
+    return {"vertices": vertices, "edges": edges, "faces": faces}
+
+
+def parse_obj(text: str, name: str) -> typing.List[typing.Tuple[str, dict]]:
+    """Parse the vertices, lines and faces of an OBJ file. Every object ("o") becomes a widget.
+
+    Args:
+        text (str): The content of the OBJ file.
+        name (str): The name of the widget, if the file doesn't define objects.
+
+    Returns:
+        List[Tuple[str, dict]]: The widgets, paired with their name.
+    """
+
+    vertices: typing.List[typing.List[float]] = []
+    objects: typing.List[typing.Tuple[str, list, list]] = []
+    current = (name, [], [])
+
+    def vertex_index(token: str) -> int:
+        # Indices are 1-based, negative indices are relative to the end.
+        index = int(token.split("/")[0])
+        return index - 1 if index > 0 else len(vertices) + index
+
+    for line in text.splitlines():
+        parts = line.split()
+        if not parts:
+            continue
+
+        if parts[0] == "v":
+            vertices.append([float(c) for c in parts[1:4]])
+        elif parts[0] == "o":
+            if current[1] or current[2]:
+                objects.append(current)
+            current = (" ".join(parts[1:]) or name, [], [])
+        elif parts[0] == "l":
+            indices = [vertex_index(token) for token in parts[1:]]
+            current[1].extend([a, b] for a, b in zip(indices, indices[1:]))
+        elif parts[0] == "f":
+            current[2].append([vertex_index(token) for token in parts[1:]])
+
+    if current[1] or current[2] or not objects:
+        objects.append(current)
+
+    widgets: typing.List[typing.Tuple[str, dict]] = []
+    for object_name, edges, faces in objects:
+        # Only keep the vertices that are used by the object.
+        used = sorted({v for indices in edges + faces for v in indices})
+        new_index = {v: i for i, v in enumerate(used)}
+
+        widgets.append((object_name, normalize_widget({
+            "vertices": [vertices[v] for v in used],
+            "edges": [[new_index[v] for v in edge] for edge in edges],
+            "faces": [[new_index[v] for v in face] for face in faces],
+        })))
+
+    return widgets
+
+
+def parse_widget_file(path: str) -> typing.List[typing.Tuple[str, dict]]:
+    """Parse a widget file. OBJ files, single widgets stored as JSON and whole libraries are supported.
+
+    Args:
+        path (str): The path of the file.
+
+    Returns:
+        List[Tuple[str, dict]]: The normalized widgets, paired with their name.
+    """
+
+    name = os.path.splitext(os.path.basename(path))[0]
+
+    with open(path, "rb") as f:
+        data = f.read()
+
+    if path.lower().endswith(".obj"):
+        return parse_obj(data.decode("utf-8", errors="replace"), name)
+
+    content = loads_library(data) if is_encoded_library(data) else json.loads(data.decode("utf-8"))
+
+    if "vertices" in content:
+        return [(name, normalize_widget(content))]
+
+    return [(widget_name, normalize_widget(widget)) for widget_name, widget in content.items()]
+
+
+def find_widget_files(paths: typing.Iterable[str]) -> typing.List[str]:
+    """Collect the widget files from a list of files and directories. Directories are searched recursively.
+
+    Args:
+        paths (Iterable[str]): The files and directories.
+
+    Returns:
+        List[str]: The widget files, sorted by path.
+    """
+
+    files: typing.List[str] = []
+
+    for path in paths:
+        if not os.path.isdir(path):
+            files.append(path)
+            continue
+
+        for root, _, filenames in os.walk(path):
+            files.extend(os.path.join(root, filename) for filename in filenames
+                         if filename.lower().endswith(WIDGET_FILE_EXTENSIONS))
+
+    return sorted(files)
+
+
+def parse_widget_files(paths: typing.List[str], processes: int = None) -> typing.Tuple[typing.List[typing.Tuple[str, dict]], typing.Dict[str, str]]:
+    """Parse many widget files, in a process pool if more than one process is requested.
+
+    Args:
+        paths (List[str]): The paths of the files.
+        processes (int, optional): The number of worker processes. Defaults to the number of CPUs, 1 parses in this process.
+
+    Returns:
+        Tuple[List[Tuple[str, dict]], Dict[str, str]]: The widgets paired with their name, in the order of the files,
+        and the errors keyed by the path of the file that failed to parse.
+    """
+
+    if processes is None:
+        processes = os.cpu_count() or 1
+
+    results: typing.List[typing.Any] = []
+
+    if processes > 1 and len(paths) > 1:
+        try:
+            with ProcessPoolExecutor(max_workers=processes) as executor:
+                chunksize = max(1, len(paths) // (processes * 4))
+                results = list(executor.map(_safe_parse_widget_file, paths, chunksize=chunksize))
+        except (BrokenProcessPool, OSError):
+            results = []
+
+    # Parse in this process, if no pool was requested or the pool couldn't be started.
+    if not results:
+        results = [_safe_parse_widget_file(path) for path in paths]
+
+    widgets: typing.List[typing.Tuple[str, dict]] = []
+    errors: typing.Dict[str, str] = {}
+
+    for path, (parsed, error) in zip(paths, results):
+        if error:
+            errors[path] = error
+            continue
+        widgets.extend(parsed)
+
+    return widgets, errors
+
+
+def merge_widgets(wgts: dict, widgets: typing.List[typing.Tuple[str, dict]], on_conflict: str = "RENAME") -> typing.Tuple[typing.List[str], typing.List[str]]:
+    """Merge widgets into a library.
+
+    Args:
+        wgts (dict): The library, which is modified in place.
+        widgets (List[Tuple[str, dict]]): The widgets paired with their name.
+        on_conflict (str, optional): What to do with widgets whose name is already in the library:
+            "RENAME" numbers them, "SKIP" ignores them and "REPLACE" overwrites the library widget. Defaults to "RENAME".
+
+    Returns:
+        Tuple[List[str], List[str]]: The names of the added widgets and the names of the skipped widgets.
+    """
+
+    if on_conflict not in ON_CONFLICT:
+        raise ValueError(f"Unknown conflict handling '{on_conflict}'")
+
+    added: typing.List[str] = []
+    skipped: typing.List[str] = []
+
+    for name, widget in widgets:
+        if name in wgts:
+            if on_conflict == "SKIP":
+                skipped.append(name)
+                continue
+
+            if on_conflict == "RENAME":
+                base_name = name
+                number = 1
+                while name in wgts:
+                    name = f"{base_name}.{number:03d}"
+                    number += 1
+
+        wgts[name] = widget
+        added.append(name)
+
+    return added, skipped
+
+
+def _safe_parse_widget_file(path: str) -> typing.Tuple[typing.List[typing.Tuple[str, dict]], typing.Optional[str]]:
+    """Parse a widget file in a worker process, returning errors instead of raising them."""
+
+    try:
+        return parse_widget_file(path), None
+    except Exception as e:
+        return [], f"{type(e).__name__}: {e}"
@@ -0,0 +1,191 @@
+# ##### BEGIN GPL LICENSE BLOCK #####
+#
+#     This program is free software: you can redistribute it and/or modify
+#     it under the terms of the GNU General Public License as published by
+#     the Free Software Foundation, either version 3 of the License, or
+#     (at your option) any later version.
+
+#     This program is distributed in the hope that it will be useful,
+#     but WITHOUT ANY WARRANTY; without even the implied warranty of
+#     MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#     GNU General Public License for more details.
+
+#     You should have received a copy of the GNU General Public License
+#     along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import json
+import time
+import typing
+
+from .codec import loads_library
+
+
+class ShapeReport(typing.NamedTuple):
+    """The size and parse time of a widget before and after compaction."""
+
+    name: str
+    size_before: int
+    size_after: int
+    parse_time_before: float
+    parse_time_after: float
+    vertices_before: int
+    vertices_after: int
+    edges_before: int
+    edges_after: int
+
+
+def compact_widget(widget: dict, precision: int = 5) -> dict:
+    """Compact the geometry of a widget: round the vertices, weld vertices that coincide after rounding,
+    remove unreferenced vertices and remove duplicate, degenerate and face edges.
+
+    Args:
+        widget (dict): The JSON Data of the widget.
+        precision (int, optional): The number of decimals to round the vertices to. Defaults to 5.
+
+    Returns:
+        dict: The compacted widget, with compacted levels of detail.
+        Other keys are kept, except the geometry hash if the geometry changed.
+    """
+
+    rounded = [tuple(round(float(c), precision) + 0.0 for c in co) for co in widget["vertices"]]
+
+    # Weld the vertices that have the same rounded coordinates.
+    welded: typing.Dict[tuple, int] = {}
+    weld_map = [welded.setdefault(co, len(welded)) for co in rounded]
+
+    faces: typing.List[typing.List[int]] = []
+    face_keys: typing.Set[tuple] = set()
+    face_edges: typing.Set[typing.Tuple[int, int]] = set()
+
+    for face in widget.get("faces", []):
+        loop: typing.List[int] = []
+        for v in face:
+            v = weld_map[v]
+            if not loop or loop[-1] != v:
+                loop.append(v)
+        if len(loop) > 1 and loop[0] == loop[-1]:
+            loop.pop()
+
+        # Drop faces that collapsed or that exist already, regardless of the first vertex or winding.
+        key = tuple(sorted(loop))
+        if len(set(loop)) < 3 or key in face_keys:
+            continue
+
+        face_keys.add(key)
+        faces.append(loop)
+        face_edges.update((min(a, b), max(a, b)) for a, b in zip(loop, loop[1:] + loop[:1]))
+
+    edges: typing.List[typing.List[int]] = []
+    seen_edges: typing.Set[typing.Tuple[int, int]] = set(face_edges)
+
+    for a, b in widget.get("edges", []):
+        a, b = weld_map[a], weld_map[b]
+        key = (min(a, b), max(a, b))
+        if a == b or key in seen_edges:
+            continue
+
+        seen_edges.add(key)
+        edges.append([a, b])
+
+    vertices = [list(co) for co in welded]
+
+    # Remove the vertices that aren't used by any edge or face, unless the widget only has vertices.
+    if edges or faces:
+        used = sorted({v for edge in edges for v in edge} | {v for face in faces for v in face})
+        if len(used) < len(vertices):
+            new_index = {v: i for i, v in enumerate(used)}
+            vertices = [vertices[v] for v in used]
+            edges = [[new_index[a], new_index[b]] for a, b in edges]
+            faces = [[new_index[v] for v in face] for face in faces]
+
+    compacted = dict(widget)
+    compacted.update(vertices=vertices, edges=edges, faces=faces)
+
+    if "lods" in widget:
+        compacted["lods"] = [compact_widget(lod, precision) for lod in widget["lods"]]
+
+    if "hash" in compacted and (vertices, edges, faces) != (
+            [list(co) for co in widget["vertices"]], widget.get("edges", []), widget.get("faces", [])):
+        # Rounding moves vertices without changing the counts, which changes the hash as well.
+        # The hash is computed again when the library is indexed.
+        del compacted["hash"]
+
+    return compacted
+
+
+def measure_parse_time(data: bytes, repeat: int = 3) -> float:
+    """Measure how long it takes to parse a library or a widget.
+
+    Args:
+        data (bytes): The JSON or encoded data.
+        repeat (int, optional): How often to parse the data, the fastest time is used. Defaults to 3.
+
+    Returns:
+        float: The parse time in seconds.
+    """
+
+    times: typing.List[float] = []
+
+    for _ in range(repeat):
+        start = time.perf_counter()
+        loads_library(data)
+        times.append(time.perf_counter() - start)
+
+    return min(times)
+
+
+def compact_library(wgts: dict, precision: int = 5) -> typing.Tuple[dict, typing.List[ShapeReport]]:
+    """Compact all widgets of a library.
+
+    Args:
+        wgts (dict): The widget library, which isn't modified.
+        precision (int, optional): The number of decimals to round the vertices to. Defaults to 5.
+
+    Returns:
+        Tuple[dict, List[ShapeReport]]: The compacted library and a report for every widget, in the order of the library.
+    """
+
+    compacted: dict = {}
+    reports: typing.List[ShapeReport] = []
+
+    for name, widget in wgts.items():
+        compacted[name] = compact_widget(widget, precision)
+
+        before = json.dumps(widget).encode("utf-8")
+        after = json.dumps(compacted[name]).encode("utf-8")
+
+        reports.append(ShapeReport(
+            name, len(before), len(after),
+            measure_parse_time(before), measure_parse_time(after),
+            len(widget["vertices"]), len(compacted[name]["vertices"]),
+            len(widget.get("edges", [])), len(compacted[name]["edges"])
+        ))
+
+    return compacted, reports
+
+
+def format_compaction_report(reports: typing.List[ShapeReport], limit: int = None) -> typing.List[str]:
+    """Format compaction reports as lines of text. The widgets with the largest size reduction come first.
+
+    Args:
+        reports (List[ShapeReport]): The reports.
+        limit (int, optional): The maximum number of widgets to list. Defaults to all widgets.
+
+    Returns:
+        List[str]: The lines of the report.
+    """
+
+    reports = sorted(reports, key=lambda report: report.size_after - report.size_before)
+    if limit is not None:
+        reports = reports[:limit]
+
+    width = max([len(report.name) for report in reports] + [5])
+    lines = [f"{'Shape':<{width}}  {'Bytes':>15}  {'Parse (us)':>15}  {'Vertices':>11}  {'Edges':>11}"]
+
+    for report in reports:
+        lines.append(
+            f"{report.name:<{width}}  {report.size_before:>7}>{report.size_after:<7}  "
+            f"{report.parse_time_before * 1e6:>7.1f}>{report.parse_time_after * 1e6:<7.1f}  "
+            f"{report.vertices_before:>5}>{report.vertices_after:<5}  {report.edges_before:>5}>{report.edges_after:<5}")
+
+    return lines
@@ -0,0 +1,391 @@
+# ##### BEGIN GPL LICENSE BLOCK #####
+#
+#     This program is free software: you can redistribute it and/or modify
+#     it under the terms of the GNU General Public License as published by
+#     the Free Software Foundation, either version 3 of the License, or
+#     (at your option) any later version.
+
+#     This program is distributed in the hope that it will be useful,
+#     but WITHOUT ANY WARRANTY; without even the implied warranty of
+#     MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#     GNU General Public License for more details.
+
+#     You should have received a copy of the GNU General Public License
+#     along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import contextlib
+import json
+import os
+import socket
+import time
+import typing
+import uuid
+
+from .codec import (
+    encode_library,
+    loads_library
+)
+
+
+# How long (in seconds) to wait for the lock of a library file, and after how long a lock is considered stale,
+# because the process that created it crashed.
+LOCK_TIMEOUT = 30.0
+LOCK_STALE_AFTER = 120.0
+
+# How often a writer merges again without holding the lock, when other writers keep changing the file.
+# The last attempt is done while holding the lock, so it always succeeds.
+WRITE_ATTEMPTS = 3
+
+
+class LibraryLockError(TimeoutError):
+    """Raised when the lock of a library file can't be acquired in time."""
+
+
+class LibrarySnapshot(dict):
+    """The widgets of a library file, together with the version of the file they were read from.
+    Writers merge their changes against the snapshot, so changes made by others since then are kept.
+    """
+
+    __slots__ = ("base", "version")
+
+    def __init__(self, widgets: dict, version: typing.Optional[tuple], base: dict = None):
+        """
+        Args:
+            widgets (dict): The widgets of the library file.
+            version (Optional[tuple]): The version of the file, see `library_version`.
+            base (dict, optional): The widgets as they were read, which must not be modified. Defaults to `widgets`.
+        """
+
+        super().__init__(widgets)
+        self.base: dict = widgets if base is None else base
+        self.version = version
+
+
+def default_library_path(directory: str) -> str:
+    """Get the path of the widget library in a directory. The encoded library is preferred, if it exists.
+
+    Args:
+        directory (str): The directory of the library, usually the add-on directory.
+
+    Returns:
+        str: The path of the library file.
+    """
+
+    encoded_file = os.path.join(directory, "widgets.bwl")
+
+    if os.path.exists(encoded_file):
+        return encoded_file
+
+    return os.path.join(directory, "widgets.json")
+
+
+def read_library_file(path: str, stats: dict = None) -> dict:
+    """Read a library file, which is either JSON or encoded.
+
+    Args:
+        path (str): The path of the library file.
+        stats (dict, optional): Adds the time spent reading and parsing in seconds and the number of bytes read
+            to the "read_time", "parse_time" and "bytes_read" keys of this dictionary.
+
+    Returns:
+        dict: The widgets, or an empty dictionary if the file doesn't exist.
+    """
+
+    if not os.path.exists(path):
+        return {}
+
+    start = time.perf_counter()
+    with open(path, "rb") as f:
+        data = f.read()
+
+    read_end = time.perf_counter()
+    wgts = loads_library(data)
+
+    if stats is not None:
+        stats["read_time"] = stats.get("read_time", 0.0) + read_end - start
+        stats["parse_time"] = stats.get("parse_time", 0.0) + time.perf_counter() - read_end
+        stats["bytes_read"] = stats.get("bytes_read", 0) + len(data)
+
+    return wgts
+
+
+def library_version(path: str) -> typing.Optional[tuple]:
+    """Get a token that changes whenever a library file is modified.
+
+    Args:
+        path (str): The path of the library file.
+
+    Returns:
+        Optional[tuple]: The modification time, size and inode of the file, or None if it doesn't exist.
+        Files are replaced by `atomic_write`, so the inode also changes when a network share
+        only stores coarse modification times and the size stays the same.
+    """
+
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return None
+
+    return (stat.st_mtime_ns, stat.st_size, stat.st_ino)
+
+
+def read_library_snapshot(path: str, stats: dict = None) -> LibrarySnapshot:
+    """Read a library file to modify it and write it with `commit_library_file` later.
+
+    Args:
+        path (str): The path of the library file.
+        stats (dict, optional): Collects the read and parse time and the bytes read, see `read_library_file`.
+
+    Returns:
+        LibrarySnapshot: The widgets, or no widgets if the file doesn't exist.
+    """
+
+    while True:
+        version = library_version(path)
+        wgts = read_library_file(path, stats)
+
+        # Read again if the file was replaced while reading it.
+        if library_version(path) == version:
+            return LibrarySnapshot(wgts, version)
+
+
+def dumps_library(path: str, wgts: dict, compression: str = "ZLIB", quantization: str = "LOSSLESS", precision: int = 5) -> bytes:
+    """Serialize widgets in the format of a library file. Files with the .bwl extension are encoded, all others are JSON.
+
+    Args:
+        path (str): The path of the library file.
+        wgts (dict): The widgets.
+        compression (str, optional): The compression of encoded libraries. Defaults to "ZLIB".
+        quantization (str, optional): The quantization of encoded libraries. Defaults to "LOSSLESS".
+        precision (int, optional): The number of decimals for the "DECIMALS" quantization. Defaults to 5.
+
+    Returns:
+        bytes: The content of the library file.
+    """
+
+    if path.endswith(".bwl"):
+        return encode_library(wgts, compression, quantization, precision)
+
+    return json.dumps(wgts).encode("utf-8")
+
+
+def atomic_write(path: str, data: bytes) -> None:
+    """Write a file atomically: the data is written to a temporary file in the same directory,
+    which then replaces the file. Readers either see the old or the new content, never a partial file.
+
+    Args:
+        path (str): The path of the file.
+        data (bytes): The content of the file.
+    """
+
+    directory = os.path.dirname(os.path.abspath(path))
+    temp_path = os.path.join(directory, f".widgets-{uuid.uuid4().hex}.tmp")
+    # New files get the default permissions, the kernel applies the umask of the process.
+    fd = os.open(temp_path, os.O_WRONLY | os.O_CREAT | os.O_EXCL | getattr(os, "O_BINARY", 0), 0o666)
+
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+
+        # Keep the permissions of the replaced file.
+        with contextlib.suppress(FileNotFoundError):
+            os.chmod(temp_path, os.stat(path).st_mode & 0o7777)
+        os.replace(temp_path, path)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+
+
+def write_library_file(path: str, wgts: dict, **encoding: typing.Any) -> int:
+    """Atomically write a library file.
+
+    Args:
+        path (str): The path of the library file.
+        wgts (dict): The widgets.
+        encoding: The compression, quantization and precision of encoded libraries.
+
+    Returns:
+        int: The size of the written file in bytes.
+    """
+
+    data = dumps_library(path, wgts, **encoding)
+    atomic_write(path, data)
+
+    return len(data)
+
+
+@contextlib.contextmanager
+def library_lock(path: str, timeout: float = LOCK_TIMEOUT, stale_after: float = LOCK_STALE_AFTER) -> typing.Iterator[None]:
+    """Hold the lock of a library file. The lock is a file next to the library, which is created exclusively,
+    so it also works for libraries shared by several computers on a network drive.
+
+    Args:
+        path (str): The path of the library file.
+        timeout (float, optional): How long to wait for the lock in seconds. Defaults to LOCK_TIMEOUT.
+        stale_after (float, optional): The age in seconds after which an existing lock is removed. Defaults to LOCK_STALE_AFTER.
+
+    Raises:
+        LibraryLockError: If the lock isn't acquired within the timeout.
+    """
+
+    lock_path = path + ".lock"
+    token = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex}"
+    deadline = time.monotonic() + timeout
+    delay = 0.01
+
+    while True:
+        try:
+            fd = os.open(lock_path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+        except FileExistsError:
+            pass
+        else:
+            with os.fdopen(fd, "w") as f:
+                f.write(token)
+            break
+
+        if _break_stale_lock(lock_path, stale_after):
+            continue
+
+        if time.monotonic() > deadline:
+            raise LibraryLockError(f"Timed out waiting for the lock of {path}: {lock_path}")
+
+        time.sleep(delay)
+        delay = min(delay * 2, 0.5)
+
+    try:
+        yield
+    finally:
+        # Don't remove a lock that another process took over, because it considered ours stale.
+        if _read_lock_token(lock_path) == token:
+            with contextlib.suppress(FileNotFoundError):
+                os.remove(lock_path)
+
+
+def merge_library(base: dict, ours: dict, theirs: dict) -> typing.Tuple[dict, typing.List[str]]:
+    """Merge two modified versions of a library. Widgets that were added, removed or changed in only one of them
+    are merged, if both changed a widget differently, ours is kept.
+
+    Args:
+        base (dict): The widgets both versions were read from.
+        ours (dict): Our modified widgets.
+        theirs (dict): The widgets currently in the library file.
+
+    Returns:
+        Tuple[dict, List[str]]: The merged widgets and the names of the widgets that both versions changed differently.
+    """
+
+    merged = dict(theirs)
+    conflicts: typing.List[str] = []
+
+    for name in base.keys() | ours.keys():
+        if _same_widget(base.get(name), ours.get(name)):
+            continue
+
+        if not _same_widget(base.get(name), theirs.get(name)) and not _same_widget(ours.get(name), theirs.get(name)):
+            conflicts.append(name)
+
+        if name in ours:
+            merged[name] = ours[name]
+        else:
+            merged.pop(name, None)
+
+    return merged, sorted(conflicts)
+
+
+def commit_library_file(path: str, wgts: dict, snapshot: LibrarySnapshot,
+                        dumps: typing.Callable[[dict], bytes]) -> typing.Tuple[dict, typing.List[str], tuple]:
+    """Write the changes made to a snapshot of a library file. Changes that other writers made since the snapshot
+    was read are merged, instead of being overwritten. Merging and serializing happen without holding the lock,
+    the lock is only held to check the version of the file and to replace it.
+
+    Args:
+        path (str): The path of the library file.
+        wgts (dict): The modified widgets.
+        snapshot (LibrarySnapshot): The snapshot the widgets were read from.
+        dumps (Callable[[dict], bytes]): Serializes the widgets.
+
+    Returns:
+        Tuple[dict, List[str], tuple]: The written widgets, the names of the widgets that another writer changed
+        differently and that were overwritten, and the version of the written file.
+    """
+
+    for attempt in range(WRITE_ATTEMPTS):
+        locked = attempt == WRITE_ATTEMPTS - 1
+
+        with library_lock(path) if locked else contextlib.nullcontext():
+            version = library_version(path)
+
+            if version == snapshot.version:
+                merged, conflicts = wgts, []
+            else:
+                merged, conflicts = merge_library(snapshot.base, wgts, read_library_file(path))
+
+            data = dumps(merged)
+
+            if locked:
+                atomic_write(path, data)
+                return merged, conflicts, library_version(path)
+
+        with library_lock(path):
+            if library_version(path) == version:
+                atomic_write(path, data)
+                return merged, conflicts, library_version(path)
+
+
+def _read_lock_token(lock_path: str) -> typing.Optional[str]:
+    """Read the token of the process that holds a lock, or None if the lock doesn't exist."""
+
+    try:
+        with open(lock_path, "r") as f:
+            return f.read()
+    except FileNotFoundError:
+        return None
+
+
+def _break_stale_lock(lock_path: str, stale_after: float) -> bool:
+    """Remove a lock that is older than `stale_after` seconds. The lock is renamed to a unique name first
+    and only removed if it is still the same lock, otherwise another waiter already replaced the stale lock
+    with a fresh one, which is restored. The renamed lock is only removed once that fresh lock is back in place.
+
+    Returns:
+        bool: True if the lock is gone, so acquiring it can be tried again right away.
+    """
+
+    try:
+        if time.time() - os.path.getmtime(lock_path) <= stale_after:
+            return False
+        token = _read_lock_token(lock_path)
+    except FileNotFoundError:
+        return True
+
+    stale_path = f"{lock_path}.{uuid.uuid4().hex}.stale"
+
+    try:
+        os.rename(lock_path, stale_path)
+    except FileNotFoundError:
+        return True
+
+    if _read_lock_token(stale_path) != token:
+        # Put the fresh lock back. If yet another process has taken the lock in the meantime, the fresh lock
+        # can't be restored without replacing that one, so it's left under its unique name.
+        try:
+            os.link(stale_path, lock_path)
+        except OSError:
+            return False
+
+    os.remove(stale_path)
+    return True
+
+
+def _same_widget(a: typing.Optional[dict], b: typing.Optional[dict]) -> bool:
+    """Check whether two widgets are equal, ignoring their geometry hash, which may be computed later."""
+
+    if a is b:
+        return True
+    if a is None or b is None:
+        return False
+
+    return {k: v for k, v in a.items() if k != "hash"} == {k: v for k, v in b.items() if k != "hash"}
@@ -13,8 +13,17 @@ class BONEWIDGET_MT_bw_specials(Menu):
         layout: 'UILayout' = self.layout
         layout.operator("bonewidget.add_widgets", icon="ADD",
                         text="Add Widget to library")
+        layout.operator("bonewidget.add_widgets_bulk", icon="ADD",
+                        text="Add all Widgets to library")
         layout.operator("bonewidget.remove_widgets", icon="REMOVE",
                         text="Remove Widget from library")
+        layout.separator()
+        layout.operator("bonewidget.deduplicate_library", icon="TRASH",
+                        text="Remove Duplicate Widgets")
+        layout.operator("bonewidget.generate_widget_lods", icon="MOD_DECIM",
+                        text="Generate Levels of Detail")
+        layout.operator("bonewidget.compact_library", icon="AUTOMERGE_ON",
+                        text="Compact Widget Library")
 
 
 classes = (
@@ -30,5 +39,5 @@ def register():
 
 def unregister():
     from bpy.utils import unregister_class
-    for cls in classes:
+    for cls in reversed(classes):
         unregister_class(cls)
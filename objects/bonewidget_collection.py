@@ -9,12 +9,15 @@ from bpy.types import (
 import typing
 
 from .. import (
-    __package__,
+    __package__ as ADDON_PACKAGE,
     custom_types
 )
 
 class BonewidgetCollection:
-    def __init__(self, widget: 'Object' = None, layer_collection: bool = True) -> None:
+    def __init__(self, widget: 'Object' = None, layer_collection: bool = True, armature: 'Object' = None) -> None:
+        # The armature resolves the collection name, it defaults to the active object.
+        self.armature = armature if armature is not None else bpy.context.active_object
+
         self.collection_name = self._get_collection_name()
         self.find_existing_widget_collection()
 
@@ -28,11 +31,15 @@ class BonewidgetCollection:
 
         self.collection = self._recursively_find_layer_collection(start_collection)
 
+        # Unlinked widget collections only exist in the blend data.
+        if self.collection is None and not layer_collection and self._get_collection_mode() == "UNLINKED":
+            self.collection = bpy.data.collections.get(self.collection_name)
+
     def find_existing_widget_collection(self) -> None:
-        if not(bpy.context.active_object and  bpy.context.active_object.type == "ARMATURE"):
+        if not(self.armature and self.armature.type == "ARMATURE"):
             return
 
-        armature = bpy.context.active_object
+        armature = self.armature
         collection: 'Collection' = None
         collection_children: typing.List[str] = []
 
@@ -64,21 +71,82 @@ class BonewidgetCollection:
 
     def create_collection(self) -> None:
         """Link a widget collection to the scene or create a new collection, if the widget collection doesn't exist.
+        The collection is hidden according to the collection mode of the add-on preferences.
         """
 
         collection = bpy.data.collections.get(self.collection_name)
 
-        if collection:
+        if not collection:
+            collection = bpy.data.collections.new(self.collection_name)
+
+        self.collection = collection
+
+        if self._get_collection_mode() == "UNLINKED":
+            # Keep the collection when the file is saved, even though no scene uses it.
+            collection.use_fake_user = True
+            return
+
+        bpy.context.scene.collection.children.link(collection)
+        self.hide_collection()
+
+    def show_collection(self) -> 'LayerCollection':
+        """Make the widget collection visible in the view layer, e.g. for editing a widget.
+        Unlinked collections are linked to the scene and excluded collections are included.
+
+        Returns:
+            LayerCollection: The layer collection of the widget collection.
+        """
+
+        collection = bpy.data.collections.get(self.collection_name)
+
+        if self._recursively_find_layer_collection(bpy.context.scene.collection) is None:
             bpy.context.scene.collection.children.link(collection)
+
+        self.collection = self._recursively_find_layer_collection(bpy.context.view_layer.layer_collection)
+        self.make_collection_editable()
+        self.collection.hide_viewport = False
+
+        return self.collection
+
+    def hide_collection(self) -> None:
+        """Hide the widget collection according to the collection mode of the add-on preferences.
+        Excluded and unlinked collections keep the widgets out of the evaluated view layer.
+        """
+
+        mode = self._get_collection_mode()
+        collection = bpy.data.collections.get(self.collection_name)
+
+        if collection is None:
+            return
+
+        if mode == "UNLINKED":
+            collection.use_fake_user = True
+            if bpy.context.scene.collection.children.get(self.collection_name):
+                bpy.context.scene.collection.children.unlink(collection)
             self.collection = collection
-            bpy.context.view_layer.layer_collection.children[self.collection_name].hide_viewport = True
             return
 
-        collection = bpy.data.collections.new(self.collection_name)
-        bpy.context.scene.collection.children.link(collection)
+        layer_collection = self._recursively_find_layer_collection(bpy.context.view_layer.layer_collection)
+        if layer_collection is None:
+            return
 
-        bpy.context.view_layer.layer_collection.children[self.collection_name].hide_viewport = True
-        self.collection = collection
+        if mode == "EXCLUDED":
+            layer_collection.exclude = True
+        else:
+            layer_collection.hide_viewport = True
+
+        self.collection = layer_collection
+
+    def is_hidden(self) -> bool:
+        """Check whether the widget collection is hidden, excluded or not linked to the scene.
+
+        Returns:
+            bool: True, if the widgets aren't visible.
+        """
+
+        layer_collection = self._recursively_find_layer_collection(bpy.context.view_layer.layer_collection)
+
+        return layer_collection is None or layer_collection.exclude or layer_collection.hide_viewport
 
 
     def make_collection_editable(self) -> None:
@@ -115,6 +183,17 @@ class BonewidgetCollection:
                 return found
 
 
+    def _get_collection_mode(self) -> str:
+        """Get how the widget collection is hidden.
+
+        Returns:
+            str: HIDDEN, EXCLUDED or UNLINKED.
+        """
+
+        prefs: 'custom_types.AddonPreferences' = bpy.context.preferences.addons[ADDON_PACKAGE].preferences
+
+        return prefs.widget_collection_mode
+
     def _get_collection_name(self) -> str:
         """Get the name of the widget collection.
 
@@ -122,11 +201,11 @@ class BonewidgetCollection:
             str: The name of the widget collection.
         """
 
-        prefs: 'custom_types.AddonPreferences' = bpy.context.preferences.addons[__package__].preferences
+        prefs: 'custom_types.AddonPreferences' = bpy.context.preferences.addons[ADDON_PACKAGE].preferences
 
         collection_name = prefs.bonewidget_collection_name
 
-        if bpy.context.active_object:
-            collection_name = collection_name.replace("{object}", bpy.context.active_object.name)
+        if self.armature:
+            collection_name = collection_name.replace("{object}", self.armature.name)
 
         return collection_name
@@ -36,21 +36,54 @@ from bpy.props import (
     FloatProperty,
     BoolProperty,
     FloatVectorProperty,
+    IntProperty,
     StringProperty
 )
 
-import numpy
 from mathutils import Matrix
 
+import json
+import os
 import typing
 
 from .functions import (
+    PROCEDURAL_WIDGETS,
+    WIDGET_METADATA,
+    WidgetAssignment,
+    WidgetTransform,
+    apply_widget_rules,
+    compile_widget_rules,
+    create_widgets,
+    export_widget_manifest,
+    find_duplicate_widget,
+    get_library_path,
+    get_library_stats,
+    get_widget_index,
+    get_widget_metadata,
+    get_procedural_lod_segments,
+    get_procedural_widget,
+    get_pose_armatures,
+    get_widget_lod_level,
     get_widget_prefix,
+    group_bones_by_armature,
+    dumps_widgets,
+    load_widget_rules,
+    mesh_data_to_dico,
     read_widgets,
     object_data_to_dico,
+    read_mesh_buffers,
+    replay_widget_manifest,
+    reset_library_stats,
+    set_bone_shape_transform,
     write_widgets
 )
 
+from .library import (
+    compact_library,
+    format_compaction_report,
+    measure_parse_time
+)
+
 from .objects import (
     BonewidgetCollection
 )
@@ -108,105 +141,339 @@ class BoneWidgetCreateBase(Operator):
         row = col.row(align=True)
         row.prop(self, "rotation", text="Rotation")
 
-    def handle_existing_widget(self, bone: 'PoseBone'):
-        if bone.custom_shape:
-            bone.custom_shape.name = bone.custom_shape.name + "_old"
-            bone.custom_shape.data.name = bone.custom_shape.data.name + "_old"
-            if bpy.context.scene.collection.objects.get(bone.custom_shape.name):
-                bpy.context.scene.collection.objects.unlink(bone.custom_shape)
+    def get_transform(self) -> 'WidgetTransform':
+        """Get the transformation of the widgets from the operator properties.
 
-    def update_widget_transforms(self, context: 'Context', widget_object: 'Object', matrix_bone: 'PoseBone'):
-        widget_mesh: 'Mesh' = widget_object.data
+        Returns:
+            WidgetTransform: The slide, rotation, scale and relative size of the widgets.
+        """
 
-        # Create tranform matrices (slide vector and rotation)
-        widget_matrix = Matrix()
-        trans = Matrix.Translation((0, self.slide, 0))
-        rot = self.rotation.to_matrix().to_4x4()
+        return WidgetTransform(self.slide, tuple(self.rotation), tuple(self.scale), self.relative_size)
 
-        # Translate then rotate the matrix
-        widget_matrix = widget_matrix @ trans
-        widget_matrix = widget_matrix @ rot
 
-        # transform the widget with this matrix
-        widget_mesh.transform(widget_matrix)
-        widget_mesh.update(calc_edges=True)
+class BONEWIDGET_OT_create_widget(BoneWidgetCreateBase):
+    """Creates a widget for selected bone"""
+    bl_idname = "bonewidget.create_widget"
+    bl_label = "Create"
 
-        widget_object.matrix_world = context.active_object.matrix_world @ matrix_bone.bone.matrix_local
-        widget_object.scale = [matrix_bone.bone.length,
-                               matrix_bone.bone.length, matrix_bone.bone.length]
+    segments: IntProperty(
+        name="Segments",
+        default=0,
+        min=0,
+        max=1024,
+        description="Number of segments of procedural round shapes. 0 uses the default of the shape"
+    )
+    radius: FloatProperty(
+        name="Radius",
+        default=0.0,
+        min=0.0,
+        description="Radius of procedural round shapes. 0 uses the default of the shape"
+    )
+    thickness: FloatProperty(
+        name="Thickness",
+        default=0.0,
+        min=0.0,
+        description="Distance between double lines of procedural shapes. 0 uses the default of the shape"
+    )
 
-        layer = context.view_layer
-        layer.update()
+    def draw(self, context: 'Context'):
+        super().draw(context)
 
-    def add_mesh_data(self, mesh: 'Mesh', widget_data: dict, bone: 'PoseBone'):
+        widget_name = context.scene.widget_list
+        if widget_name in read_widgets() or widget_name not in PROCEDURAL_WIDGETS:
+            return
 
-        bone_length = 1
-        if not self.relative_size:
-            bone_length = 1 / bone.bone.length
+        layout: 'UILayout' = self.layout
+        col = layout.column()
+        for parameter in PROCEDURAL_WIDGETS[widget_name].parameters:
+            col.prop(self, parameter)
 
-        verticies = numpy.array(widget_data["vertices"]) * [
-            self.scale[0] * bone_length,
-            self.scale[2] * bone_length,
-            self.scale[1] * bone_length
-        ]
+    def execute(self, context: 'Context'):
+        wgts = read_widgets()
+        widget = self.get_widget_data(context.scene.widget_list, wgts)
 
-        mesh.from_pydata(verticies, widget_data['edges'], widget_data['faces'])
+        if widget is None:
+            self.report({'WARNING'}, f"The widget '{context.scene.widget_list}' doesn't exist!")
+            return {'CANCELLED'}
 
+        transform = self.get_transform()
+        source = self.get_widget_source(context.scene.widget_list, wgts)
 
-class BONEWIDGET_OT_create_widget(BoneWidgetCreateBase):
-    """Creates a widget for selected bone"""
-    bl_idname = "bonewidget.create_widget"
-    bl_label = "Create"
+        # Procedural widgets get their level of detail from the number of segments, unless it is set explicitly.
+        use_lod_segments = source.get("segments") == 0 and "segments" in PROCEDURAL_WIDGETS[source["shape"]].parameters
+        lods: typing.Dict[int, typing.Tuple[dict, dict]] = {}
+
+        for armature, bones in group_bones_by_armature(context.selected_pose_bones).items():
+            bw_collection = BonewidgetCollection(layer_collection=False, armature=armature)
+            if not bw_collection.collection:
+                bw_collection.create_collection()
+
+            assignments: typing.List[WidgetAssignment] = []
+            for bone in bones:
+                bone_widget, bone_source = widget, source
+
+                if use_lod_segments:
+                    level = get_widget_lod_level(context, armature, bone)
+                    if level not in lods:
+                        segments = get_procedural_lod_segments(source["shape"], level)
+                        lods[level] = (get_procedural_widget(source["shape"], segments, self.radius, self.thickness),
+                                       {**source, "segments": segments})
+                    bone_widget, bone_source = lods[level]
+
+                assignments.append(WidgetAssignment(bone, bone_widget, transform, bone_source))
+
+            create_widgets(context, armature, assignments, bw_collection.collection)
+        return {'FINISHED'}
+
+    def get_widget_data(self, widget_name: str, wgts: dict) -> typing.Optional[dict]:
+        """Get the JSON Data of a widget from the library. If the library doesn't contain the widget,
+        generate the procedural widget with the same name.
+
+        Args:
+            widget_name (str): The name of the widget.
+            wgts (dict): The widget library.
+
+        Returns:
+            Optional[dict]: The JSON Data of the widget, or None if it doesn't exist.
+        """
+
+        if widget_name in wgts:
+            return wgts[widget_name]
+
+        if widget_name in PROCEDURAL_WIDGETS:
+            return get_procedural_widget(widget_name, self.segments, self.radius, self.thickness)
+
+        return None
+
+    def get_widget_source(self, widget_name: str, wgts: dict) -> dict:
+        """Get the source of a widget, which is stored on the created widgets.
+
+        Args:
+            widget_name (str): The name of the widget.
+            wgts (dict): The widget library.
+
+        Returns:
+            dict: The name of the shape, and the parameters of procedural widgets.
+        """
+
+        if widget_name in wgts or widget_name not in PROCEDURAL_WIDGETS:
+            return {"shape": widget_name}
+
+        return {"shape": widget_name, "segments": self.segments, "radius": self.radius, "thickness": self.thickness}
+
+
+class BONEWIDGET_OT_transform_widgets(BoneWidgetCreateBase):
+    """Change the slide, rotation and scale of the selected bones' widgets without rebuilding their meshes. Only works for widgets created with non-destructive transforms"""
+    bl_idname = "bonewidget.transform_widgets"
+    bl_label = "Transform Widgets"
+
+    @classmethod
+    def poll(cls, context: 'Context'):
+        return (context.object and context.object.mode == 'POSE'
+                and hasattr(bpy.types.PoseBone, "custom_shape_translation"))
+
+    def invoke(self, context: 'Context', event: 'Event'):
+        # Start from the transformation of the active widget.
+        bone: 'PoseBone' = context.active_pose_bone
+        metadata = get_widget_metadata(bone.custom_shape) if bone and bone.custom_shape else None
+
+        if metadata:
+            self.slide = metadata.get("slide", 0.0)
+            self.rotation = metadata.get("rotation", (0.0, 0.0, 0.0))
+            self.scale = metadata.get("scale", (1.0, 1.0, 1.0))
+            self.relative_size = metadata.get("relative_size", True)
+
+        return self.execute(context)
 
     def execute(self, context: 'Context'):
-        wgts = read_widgets()
+        transform = self.get_transform()
+        changed = 0
+        skipped = 0
 
         for bone in context.selected_pose_bones:
-            bw_collection = BonewidgetCollection(layer_collection=False)
+            metadata = get_widget_metadata(bone.custom_shape) if bone.custom_shape else None
+
+            if not (metadata and metadata.get("bone_transform")):
+                skipped += 1
+                continue
+
+            set_bone_shape_transform(bone.id_data, bone, transform)
+            changed += 1
+
+        if skipped:
+            self.report({'WARNING'}, f"Skipped {skipped} widget(s) with transformations in their mesh")
+
+        return {'FINISHED'} if changed else {'CANCELLED'}
+
+
+class BONEWIDGET_OT_apply_widget_rules(Operator):
+    """Create the widgets of all bones of the armatures in pose mode from a JSON rule file, which assigns shapes by bone name, bone collection or parent"""
+    bl_idname = "bonewidget.apply_widget_rules"
+    bl_label = "Apply Widget Rules"
+    bl_options = {'REGISTER', 'UNDO'}
+
+    filepath: StringProperty(
+        name="Rule File",
+        subtype='FILE_PATH',
+        description="The JSON file with the widget rules"
+    )
+    filter_glob: StringProperty(
+        default="*.json",
+        options={'HIDDEN'}
+    )
+    only_selected: BoolProperty(
+        name="Only Selected Bones",
+        default=False,
+        description="Only create widgets for the selected bones"
+    )
+
+    @classmethod
+    def poll(cls, context: 'Context'):
+        return context.object and context.object.type == 'ARMATURE' and context.object.mode == 'POSE'
+
+    def invoke(self, context: 'Context', event: 'Event'):
+        context.window_manager.fileselect_add(self)
+        return {'RUNNING_MODAL'}
+
+    def execute(self, context: 'Context'):
+        try:
+            rules = compile_widget_rules(load_widget_rules(bpy.path.abspath(self.filepath)))
+        except (OSError, ValueError) as e:
+            self.report({'ERROR'}, f"The widget rules couldn't be loaded: {e}")
+            return {'CANCELLED'}
+
+        if self.only_selected:
+            groups = group_bones_by_armature(context.selected_pose_bones)
+        else:
+            groups = {armature: armature.pose.bones for armature in get_pose_armatures(context)}
+
+        created: typing.List['Object'] = []
+        missing: typing.Set[str] = set()
+
+        for armature, bones in groups.items():
+            bw_collection = BonewidgetCollection(layer_collection=False, armature=armature)
             if not bw_collection.collection:
                 bw_collection.create_collection()
 
-            self.create_widget(
-                bone, wgts[context.scene.widget_list], bw_collection.collection)
+            armature_created, armature_missing = apply_widget_rules(
+                context, armature, rules, bw_collection.collection, bones=bones)
+            created.extend(armature_created)
+            missing.update(armature_missing)
+
+        missing = sorted(missing)
+
+        if missing:
+            self.report({'WARNING'}, f"Created {len(created)} widgets, missing shapes: {', '.join(missing)}")
+        else:
+            self.report({'INFO'}, f"Created {len(created)} widgets")
+
         return {'FINISHED'}
 
-    def create_widget(self, bone: 'PoseBone', widget: dict, collection: 'Collection'):
-        """Create a widget for a bone.
 
-        Args:
-            bone (PoseBone): The bone to create the widget for.
-            widget (dict): The JSON Data of the widget to create.
-            collection (Collection): The collection to create the widget in.
-        """
+class BONEWIDGET_OT_export_widget_manifest(Operator):
+    """Save the widget shapes and transformations of all bones of the armature to a manifest file, to restore them after the rig is regenerated"""
+    bl_idname = "bonewidget.export_manifest"
+    bl_label = "Export Widget Manifest"
 
-        context = bpy.context
+    filepath: StringProperty(
+        name="Manifest File",
+        subtype='FILE_PATH',
+        description="The JSON file to save the manifest to"
+    )
+    filter_glob: StringProperty(
+        default="*.json",
+        options={'HIDDEN'}
+    )
 
-        bw_widget_prefix = get_widget_prefix(context)
-        widget_name = bw_widget_prefix + bone.name
+    @classmethod
+    def poll(cls, context: 'Context'):
+        return context.object and context.object.type == 'ARMATURE'
 
-        self.handle_existing_widget(bone)
+    def invoke(self, context: 'Context', event: 'Event'):
+        if not self.filepath:
+            self.filepath = bpy.path.clean_name(context.object.name) + "_widgets.json"
+        context.window_manager.fileselect_add(self)
+        return {'RUNNING_MODAL'}
 
-        new_data = bpy.data.meshes.new(widget_name)
-        self.add_mesh_data(new_data, widget, bone)
+    def execute(self, context: 'Context'):
+        manifest = export_widget_manifest(context.object)
+
+        try:
+            with open(bpy.path.abspath(self.filepath), "w", encoding="utf-8") as f:
+                json.dump(manifest, f, separators=(",", ":"))
+        except OSError as e:
+            self.report({'ERROR'}, f"The manifest couldn't be saved: {e}")
+            return {'CANCELLED'}
+
+        self.report({'INFO'}, f"Saved the widgets of {len(manifest['bones'])} bones")
+        return {'FINISHED'}
 
-        new_object = bpy.data.objects.new(widget_name, new_data)
-        new_object.data = new_data
-        new_object.name = widget_name
 
-        collection.objects.link(new_object)
+class BONEWIDGET_OT_replay_widget_manifest(Operator):
+    """Restore the widgets of the armature from a manifest file. Bones whose widget already matches the manifest are skipped"""
+    bl_idname = "bonewidget.replay_manifest"
+    bl_label = "Replay Widget Manifest"
+    bl_options = {'REGISTER', 'UNDO'}
 
-        bone.custom_shape = new_object
-        bone.bone.show_wire = True
+    filepath: StringProperty(
+        name="Manifest File",
+        subtype='FILE_PATH',
+        description="The JSON file with the manifest"
+    )
+    filter_glob: StringProperty(
+        default="*.json",
+        options={'HIDDEN'}
+    )
 
-        self.update_widget_transforms(context, new_object, bone)
+    @classmethod
+    def poll(cls, context: 'Context'):
+        return context.object and context.object.type == 'ARMATURE'
+
+    def invoke(self, context: 'Context', event: 'Event'):
+        context.window_manager.fileselect_add(self)
+        return {'RUNNING_MODAL'}
+
+    def execute(self, context: 'Context'):
+        try:
+            with open(bpy.path.abspath(self.filepath), "r", encoding="utf-8") as f:
+                manifest = json.load(f)
+        except (OSError, ValueError) as e:
+            self.report({'ERROR'}, f"The manifest couldn't be loaded: {e}")
+            return {'CANCELLED'}
+
+        bw_collection = BonewidgetCollection(layer_collection=False)
+        if not bw_collection.collection:
+            bw_collection.create_collection()
+
+        try:
+            created, skipped, missing = replay_widget_manifest(
+                context, context.object, manifest, bw_collection.collection)
+        except ValueError as e:
+            self.report({'ERROR'}, str(e))
+            return {'CANCELLED'}
+
+        message = f"Created {len(created)} widgets, {skipped} already matched"
+        if missing:
+            self.report({'WARNING'}, f"{message}, {len(missing)} bones or shapes not found: {', '.join(missing[:10])}")
+        else:
+            self.report({'INFO'}, message)
+
+        return {'FINISHED'}
 
 
 class BONEWIDGET_OT_add_object_as_widget(BoneWidgetCreateBase):
-    """Use an object from the scene as widget for the selected bone(s). Attention! Choosing objects with many vertices may cause Blender to freeze"""
+    """Use an object from the scene as widget for the selected bone(s). Attention! Choosing objects with many vertices may cause Blender to freeze, set a vertex budget to reduce them"""
     bl_idname = "bonewidget.add_as_widget"
     bl_label = "Use scene object"
     bl_options = {'REGISTER', 'UNDO'}
 
+    vertex_budget: IntProperty(
+        name="Vertex Budget",
+        default=0,
+        min=0,
+        description="Reduce the geometry of the object to at most this many vertices. 0 keeps the full geometry"
+    )
+
     @classmethod
     def poll(cls, context: 'Context'):
         return context.object and context.object.mode == 'POSE' and len(context.selected_pose_bones) > 0
@@ -217,8 +484,10 @@ class BONEWIDGET_OT_add_object_as_widget(BoneWidgetCreateBase):
         if self.status != "done":
             layout.label(text="Select an object from the scene:")
             layout.prop(context.scene, "widget_object", text="")
+            layout.prop(self, "vertex_budget")
         else:
             super().draw(context)
+            layout.prop(self, "vertex_budget")
 
     def invoke(self, context: 'Context', event: 'Event'):
         self.status = "adding"
@@ -235,85 +504,109 @@ class BONEWIDGET_OT_add_object_as_widget(BoneWidgetCreateBase):
             self.report({'WARNING'}, 'No object selected!')
             return {'CANCELLED'}
 
-        for bone in context.selected_pose_bones:
-            self.add_object_as_widget(context, bone)
-
-        return {'FINISHED'}
-
-    def add_object_as_widget(self, context: 'Context', bone: 'PoseBone'):
-        bw_collection = BonewidgetCollection(layer_collection=False)
-        if not bw_collection.collection:
-            bw_collection.create_collection()
-
-        collection = bw_collection.collection
-        widget_object: 'Object' = self.widget_object
-
-        bw_widget_prefix = get_widget_prefix(context)
-        widget_name = bw_widget_prefix + bone.name
-
-        self.handle_existing_widget(bone)
+        from .functions.geometry_functions import reduce_widget_data
 
-        widget_data = object_data_to_dico(context, widget_object)
-        new_data = bpy.data.meshes.new(widget_name)
-        self.add_mesh_data(new_data, widget_data, bone)
+        # Convert the object once, all bones use the same widget.
+        widget_data = object_data_to_dico(context, self.widget_object)
+        widget_data = reduce_widget_data(widget_data, self.vertex_budget)
 
-        widget: 'Object' = bpy.data.objects.new(widget_name, new_data)
-        widget.data = new_data
-        widget.name = widget_name
+        transform = self.get_transform()
 
-        collection.objects.link(widget)
+        for armature, bones in group_bones_by_armature(context.selected_pose_bones).items():
+            bw_collection = BonewidgetCollection(layer_collection=False, armature=armature)
+            if not bw_collection.collection:
+                bw_collection.create_collection()
 
-        bone.custom_shape = widget
-        bone.bone.show_wire = True
+            create_widgets(context, armature,
+                           [(bone, widget_data, transform) for bone in bones],
+                           bw_collection.collection)
 
-        self.update_widget_transforms(context, widget, bone)
+        return {'FINISHED'}
 
 
 class BONEWIDGET_OT_edit_widget(Operator):
-    """Edit the widget for selected bone"""
+    """Edit the widgets of the selected bones"""
     bl_idname = "bonewidget.edit_widget"
     bl_label = "Edit"
 
     @classmethod
     def poll(cls, context: 'Context'):
         return (context.object and context.object.type == 'ARMATURE' and context.object.mode == 'POSE'
-                and context.active_pose_bone and context.active_pose_bone.custom_shape is not None)
+                and any(bone.custom_shape is not None for bone in context.selected_pose_bones or ()))
 
     def execute(self, context: 'Context'):
-        active_bone = context.active_pose_bone
+        active_bone: 'PoseBone' = context.active_pose_bone
+        bones = [bone for bone in context.selected_pose_bones
+                 if bone.custom_shape is not None and bone.custom_shape.library is None]
+
+        if not bones:
+            self.report({'WARNING'}, "The widgets of the selected bones can't be edited")
+            return {'CANCELLED'}
+
+        # Check before leaving pose mode, the collections of the widgets are shown for editing.
+        unlinked = [bone.name for bone in bones if not bone.custom_shape.users_collection]
+        if unlinked:
+            self.report({'WARNING'}, f"The widgets of these bones aren't in a collection: {', '.join(unlinked)}")
+            return {'CANCELLED'}
+
         try:
-            self.edit_widget(active_bone)
+            self.edit_widgets(context, bones, active_bone)
         except KeyError:
-            self.report(
-                {'INFO'}, 'This widget is the not in the Widget Collection')
+            session = context.window_manager.bonewidget_edit_session
+            session.bones.clear()
+            session.widgets.clear()
+            self.report({'WARNING'}, 'This widget is not in the Widget Collection')
+            return {'CANCELLED'}
+
         return {'FINISHED'}
 
-    def edit_widget(self, active_bone: 'PoseBone'):
-        """Jump to edit mode for editing the widget of the active bone.
+    def edit_widgets(self, context: 'Context', bones: typing.List['PoseBone'], active_bone: 'PoseBone'):
+        """Jump to edit mode for editing the widgets of several bones at once.
+        The bones are recorded in the edit session, so returning to the armature doesn't have to search for them.
 
         Args:
-            active_bone (PoseBone): The active bone.
+            context (Context): The current Blender context.
+            bones (List[PoseBone]): The bones whose widgets are edited.
+            active_bone (PoseBone): The active bone, its widget becomes the active object.
         """
 
-        context = bpy.context
-        widget: 'Object' = active_bone.custom_shape
+        if active_bone not in bones:
+            active_bone = bones[0]
+
+        widgets: typing.List['Object'] = list(dict.fromkeys(bone.custom_shape for bone in bones))
+
+        session = context.window_manager.bonewidget_edit_session
+        session.bones.clear()
+        session.widgets.clear()
+
+        for bone in bones:
+            item = session.bones.add()
+            item.name = bone.name
+            item.armature = bone.id_data
+
+        session.active_armature = active_bone.id_data
+        session.active_bone = active_bone.name
 
-        armature = active_bone.id_data
         bpy.ops.object.mode_set(mode='OBJECT')
-        context.active_object.select_set(False)
+        for ob in context.selected_objects:
+            ob.select_set(False)
+
+        shown_collections: typing.Set[str] = set()
 
-        bw_collection = BonewidgetCollection(widget=widget)
-        bw_collection.make_collection_editable()
+        for widget in widgets:
+            session.widgets.add().object = widget
 
-        collection: 'LayerCollection' = bw_collection.collection
-        collection.hide_viewport = False
+            if widget.users_collection[0].name not in shown_collections:
+                BonewidgetCollection(widget=widget).show_collection()
+                shown_collections.add(widget.users_collection[0].name)
 
         if context.space_data.local_view:
             bpy.ops.view3d.localview()
 
-        # select object and make it active
-        widget.select_set(True)
-        context.view_layer.objects.active = widget
+        # Select all widgets, so they enter edit mode together.
+        for widget in widgets:
+            widget.select_set(True)
+        context.view_layer.objects.active = active_bone.custom_shape
         bpy.ops.object.mode_set(mode='EDIT')
 
 
@@ -327,7 +620,23 @@ class BONEWIDGET_OT_return_to_armature(Operator):
         if not (context.object and context.object.type == 'MESH'
                 and context.object.mode in ['EDIT', 'OBJECT']):
             return False
-        return cls.from_widget_find_bone(context.object)
+        return cls.in_edit_session(context, context.object) or cls.from_widget_find_bone(context.object)
+
+    @classmethod
+    def in_edit_session(cls, context: 'Context', widget: 'Object') -> bool:
+        """Check whether an object is one of the widgets of the current edit session.
+
+        Args:
+            context (Context): The current Blender context.
+            widget (Object): The (widget) object.
+
+        Returns:
+            bool: True, if the widget is edited in the current edit session.
+        """
+
+        session = context.window_manager.bonewidget_edit_session
+
+        return any(item.object == widget for item in session.widgets)
 
     @classmethod
     def from_widget_find_bone(cls, widget: 'Object') -> 'PoseBone':
@@ -356,6 +665,12 @@ class BONEWIDGET_OT_return_to_armature(Operator):
         return match_bone
 
     def execute(self, context: 'Context'):
+        if self.in_edit_session(context, context.object):
+            if not self.end_edit_session(context):
+                self.report({'WARNING'}, "The armatures of the edited widgets don't exist anymore!")
+                return {'CANCELLED'}
+            return {'FINISHED'}
+
         widget: 'Object' = context.object
 
         bone: 'PoseBone' = self.from_widget_find_bone(widget)
@@ -366,11 +681,6 @@ class BONEWIDGET_OT_return_to_armature(Operator):
 
         bpy.ops.object.select_all(action='DESELECT')
 
-        bw_collection = BonewidgetCollection(widget=widget)
-        bw_collection.make_collection_editable()
-
-        collection = bw_collection.collection
-        collection.hide_viewport = True
         if context.space_data.local_view:
             bpy.ops.view3d.localview()
         context.view_layer.objects.active = armature
@@ -379,8 +689,76 @@ class BONEWIDGET_OT_return_to_armature(Operator):
         armature.data.bones[bone.name].select = True
         armature.data.bones.active = armature.data.bones[bone.name]
 
+        # Hide the widgets again once the armature is active, excluded collections can't contain the active object.
+        BonewidgetCollection(widget=widget).hide_collection()
+
         return {'FINISHED'}
 
+    def end_edit_session(self, context: 'Context') -> bool:
+        """Leave edit mode for all widgets of the edit session and restore the pose mode selection.
+
+        Args:
+            context (Context): The current Blender context.
+
+        Returns:
+            bool: False, if none of the armatures of the session is left. The session is cleared either way.
+        """
+
+        session = context.window_manager.bonewidget_edit_session
+
+        if context.active_object.mode == 'EDIT':
+            bpy.ops.object.mode_set(mode='OBJECT')
+
+        for ob in context.selected_objects:
+            ob.select_set(False)
+
+        if context.space_data.local_view:
+            bpy.ops.view3d.localview()
+
+        # Armatures may have been deleted or removed from the view layer while the widgets were edited.
+        armatures: typing.List['Object'] = list(dict.fromkeys(
+            item.armature for item in session.bones
+            if item.armature is not None and item.armature.name in context.view_layer.objects))
+
+        if not armatures:
+            session.bones.clear()
+            session.widgets.clear()
+            return False
+
+        for armature in armatures:
+            armature.select_set(True)
+
+        active_armature = session.active_armature
+        if active_armature not in armatures:
+            active_armature = armatures[0]
+
+        context.view_layer.objects.active = active_armature
+        bpy.ops.object.mode_set(mode='POSE')
+
+        for item in session.bones:
+            bone = item.armature.data.bones.get(item.name) if item.armature else None
+            if bone:
+                bone.select = True
+
+        if active_armature.data.bones.get(session.active_bone):
+            active_armature.data.bones.active = active_armature.data.bones[session.active_bone]
+
+        # Hide the widgets again once the armatures are active, excluded collections can't contain the active object.
+        hidden_collections: typing.Set[str] = set()
+        for item in session.widgets:
+            widget: 'Object' = item.object
+            if widget is None or not widget.users_collection:
+                continue
+
+            if widget.users_collection[0].name not in hidden_collections:
+                BonewidgetCollection(widget=widget).hide_collection()
+                hidden_collections.add(widget.users_collection[0].name)
+
+        session.bones.clear()
+        session.widgets.clear()
+
+        return True
+
 
 class BONEWIDGET_OT_match_bone_transforms(Operator):
     """Match the widget to the bone transforms"""
@@ -392,43 +770,33 @@ class BONEWIDGET_OT_match_bone_transforms(Operator):
         return context.mode == "POSE"
 
     def execute(self, context: 'Context'):
-        for bone in context.selected_pose_bones:
-            self.bone_matrix(context, bone.custom_shape, bone)
+        bones: typing.List['PoseBone'] = [
+            bone for bone in context.selected_pose_bones if bone.custom_shape]
+
+        self.bone_matrices(context, bones)
 
         return {'FINISHED'}
 
-    def bone_matrix(self, context: 'Context', widget: 'Object', match_bone: 'PoseBone'):
-        """Update the transforms of the widget object to match the transforms of the bone.
+    def bone_matrices(self, context: 'Context', bones: typing.List['PoseBone']):
+        """Update the transforms of the widget objects to match the transforms of their bones.
+        The matrices of all bones are computed at once and the view layer is updated a single time.
 
         Args:
             context (Context): The current Blender context.
-            widget (Object): The widget object.
-            match_bone (PoseBone): The bone to match the transforms of.
+            bones (List[PoseBone]): The bones to match the widgets of.
         """
 
-        if widget == None:
+        from .functions.transform_functions import get_widget_matrices
+
+        if not bones:
             return
 
-        widget.matrix_local = match_bone.bone.matrix_local
+        matrices = get_widget_matrices(bones)
 
-        # Multiply the bones world matrix with the bones local matrix.
-        widget.matrix_world = match_bone.id_data.matrix_world @ match_bone.bone.matrix_local
-        if match_bone.custom_shape_transform:
-            # if it has a tranform override apply this to the widget loc and rot
-            org_scale = widget.matrix_world.to_scale()
-            org_scale_mat = Matrix.Scale(1, 4, org_scale)
-            target_matrix = match_bone.custom_shape_transform.id_data.matrix_world @ match_bone.custom_shape_transform.bone.matrix_local
-            loc = target_matrix.to_translation()
-            loc_mat = Matrix.Translation(loc)
-            rot = target_matrix.to_euler().to_matrix()
-            widget.matrix_world = loc_mat @ rot.to_4x4() @ org_scale_mat
+        for bone, matrix in zip(bones, matrices):
+            bone.custom_shape.matrix_world = Matrix(matrix.tolist())
 
-        if match_bone.use_custom_shape_bone_size:
-            ob_scale = context.scene.objects[match_bone.id_data.name].scale
-            widget.scale = [match_bone.bone.length * ob_scale[0],
-                            match_bone.bone.length * ob_scale[1], match_bone.bone.length * ob_scale[2]]
-            # widget.scale = [match_bone.bone.length, match_bone.bone.length, match_bone.bone.length]
-        widget.data.update()
+        context.view_layer.update()
 
 
 class BONEWIDGET_OT_match_symmetrize_shape(Operator):
@@ -488,10 +856,8 @@ class BONEWIDGET_OT_match_symmetrize_shape(Operator):
         active_bone: 'PoseBone' = context.active_pose_bone
         widget = active_bone.custom_shape
 
-        bw_collection = BonewidgetCollection(widget=widget)
-        bw_collection.make_collection_editable()
-
-        widget_collection: 'LayerCollection' = bw_collection.collection
+        widget_collection: 'Collection' = BonewidgetCollection(
+            widget=widget, layer_collection=False, armature=active_bone.id_data).collection
 
         mirror_bone: 'PoseBone' = self.find_mirror_object(active_bone)
         if not mirror_bone:
@@ -511,15 +877,18 @@ class BONEWIDGET_OT_match_symmetrize_shape(Operator):
                 bpy.data.objects.remove(mirror_widget)
 
         new_data = widget.data.copy()
-        for vert in new_data.vertices:
-            vert.co = numpy.array(vert.co) * (-1, 1, 1)
+        new_data.transform(Matrix.Scale(-1, 4, (1, 0, 0)))
 
         new_object: 'Object' = widget.copy()
-        new_object.name = get_widget_prefix(context) + mirror_bone.name
+        new_object.name = get_widget_prefix(context, mirror_bone.id_data) + mirror_bone.name
+
+        # The mirrored geometry no longer matches the shape the widget was created from.
+        if WIDGET_METADATA in new_object:
+            del new_object[WIDGET_METADATA]
         new_object.data = new_data
         new_data.update()
 
-        bpy.data.collections[widget_collection.name].objects.link(new_object)
+        widget_collection.objects.link(new_object)
         new_object.matrix_local = mirror_bone.bone.matrix_local
         new_object.scale = [mirror_bone.bone.length,
                             mirror_bone.bone.length, mirror_bone.bone.length]
@@ -592,6 +961,13 @@ class BONEWIDGET_OT_add_widgets(Operator):
         options={"TEXTEDIT_UPDATE"},
     )
 
+    vertex_budget: IntProperty(
+        name="Vertex Budget",
+        default=0,
+        min=0,
+        description="Reduce the geometry of the widget to at most this many vertices before it's saved. 0 keeps the full geometry"
+    )
+
     @classmethod
     def description(cls, context: 'Context', properties: 'OperatorProperties'):
         if context.mode == "POSE":
@@ -626,20 +1002,38 @@ class BONEWIDGET_OT_add_widgets(Operator):
         layout: 'UILayout' = self.layout
         layout.label(text="Widget Name:")
         layout.prop(self, "widget_name", text="")
+        layout.prop(self, "vertex_budget")
 
     def execute(self, context: 'Context'):
         wgts: dict = read_widgets()
 
         widget_names: typing.List[str] = [k for k in wgts.keys()]
 
-        if self.widget_name in widget_names:
+        if self.widget_name in widget_names or self.widget_name in PROCEDURAL_WIDGETS:
             self.report(
                 {'WARNING'}, f"A widget called '{self.widget_name}' already exists!")
             return {'FINISHED'}
 
+        from .functions.geometry_functions import (
+            generate_widget_lods,
+            reduce_widget_data
+        )
+
+        widget_data = reduce_widget_data(object_data_to_dico(
+            context, self.widget_object), self.vertex_budget)
+
+        duplicate = find_duplicate_widget(widget_data)
+        if duplicate:
+            self.report(
+                {'WARNING'}, f"The widget '{duplicate}' has the same shape already!")
+            return {'FINISHED'}
+
+        lods = generate_widget_lods(widget_data)
+        if lods:
+            widget_data["lods"] = lods
+
         widget_names.append(self.widget_name)
-        wgts[self.widget_name] = object_data_to_dico(
-            context, self.widget_object)
+        wgts[self.widget_name] = widget_data
 
         write_widgets(wgts)
 
@@ -647,6 +1041,119 @@ class BONEWIDGET_OT_add_widgets(Operator):
         return {'FINISHED'}
 
 
+class BONEWIDGET_OT_add_widgets_bulk(Operator):
+    """Add all selected objects to the Bone Widget Library"""
+    bl_idname = "bonewidget.add_widgets_bulk"
+    bl_label = "Add Widgets to library"
+    bl_options = {'REGISTER', 'UNDO'}
+
+    vertex_budget: IntProperty(
+        name="Vertex Budget",
+        default=0,
+        min=0,
+        description="Reduce the geometry of the widgets to at most this many vertices before they're saved. 0 keeps the full geometry"
+    )
+
+    @classmethod
+    def description(cls, context: 'Context', properties: 'OperatorProperties'):
+        if context.mode == "POSE":
+            return "Add the custom shapes of all bones of the active armature to the Bone Widget Library"
+
+        return "Add all selected mesh objects to the Bone Widget Library"
+
+    @classmethod
+    def poll(cls, context: 'Context'):
+        if context.mode == "POSE":
+            return context.object and context.object.type == 'ARMATURE'
+
+        return context.mode == "OBJECT" and any(ob.type == 'MESH' for ob in context.selected_objects)
+
+    def execute(self, context: 'Context'):
+        from .functions.geometry_functions import (
+            generate_widget_lods,
+            reduce_widget_data,
+            widget_data_hash
+        )
+
+        wgts: dict = read_widgets()
+        index = get_widget_index()
+
+        added: typing.List[str] = []
+        duplicates = 0
+
+        for name, widget_data in self.convert_widgets(context):
+            widget_data = reduce_widget_data(widget_data, self.vertex_budget)
+            widget_data["hash"] = widget_data_hash(widget_data)
+
+            if widget_data["hash"] in index:
+                duplicates += 1
+                continue
+
+            lods = generate_widget_lods(widget_data)
+            if lods:
+                widget_data["lods"] = lods
+
+            name = self.get_unique_name(name, wgts)
+            wgts[name] = widget_data
+            index[widget_data["hash"]] = name
+            added.append(name)
+
+        if added:
+            write_widgets(wgts)
+            context.scene.widget_list = added[-1]
+
+        self.report(
+            {'INFO'}, f"Added {len(added)} widget(s) to the library, skipped {duplicates} duplicate(s)")
+        return {'FINISHED'}
+
+    def convert_widgets(self, context: 'Context') -> typing.List[typing.Tuple[str, dict]]:
+        """Convert the selected objects or the custom shapes of the active armature to JSON data.
+
+        Args:
+            context (Context): The current Blender context.
+
+        Returns:
+            List[Tuple[str, dict]]: The names derived from the objects, paired with their JSON data.
+        """
+
+        if context.mode != "POSE":
+            conversion_cache: dict = {}
+            return [(ob.name, object_data_to_dico(context, ob, conversion_cache))
+                    for ob in context.selected_objects if ob.type == 'MESH']
+
+        # Custom shapes are scaled to the bone length, only convert the mesh data.
+        widgets: typing.Dict['Object', str] = {}
+        for armature in get_pose_armatures(context):
+            bw_widget_prefix = get_widget_prefix(context, armature)
+
+            for bone in armature.pose.bones:
+                bone: 'PoseBone'
+                if bone.custom_shape and bone.custom_shape.type == 'MESH' and bone.custom_shape not in widgets:
+                    widgets[bone.custom_shape] = bone.custom_shape.name.removeprefix(bw_widget_prefix)
+
+        return [(name, mesh_data_to_dico(widget.data)) for widget, name in widgets.items()]
+
+    def get_unique_name(self, name: str, wgts: dict) -> str:
+        """Number a widget name, if the library already contains a widget with the same name.
+
+        Args:
+            name (str): The name of the widget.
+            wgts (dict): The widget library.
+
+        Returns:
+            str: The unique name.
+        """
+
+        unique_name = name
+        number = 1
+
+        while unique_name in wgts or unique_name in PROCEDURAL_WIDGETS:
+            unique_name = f"{name}.{number:03d}"
+            number += 1
+
+        return unique_name
+
+
 class BONEWIDGET_OT_remove_widgets(Operator):
     """Remove selected widget from the Bone Widget Library"""
     bl_idname = "bonewidget.remove_widgets"
@@ -657,12 +1164,207 @@ class BONEWIDGET_OT_remove_widgets(Operator):
 
         target_widget = context.scene.widget_list
 
+        if target_widget not in wgts and target_widget in PROCEDURAL_WIDGETS:
+            self.report(
+                {'WARNING'}, f"'{target_widget}' is a procedural widget and can't be removed")
+            return {'CANCELLED'}
+
         wgts.pop(target_widget, "")
         write_widgets(wgts)
 
         return {'FINISHED'}
 
 
+class BONEWIDGET_OT_deduplicate_library(Operator):
+    """Remove widgets with the same shape from the Bone Widget Library, keeping the first one in alphabetical order"""
+    bl_idname = "bonewidget.deduplicate_library"
+    bl_label = "Remove Duplicate Widgets"
+    bl_options = {'REGISTER', 'UNDO'}
+
+    def execute(self, context: 'Context'):
+        wgts: dict = read_widgets()
+        index = get_widget_index()
+
+        duplicates: typing.List[str] = [
+            name for name, widget in wgts.items() if index[widget["hash"]] != name]
+
+        if not duplicates:
+            self.report({'INFO'}, "The library doesn't contain duplicate widgets")
+            return {'FINISHED'}
+
+        # Select the remaining widget with the same shape, if the active shape is removed.
+        active_widget = context.scene.widget_list
+        if active_widget in duplicates:
+            active_widget = index[wgts[active_widget]["hash"]]
+
+        for name in duplicates:
+            wgts.pop(name)
+
+        write_widgets(wgts)
+
+        context.scene.widget_list = active_widget
+
+        self.report(
+            {'INFO'}, f"Removed {len(duplicates)} duplicate widget(s): {', '.join(sorted(duplicates))}")
+        return {'FINISHED'}
+
+
+class BONEWIDGET_OT_generate_widget_lods(Operator):
+    """Generate the levels of detail of all widgets in the Bone Widget Library that don't have them yet"""
+    bl_idname = "bonewidget.generate_widget_lods"
+    bl_label = "Generate Levels of Detail"
+    bl_options = {'REGISTER', 'UNDO'}
+
+    regenerate: BoolProperty(
+        name="Regenerate",
+        default=False,
+        description="Also generate the levels of detail of widgets that have them already"
+    )
+
+    def execute(self, context: 'Context'):
+        from .functions.geometry_functions import generate_widget_lods
+
+        wgts: dict = read_widgets()
+        updated: typing.List[str] = []
+
+        for name, widget_data in wgts.items():
+            if "lods" in widget_data and not self.regenerate:
+                continue
+
+            lods = generate_widget_lods(widget_data)
+            if lods or "lods" in widget_data:
+                wgts[name] = {key: value for key, value in widget_data.items() if key != "lods"}
+                if lods:
+                    wgts[name]["lods"] = lods
+                updated.append(name)
+
+        if updated:
+            write_widgets(wgts)
+
+        self.report({'INFO'}, f"Generated the levels of detail of {len(updated)} widget(s)")
+        return {'FINISHED'}
+
+
+class BONEWIDGET_OT_compact_library(Operator):
+    """Weld coincident vertices, remove unused vertices and duplicate edges and round the vertices of all widgets in the Bone Widget Library"""
+    bl_idname = "bonewidget.compact_library"
+    bl_label = "Compact Widget Library"
+    bl_options = {'REGISTER', 'UNDO'}
+
+    decimals: IntProperty(
+        name="Decimals",
+        default=5,
+        min=1,
+        max=8,
+        description="Number of decimals to round the vertex coordinates to. Vertices that are equal after rounding are welded"
+    )
+
+    def execute(self, context: 'Context'):
+        json_file = get_library_path()
+
+        if not os.path.exists(json_file):
+            self.report({'WARNING'}, "The widget library doesn't exist!")
+            return {'CANCELLED'}
+
+        with open(json_file, "rb") as f:
+            data = f.read()
+
+        wgts: dict = read_widgets()
+        compacted, reports = compact_library(wgts, self.decimals)
+        write_widgets(compacted, wgts)
+
+        with open(json_file, "rb") as f:
+            compacted_data = f.read()
+
+        for line in format_compaction_report(reports):
+            print(line)
+
+        self.report(
+            {'INFO'}, f"Compacted {len(reports)} widget(s) from {len(data)} to {len(compacted_data)} bytes, "
+            f"parse time {measure_parse_time(data) * 1e3:.2f} ms -> {measure_parse_time(compacted_data) * 1e3:.2f} ms "
+            "(see the console for details)")
+        return {'FINISHED'}
+
+
+class BONEWIDGET_OT_convert_library(Operator):
+    """Convert the Bone Widget Library to another file format"""
+    bl_idname = "bonewidget.convert_library"
+    bl_label = "Convert Widget Library"
+
+    encoded: BoolProperty(
+        name="Encoded",
+        default=True,
+        description="Convert to a compressed library file with the precision set in the preferences, instead of a JSON file"
+    )
+
+    def execute(self, context: 'Context'):
+        source = get_library_path()
+        destination = get_library_path(encoded=self.encoded)
+
+        if not os.path.exists(source):
+            self.report({'WARNING'}, "The widget library doesn't exist!")
+            return {'CANCELLED'}
+
+        wgts: dict = read_widgets()
+        source_size = os.path.getsize(source)
+
+        with open(destination, "wb") as f:
+            f.write(dumps_widgets(wgts, destination))
+
+        # The encoded library takes precedence, remove it when converting back to JSON.
+        if not self.encoded and source != destination:
+            os.remove(source)
+
+        self.report(
+            {'INFO'}, f"Converted the widget library from {source_size} to {os.path.getsize(destination)} bytes")
+        return {'FINISHED'}
+
+
+class BONEWIDGET_OT_dump_library_stats(Operator):
+    """Save the load times, cache hit rate and other counters of the Bone Widget Library to a JSON file"""
+    bl_idname = "bonewidget.dump_library_stats"
+    bl_label = "Save Library Diagnostics"
+
+    filepath: StringProperty(
+        name="Diagnostics File",
+        subtype='FILE_PATH',
+        description="The JSON file to save the diagnostics to"
+    )
+    filter_glob: StringProperty(
+        default="*.json",
+        options={'HIDDEN'}
+    )
+
+    def invoke(self, context: 'Context', event: 'Event'):
+        if not self.filepath:
+            self.filepath = "bonewidget_library_stats.json"
+        context.window_manager.fileselect_add(self)
+        return {'RUNNING_MODAL'}
+
+    def execute(self, context: 'Context'):
+        stats = get_library_stats()
+
+        try:
+            with open(bpy.path.abspath(self.filepath), "w", encoding="utf-8") as f:
+                json.dump(stats, f, indent=2)
+        except OSError as e:
+            self.report({'ERROR'}, f"The diagnostics couldn't be saved: {e}")
+            return {'CANCELLED'}
+
+        self.report({'INFO'}, f"Saved the library diagnostics to {self.filepath}")
+        return {'FINISHED'}
+
+
+class BONEWIDGET_OT_reset_library_stats(Operator):
+    """Reset the load times, cache hit rate and other counters of the Bone Widget Library"""
+    bl_idname = "bonewidget.reset_library_stats"
+    bl_label = "Reset Library Diagnostics"
+
+    def execute(self, context: 'Context'):
+        reset_library_stats()
+        return {'FINISHED'}
+
+
 class BONEWIDGET_OT_toggle_collection_visibility(Operator):
     """Show/hide the bone widget collection"""
     bl_idname = "bonewidget.toggle_collection_visibilty"
@@ -673,16 +1375,25 @@ class BONEWIDGET_OT_toggle_collection_visibility(Operator):
         return (context.object and context.object.type == 'ARMATURE' and context.object.mode == 'POSE')
 
     def execute(self, context: 'Context'):
-        bw_collection: 'LayerCollection' = BonewidgetCollection().collection
-
-        hidden = not bw_collection.hide_viewport
+        # Resolve the collection of every armature in pose mode once, armatures can share a collection.
+        bw_collections: typing.Dict[str, BonewidgetCollection] = {}
+        for armature in get_pose_armatures(context):
+            bw_collection = BonewidgetCollection(armature=armature)
+            if bpy.data.collections.get(bw_collection.collection_name):
+                bw_collections.setdefault(bw_collection.collection_name, bw_collection)
+
+        if not bw_collections:
+            self.report({'WARNING'}, "The widget collection doesn't exist")
+            return {'CANCELLED'}
 
-        # bw_collection = context.scene.collection.children.get(bw_collection_name)
-        bw_collection.hide_viewport = hidden
-        bw_collection.collection.hide_viewport = hidden
+        # Follow the collection of the active armature, so all collections end up in the same state.
+        show = next(iter(bw_collections.values())).is_hidden()
 
-        # need to recursivly search for the view_layer
-        bw_collection.exclude = False
+        for bw_collection in bw_collections.values():
+            if show:
+                bw_collection.show_collection()
+            else:
+                bw_collection.hide_collection()
 
         return {'FINISHED'}
 
@@ -699,8 +1410,13 @@ class BONEWIDGET_OT_delete_unused_widgets(Operator):
     def execute(self, context: 'Context'):
         D = bpy.data
 
-        collection: 'Collection' = BonewidgetCollection(
-            layer_collection=False).collection
+        collections: typing.List['Collection'] = []
+        for armature in get_pose_armatures(context):
+            collection: 'Collection' = BonewidgetCollection(
+                layer_collection=False, armature=armature).collection
+            if collection is not None and collection not in collections:
+                collections.append(collection)
+
         widget_list: list = []
 
         for ob in D.objects:
@@ -714,7 +1430,7 @@ class BONEWIDGET_OT_delete_unused_widgets(Operator):
                     widget_list.append(bone.custom_shape)
 
         unwanted_list = [
-            ob for ob in collection.all_objects if ob not in widget_list]
+            ob for collection in collections for ob in collection.all_objects if ob not in widget_list]
 
         mode = context.mode
         bpy.ops.object.mode_set(mode='OBJECT')
@@ -758,50 +1474,406 @@ class BONEWIDGET_OT_resync_widget_names(Operator):
     """Sync widget names with the names of the bones they're assigned to."""
     bl_idname = "bonewidget.resync_widget_names"
     bl_label = "Resync Widget Names"
+    bl_options = {'REGISTER', 'UNDO'}
+
+    all_armatures: BoolProperty(
+        name="All Armatures",
+        default=False,
+        description="Resync the widget names of every armature in the file"
+    )
 
     @classmethod
     def poll(cls, context: 'Context'):
         return (context.object and context.object.type == 'ARMATURE' and context.object.mode == 'POSE')
 
     def execute(self, context: 'Context'):
+        armatures: typing.List['Object'] = get_pose_armatures(context)
+
+        if self.all_armatures:
+            armatures = [ob for ob in bpy.data.objects if ob.type == 'ARMATURE']
+
+        target_names = self.get_target_names(context, armatures)
+        renamed, conflicts = self.rename_widgets(target_names)
+
+        if conflicts:
+            self.report(
+                {'WARNING'}, f"Renamed {renamed} widget(s), {len(conflicts)} name(s) already taken: {', '.join(conflicts)}")
+            return {'FINISHED'}
+
+        self.report({'INFO'}, f"Renamed {renamed} widget(s)")
+        return {'FINISHED'}
+
+    def get_target_names(self, context: 'Context', armatures: typing.List['Object']) -> typing.Dict['Object', str]:
+        """Compute the name of every widget that doesn't match the name of its bone.
+
+        Args:
+            context (Context): The current Blender context.
+            armatures (List[Object]): The armatures to resync the widget names of.
+
+        Returns:
+            Dict[Object, str]: The widgets that need to be renamed, mapped to their new name.
+        """
+
+        target_names: typing.Dict['Object', str] = {}
+
+        for armature in armatures:
+            bw_widget_prefix: str = get_widget_prefix(context, armature)
+
+            for bone in armature.pose.bones:
+                bone: 'PoseBone'
+                if not bone.custom_shape or bone.custom_shape.library:
+                    continue
+
+                # If multiple bones share a widget, the last user wins.
+                target_names[bone.custom_shape] = bw_widget_prefix + bone.name
+
+        return {widget: name for widget, name in target_names.items() if widget.name != name}
+
+    def rename_widgets(self, target_names: typing.Dict['Object', str]) -> typing.Tuple[int, typing.List[str]]:
+        """Rename the widgets in one deterministic pass, ordered by their new name.
+        Widgets that block the new name of another widget are moved out of the way first,
+        so name swaps between widgets don't end up with a numbered suffix.
+
+        Args:
+            target_names (Dict[Object, str]): The widgets to rename, mapped to their new name.
+
+        Returns:
+            Tuple[int, List[str]]: The number of renamed widgets and the names that couldn't be claimed.
+        """
 
         D = bpy.data
 
-        # bw_collection_name: str = get_collection_name(context)
-        bw_widget_prefix: str = get_widget_prefix(context)
+        claimed: typing.Dict[str, 'Object'] = {}
+        conflicts: typing.List[str] = []
 
-        widgets_and_bones: dict = {}
+        for widget, name in sorted(target_names.items(), key=lambda item: (item[1], item[0].name)):
+            if name in claimed:
+                conflicts.append(name)
+                continue
 
-        # if context.object.type != 'ARMATURE':
-        #     return {'FINISHED'}
+            claimed[name] = widget
 
-        for bone in context.active_object.pose.bones:
-            bone: 'PoseBone'
-            if bone.custom_shape:
-                widgets_and_bones[bone] = bone.custom_shape
+        # A name is only free, if it's unused or its holder is renamed as well.
+        while True:
+            renamed_widgets = set(claimed.values())
+            blocked: typing.List[str] = []
+
+            for name in claimed:
+                holder: 'Object' = D.objects.get(name)
+                if holder is not None and holder not in renamed_widgets:
+                    blocked.append(name)
+
+            if not blocked:
+                break
+
+            for name in blocked:
+                conflicts.append(name)
+                claimed.pop(name)
+
+        # Move widgets, whose current name is claimed by another widget, to a temporary name.
+        for name, widget in claimed.items():
+            holder: 'Object' = D.objects.get(name)
+            if holder is not None:
+                holder.name = holder.name + ".resync"
+
+        for name, widget in claimed.items():
+            widget.name = name
+
+        return len(claimed), sorted(set(conflicts))
+
+
+class BONEWIDGET_OT_audit_widgets(Operator):
+    """Rank the widgets of the armature by the geometry they draw per frame"""
+    bl_idname = "bonewidget.audit_widgets"
+    bl_label = "Audit Widget Draw Cost"
+    bl_options = {'REGISTER'}
+
+    all_armatures: BoolProperty(
+        name="All Armatures",
+        default=False,
+        description="Audit the widgets of every armature in the file"
+    )
+
+    @classmethod
+    def poll(cls, context: 'Context'):
+        return (context.object and context.object.type == 'ARMATURE')
+
+    @classmethod
+    def get_draw_cost(cls, mesh: 'Mesh') -> typing.Tuple[int, int, int, int]:
+        """Get the amount of geometry a mesh draws.
+
+        Args:
+            mesh (Mesh): The mesh of the widget.
+
+        Returns:
+            Tuple[int, int, int, int]: The number of vertices, edges, faces and triangles.
+        """
+
+        import numpy
+
+        loop_totals = numpy.empty(len(mesh.polygons), dtype=numpy.int32)
+        mesh.polygons.foreach_get("loop_total", loop_totals)
+        triangles = int((loop_totals - 2).sum())
+
+        return len(mesh.vertices), len(mesh.edges), len(mesh.polygons), triangles
+
+    def execute(self, context: 'Context'):
+        armatures: typing.List['Object'] = get_pose_armatures(context)
+
+        if self.all_armatures:
+            armatures = [ob for ob in bpy.data.objects if ob.type == 'ARMATURE']
+
+        bone_counts: typing.Dict['Object', int] = {}
+        for armature in armatures:
+            for bone in armature.pose.bones:
+                bone: 'PoseBone'
+                if bone.custom_shape and bone.custom_shape.type == 'MESH':
+                    bone_counts[bone.custom_shape] = bone_counts.get(
+                        bone.custom_shape, 0) + 1
+
+        # Meshes can be shared between widgets, only count them once.
+        mesh_costs: typing.Dict['Mesh', typing.Tuple[int, int, int, int]] = {}
+        widget_costs: list = []
+
+        for widget, bone_count in bone_counts.items():
+            if widget.data not in mesh_costs:
+                mesh_costs[widget.data] = self.get_draw_cost(widget.data)
+
+            vertices, edges, faces, triangles = mesh_costs[widget.data]
+            draw_load = (edges + triangles) * bone_count
+            widget_costs.append(
+                (draw_load, widget.name, bone_count, vertices, edges, faces, triangles))
+
+        widget_costs.sort(key=lambda cost: (-cost[0], cost[1]))
+
+        audit = context.window_manager.bonewidget_audit
+        audit.widgets.clear()
+        audit.armature_name = "All Armatures" if self.all_armatures else ", ".join(ob.name for ob in armatures)
+
+        for draw_load, name, bone_count, vertices, edges, faces, triangles in widget_costs:
+            item = audit.widgets.add()
+            item.name = name
+            item.bone_count = bone_count
+            item.vertices = vertices
+            item.edges = edges
+            item.faces = faces
+            item.triangles = triangles
+            item.draw_load = draw_load
+
+        self.update_totals(audit)
+        audit.show_audit = True
+
+        self.report(
+            {'INFO'}, f"Audited {len(widget_costs)} widget(s), drawing {audit.total_draw_load} edges and triangles per frame")
+        return {'FINISHED'}
+
+    @classmethod
+    def update_totals(cls, audit):
+        """Sum up the draw cost of all audited widgets.
+
+        Args:
+            audit (BONEWIDGET_PG_widget_audit): The audit results.
+        """
+
+        audit.total_vertices = sum(item.vertices * item.bone_count for item in audit.widgets)
+        audit.total_edges = sum(item.edges * item.bone_count for item in audit.widgets)
+        audit.total_faces = sum(item.faces * item.bone_count for item in audit.widgets)
+        audit.total_draw_load = sum(item.draw_load for item in audit.widgets)
+
+
+class BONEWIDGET_OT_simplify_widget(Operator):
+    """Reduce the geometry of a widget to a vertex budget"""
+    bl_idname = "bonewidget.simplify_widget"
+    bl_label = "Simplify Widget"
+    bl_options = {'REGISTER', 'UNDO'}
+
+    widget_name: StringProperty(
+        name="Widget",
+        description="The name of the widget object to simplify"
+    )
+
+    vertex_budget: IntProperty(
+        name="Vertex Budget",
+        default=32,
+        min=2,
+        description="Reduce the geometry of the widget to at most this many vertices"
+    )
+
+    def execute(self, context: 'Context'):
+        from .functions.geometry_functions import reduce_widget_data
+
+        widget: 'Object' = bpy.data.objects.get(self.widget_name)
+
+        if not widget or widget.type != 'MESH':
+            self.report({'WARNING'}, f"No mesh widget called '{self.widget_name}' found!")
+            return {'CANCELLED'}
+
+        mesh: 'Mesh' = widget.data
+        vertex_count = len(mesh.vertices)
+        widget_data = reduce_widget_data(mesh_data_to_dico(mesh), self.vertex_budget)
+
+        mesh.clear_geometry()
+        mesh.from_pydata(widget_data["vertices"], widget_data["edges"], widget_data["faces"])
+        mesh.update(calc_edges=True)
+
+        # Keep the audit results up to date, for all widgets that share the mesh.
+        audit = context.window_manager.bonewidget_audit
+        for item in audit.widgets:
+            audited_widget: 'Object' = bpy.data.objects.get(item.name)
+            if not audited_widget or audited_widget.data != mesh:
+                continue
+
+            item.vertices, item.edges, item.faces, item.triangles = BONEWIDGET_OT_audit_widgets.get_draw_cost(
+                mesh)
+            item.draw_load = (item.edges + item.triangles) * item.bone_count
+
+        BONEWIDGET_OT_audit_widgets.update_totals(audit)
+
+        self.report({'INFO'}, f"Reduced '{widget.name}' from {vertex_count} to {len(mesh.vertices)} vertices")
+        return {'FINISHED'}
+
+
+class BONEWIDGET_OT_deduplicate_widget_meshes(Operator):
+    """Share one mesh between all widgets with identical geometry"""
+    bl_idname = "bonewidget.deduplicate_widget_meshes"
+    bl_label = "Deduplicate Widget Meshes"
+    bl_options = {'REGISTER', 'UNDO'}
+
+    all_armatures: BoolProperty(
+        name="All Armatures",
+        default=True,
+        description="Deduplicate the widget meshes of every armature in the file"
+    )
+
+    only_prefixed: BoolProperty(
+        name="Only Bone Widgets",
+        default=True,
+        description="Only deduplicate widgets, whose name starts with the widget prefix"
+    )
+
+    tolerance: FloatProperty(
+        name="Tolerance",
+        default=1e-5,
+        min=1e-8,
+        precision=6,
+        description="Vertices closer than this distance are considered identical"
+    )
+
+    @classmethod
+    def poll(cls, context: 'Context'):
+        return (context.object and context.object.type == 'ARMATURE')
+
+    def execute(self, context: 'Context'):
+        from .functions.geometry_functions import geometry_hash
+
+        D = bpy.data
+
+        armatures: typing.List['Object'] = get_pose_armatures(context)
+
+        if self.all_armatures:
+            armatures = [ob for ob in D.objects if ob.type == 'ARMATURE']
+
+        # Group the widget objects by the geometry hash of their mesh.
+        mesh_hashes: typing.Dict['Mesh', str] = {}
+        widget_groups: typing.Dict[str, typing.List['Object']] = {}
+        group_prefixes: typing.Dict[str, str] = {}
+
+        for armature in armatures:
+            bw_widget_prefix = get_widget_prefix(context, armature)
+
+            for bone in armature.pose.bones:
+                bone: 'PoseBone'
+                widget: 'Object' = bone.custom_shape
+
+                if not widget or widget.type != 'MESH' or widget.library or widget.data.library:
+                    continue
+
+                if self.only_prefixed and not widget.name.startswith(bw_widget_prefix):
+                    continue
+
+                if widget.data not in mesh_hashes:
+                    mesh_hashes[widget.data] = geometry_hash(
+                        *read_mesh_buffers(widget.data), self.tolerance)
+
+                digest = mesh_hashes[widget.data]
+                group = widget_groups.setdefault(digest, [])
+                if widget not in group:
+                    group.append(widget)
+                group_prefixes.setdefault(digest, bw_widget_prefix)
 
-        for bone, widget in widgets_and_bones.items():
-            # ! This always returns True
-            if bone.name != (bw_widget_prefix + bone.name):
-                D.objects[widget.name].name = str(
-                    bw_widget_prefix + bone.name)
+        relinked = 0
+        removed = 0
+        bytes_saved = 0
 
+        for digest, widgets in widget_groups.items():
+            meshes = {widget.data for widget in widgets}
+            if len(meshes) < 2:
+                continue
+
+            # Keep the mesh with the most users, so the fewest widgets need to be relinked.
+            shared_mesh: 'Mesh' = max(meshes, key=lambda mesh: (mesh.users, mesh.name))
+            shared_mesh.name = f"{group_prefixes[digest]}Shared_{digest[:8]}"
+
+            for widget in widgets:
+                if widget.data == shared_mesh:
+                    continue
+
+                widget.data = shared_mesh
+                relinked += 1
+
+            for mesh in meshes:
+                if mesh == shared_mesh or mesh.users:
+                    continue
+
+                bytes_saved += self.get_mesh_size(mesh)
+                D.meshes.remove(mesh)
+                removed += 1
+
+        self.report(
+            {'INFO'}, f"Relinked {relinked} widget(s), removed {removed} mesh(es), saved {bytes_saved / 1024:.1f} KiB")
         return {'FINISHED'}
 
+    def get_mesh_size(self, mesh: 'Mesh') -> int:
+        """Estimate the memory used by the geometry of a mesh.
+
+        Args:
+            mesh (Mesh): The mesh.
+
+        Returns:
+            int: The estimated size in bytes.
+        """
+
+        # Vertex coordinates, edge vertex pairs, loop vertex indices and face offsets and sizes.
+        return len(mesh.vertices) * 12 + len(mesh.edges) * 8 + len(mesh.loops) * 4 + len(mesh.polygons) * 8
+
 
 classes = (
     BONEWIDGET_OT_remove_widgets,
     BONEWIDGET_OT_add_widgets,
+    BONEWIDGET_OT_add_widgets_bulk,
+    BONEWIDGET_OT_deduplicate_library,
+    BONEWIDGET_OT_generate_widget_lods,
+    BONEWIDGET_OT_compact_library,
+    BONEWIDGET_OT_convert_library,
+    BONEWIDGET_OT_dump_library_stats,
+    BONEWIDGET_OT_reset_library_stats,
     BONEWIDGET_OT_add_object_as_widget,
     BONEWIDGET_OT_match_symmetrize_shape,
     BONEWIDGET_OT_match_bone_transforms,
     BONEWIDGET_OT_return_to_armature,
     BONEWIDGET_OT_edit_widget,
     BONEWIDGET_OT_create_widget,
+    BONEWIDGET_OT_transform_widgets,
+    BONEWIDGET_OT_apply_widget_rules,
+    BONEWIDGET_OT_export_widget_manifest,
+    BONEWIDGET_OT_replay_widget_manifest,
     BONEWIDGET_OT_toggle_collection_visibility,
     BONEWIDGET_OT_delete_unused_widgets,
     BONEWIDGET_OT_clear_bone_widgets,
     BONEWIDGET_OT_resync_widget_names,
+    BONEWIDGET_OT_audit_widgets,
+    BONEWIDGET_OT_simplify_widget,
+    BONEWIDGET_OT_deduplicate_widget_meshes,
 )
 
 
@@ -813,5 +1885,5 @@ def register():
 
 def unregister():
     from bpy.utils import unregister_class
-    for cls in classes:
+    for cls in reversed(classes):
         unregister_class(cls)
@@ -22,35 +22,18 @@ import bpy
 from bpy.types import (
     Context,
     LayerCollection,
-    Object,
     Panel,
     UILayout,
 )
-from bpy.props import (
-    EnumProperty,
-    PointerProperty
-)
 
 from .bl_class_registry import BlClassRegistry
-from .functions import (
-    read_widgets,
-)
 from .objects import (
     BonewidgetCollection
 )
 
 
-def get_widget_list_items(self, context: 'Context'):
-    items = []
-
-    for key in sorted(read_widgets().keys()):
-        items.append((key, key, ""))
-
-    return items
-
-
-def widget_object_poll(self, object: 'Object'):
-    return object and object.type == "MESH"
+# The number of widgets shown in the draw cost audit.
+AUDIT_ROWS = 10
 
 
 @BlClassRegistry()
@@ -61,11 +44,6 @@ class BONEWIDGET_PT_posemode_panel(Panel):
     bl_region_type = 'UI'
     bl_idname = 'VIEW3D_PT_bw_posemode_panel'
 
-    bpy.types.Scene.widget_list = EnumProperty(
-        items=get_widget_list_items, name="Shape", description="Shape")
-    bpy.types.Scene.widget_object = PointerProperty(
-        type=Object, poll=widget_object_poll)
-
     def draw(self, context: 'Context'):
         layout: 'UILayout' = self.layout
 
@@ -85,6 +63,15 @@ class BONEWIDGET_PT_posemode_panel(Panel):
         layout.operator("bonewidget.add_as_widget",
                         text="Use Object from Scene",
                         icon='RESTRICT_SELECT_OFF')
+        layout.operator("bonewidget.transform_widgets",
+                        text="Transform Widgets",
+                        icon='ORIENTATION_GIMBAL')
+        layout.operator("bonewidget.apply_widget_rules",
+                        text="Apply Widget Rules",
+                        icon='PRESET')
+        row = layout.row(align=True)
+        row.operator("bonewidget.export_manifest", text="Export Manifest", icon='EXPORT')
+        row.operator("bonewidget.replay_manifest", text="Replay Manifest", icon='IMPORT')
 
         layout.separator()
         layout.operator("bonewidget.symmetrize_shape",
@@ -98,15 +85,17 @@ class BONEWIDGET_PT_posemode_panel(Panel):
                         icon='X', text="Clear Bone Widget")
         layout.operator("bonewidget.delete_unused_widgets",
                         icon='TRASH', text="Delete Unused Widgets")
+        layout.operator("bonewidget.deduplicate_widget_meshes",
+                        icon='LINKED', text="Deduplicate Widget Meshes")
 
         # If the widget collection exists, show the visibility toggle
-        bw_collection: 'LayerCollection' = BonewidgetCollection().collection
+        bw_collection = BonewidgetCollection()
 
-        if bw_collection is not None:
+        if bpy.data.collections.get(bw_collection.collection_name) is not None:
             icon = "HIDE_OFF"
             text = "Hide Collection"
 
-            if bw_collection.hide_viewport:
+            if bw_collection.is_hidden():
                 icon = "HIDE_ON"
                 text = "Show Collection"
 
@@ -115,3 +104,43 @@ class BONEWIDGET_PT_posemode_panel(Panel):
             row = layout.row()
             row.operator("bonewidget.toggle_collection_visibilty",
                          icon=icon, text=text)
+
+        self.draw_audit(context, layout)
+
+    def draw_audit(self, context: 'Context', layout: 'UILayout'):
+        """Draw the results of the widget draw cost audit, with the heaviest widgets first.
+
+        Args:
+            context (Context): The current Blender context.
+            layout (UILayout): The layout to draw in.
+        """
+
+        audit = context.window_manager.bonewidget_audit
+
+        layout.separator()
+        row = layout.row(align=True)
+        row.prop(audit, "show_audit", text="Widget Draw Cost", emboss=False,
+                 icon="TRIA_DOWN" if audit.show_audit else "TRIA_RIGHT")
+        row.operator("bonewidget.audit_widgets", text="", icon="FILE_REFRESH")
+
+        if not audit.show_audit:
+            return
+
+        box = layout.box()
+        if not audit.widgets:
+            box.label(text="Run the audit to rank the widgets.")
+            return
+
+        col = box.column(align=True)
+        col.label(text=f"{audit.armature_name}: {len(audit.widgets)} widgets")
+        col.label(text=f"Vertices: {audit.total_vertices}  Edges: {audit.total_edges}  Faces: {audit.total_faces}")
+        col.label(text=f"Draw Load: {audit.total_draw_load}")
+
+        col = box.column(align=True)
+        for item in audit.widgets[:AUDIT_ROWS]:
+            row = col.row(align=True)
+            row.label(text=item.name)
+            row.label(text=f"{item.vertices} v × {item.bone_count}")
+            op = row.operator("bonewidget.simplify_widget",
+                              text="", icon="MOD_DECIM")
+            op.widget_name = item.name
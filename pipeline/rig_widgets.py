@@ -0,0 +1,220 @@
+# ##### BEGIN GPL LICENSE BLOCK #####
+#
+#     This program is free software: you can redistribute it and/or modify
+#     it under the terms of the GNU General Public License as published by
+#     the Free Software Foundation, either version 3 of the License, or
+#     (at your option) any later version.
+
+#     This program is distributed in the hope that it will be useful,
+#     but WITHOUT ANY WARRANTY; without even the implied warranty of
+#     MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#     GNU General Public License for more details.
+
+#     You should have received a copy of the GNU General Public License
+#     along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""Apply widgets to every armature in many .blend files, using a mapping file.
+
+Run it with plain Python, it starts one background Blender process per file:
+
+    python pipeline/rig_widgets.py --blender /path/to/blender --mapping mapping.json --jobs 4 rigs/*.blend
+
+The mapping file is a JSON list of rules, the first rule that matches a bone wins:
+
+    {"rules": [{"name": "DEF-*"},
+               {"collection": "FK", "shape": "Circle", "slide": 0.0, "rotation": [90, 0, 0], "scale": [1, 1, 1]},
+               {"name": "^finger_\\d+", "regex": true, "shape": "Circle"}]}
+
+Rules match the bone "name", a bone "collection" or the "parent" bone with a glob pattern, or with a
+regular expression if "regex" is true. Rules without a shape exclude the matching bones.
+
+Shapes are looked up in the widget library of the add-on, then in the procedural widgets.
+The rotation is given in degrees. The files are saved, unless --dry-run is given.
+"""
+
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+import typing
+
+ADDON_DIRECTORY = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def parse_args(argv: typing.List[str]) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("files", nargs="*", help="The .blend files to process")
+    parser.add_argument("--mapping", required=True, help="The JSON mapping file")
+    parser.add_argument("--blender", default="blender", help="The Blender executable")
+    parser.add_argument("--jobs", type=int, default=os.cpu_count() or 1,
+                        help="How many Blender processes run in parallel")
+    parser.add_argument("--module", default=os.path.basename(ADDON_DIRECTORY),
+                        help="The module name of the add-on")
+    parser.add_argument("--report", help="Write the report as JSON to this file")
+    parser.add_argument("--timeout", type=float, default=None, help="Timeout per file in seconds")
+    parser.add_argument("--dry-run", action="store_true", help="Don't save the files")
+    parser.add_argument("--user-preferences", action="store_true",
+                        help="Start Blender with the user preferences instead of the factory settings")
+    parser.add_argument("--worker-result", help=argparse.SUPPRESS)
+
+    return parser.parse_args(argv)
+
+
+def run_worker(args: argparse.Namespace) -> None:
+    """Apply the mapping to the .blend file that is open in this Blender process and write the result."""
+
+    import addon_utils
+    import bpy
+    import importlib
+
+    start = time.perf_counter()
+    result: dict = {"file": bpy.data.filepath, "armatures": [], "errors": []}
+
+    try:
+        if os.path.dirname(ADDON_DIRECTORY) not in sys.path:
+            sys.path.insert(0, os.path.dirname(ADDON_DIRECTORY))
+
+        if not addon_utils.enable(args.module, default_set=True):
+            raise RuntimeError(f"The add-on '{args.module}' couldn't be enabled")
+
+        functions = importlib.import_module(args.module + ".functions")
+        objects = importlib.import_module(args.module + ".objects")
+
+        rules = functions.compile_widget_rules(functions.load_widget_rules(args.mapping))
+        wgts = functions.read_widgets()
+        context = bpy.context
+        result["setup_time"] = time.perf_counter() - start
+
+        for armature in [o for o in bpy.data.objects if o.type == 'ARMATURE' and o.library is None]:
+            armature_start = time.perf_counter()
+
+            bw_collection = objects.BonewidgetCollection(layer_collection=False, armature=armature)
+            if not bw_collection.collection:
+                bw_collection.create_collection()
+
+            created, missing = functions.apply_widget_rules(
+                context, armature, rules, bw_collection.collection, wgts)
+
+            result["armatures"].append({
+                "name": armature.name,
+                "bones": len(armature.pose.bones),
+                "widgets": len(created),
+                "missing_shapes": missing,
+                "time": time.perf_counter() - armature_start,
+            })
+
+        if not args.dry_run:
+            save_start = time.perf_counter()
+            bpy.ops.wm.save_mainfile()
+            result["save_time"] = time.perf_counter() - save_start
+    except Exception as e:
+        result["errors"].append(f"{type(e).__name__}: {e}")
+
+    result["time"] = time.perf_counter() - start
+
+    with open(args.worker_result, "w", encoding="utf-8") as f:
+        json.dump(result, f)
+
+
+def process_file(args: argparse.Namespace, blend_file: str) -> dict:
+    """Process one .blend file in a background Blender process."""
+
+    fd, result_file = tempfile.mkstemp(prefix="rig_widgets_", suffix=".json")
+    os.close(fd)
+
+    command = [args.blender, "--background"]
+    if not args.user_preferences:
+        command.append("--factory-startup")
+    command += [blend_file, "--python", os.path.abspath(__file__), "--",
+                "--mapping", os.path.abspath(args.mapping), "--module", args.module,
+                "--worker-result", result_file]
+    if args.dry_run:
+        command.append("--dry-run")
+
+    start = time.perf_counter()
+    result: dict = {"file": blend_file, "armatures": [], "errors": []}
+
+    try:
+        process = subprocess.run(command, stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
+                                 timeout=args.timeout, text=True)
+
+        if os.path.getsize(result_file):
+            with open(result_file, "r", encoding="utf-8") as f:
+                result.update(json.load(f))
+            result["file"] = blend_file
+        else:
+            result["errors"].append(f"Blender exited with code {process.returncode}")
+            result["log"] = process.stdout[-2000:]
+    except subprocess.TimeoutExpired:
+        result["errors"].append(f"Timed out after {args.timeout} seconds")
+    except OSError as e:
+        result["errors"].append(f"Blender couldn't be started: {e}")
+    finally:
+        os.remove(result_file)
+
+    result["wall_time"] = time.perf_counter() - start
+
+    return result
+
+
+def print_report(report: dict) -> None:
+    for result in report["files"]:
+        widgets = sum(armature["widgets"] for armature in result["armatures"])
+        status = "FAILED" if result["errors"] else "ok"
+        print(f"{status:>6} {result['wall_time']:8.2f}s {len(result['armatures']):4d} armatures "
+              f"{widgets:6d} widgets  {result['file']}")
+
+        for error in result["errors"]:
+            print(f"{'':>16}{error}")
+
+        missing = sorted({shape for armature in result["armatures"] for shape in armature["missing_shapes"]})
+        if missing:
+            print(f"{'':>16}Missing shapes: {', '.join(missing)}")
+
+    summary = report["summary"]
+    print(f"{summary['files']} files, {summary['failed']} failed, {summary['widgets']} widgets "
+          f"in {summary['time']:.2f}s ({summary['jobs']} jobs)")
+
+
+def main() -> None:
+    if "--" in sys.argv:
+        # Started by Blender as a worker.
+        args = parse_args(sys.argv[sys.argv.index("--") + 1:])
+        if args.worker_result:
+            run_worker(args)
+            return
+    else:
+        args = parse_args(sys.argv[1:])
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=max(1, args.jobs)) as executor:
+        results = list(executor.map(lambda blend_file: process_file(args, blend_file), args.files))
+
+    report = {
+        "date": time.strftime("%Y-%m-%d %H:%M:%S"),
+        "mapping": os.path.abspath(args.mapping),
+        "files": results,
+        "summary": {
+            "files": len(results),
+            "failed": sum(1 for result in results if result["errors"]),
+            "widgets": sum(armature["widgets"] for result in results for armature in result["armatures"]),
+            "time": time.perf_counter() - start,
+            "jobs": args.jobs,
+        },
+    }
+
+    print_report(report)
+
+    if args.report:
+        with open(args.report, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+
+    sys.exit(1 if report["summary"]["failed"] else 0)
+
+
+if __name__ == "__main__":
+    main()
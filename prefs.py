@@ -24,9 +24,16 @@ from bpy.types import (
     Context,
     UILayout
 )
-from bpy.props import StringProperty
+from bpy.props import (
+    BoolProperty,
+    EnumProperty,
+    FloatProperty,
+    IntProperty,
+    StringProperty
+)
 
 from .bl_class_registry import BlClassRegistry
+from .functions import get_library_stats
 from .panels import BONEWIDGET_PT_posemode_panel
 
 
@@ -55,6 +62,84 @@ class BONEWIDGET_APT_Preferences(AddonPreferences):
         default="WGTS_{object}",
     )
 
+    # widget collection visibility
+    widget_collection_mode: EnumProperty(
+        name="Widget Collection",
+        description="How the widget collection is hidden while the widgets aren't edited",
+        items=[
+            ("HIDDEN", "Hidden", "Hide the collection in the viewport. The widgets are still evaluated with the view layer"),
+            ("EXCLUDED", "Excluded", "Exclude the collection from the view layer, so the widgets aren't evaluated with it"),
+            ("UNLINKED", "Unlinked", "Unlink the collection from the scene. The widgets are only added to the scene while they're edited"),
+        ],
+        default="HIDDEN",
+    )
+
+    # non-destructive widget transforms
+    use_bone_shape_transform: BoolProperty(
+        name="Non-Destructive Transforms",
+        description="Store the slide, rotation and scale of new widgets in the custom shape offsets of the bone, instead of the widget mesh. Widgets of the same shape share one mesh",
+        default=False,
+    )
+
+    # widget level of detail
+    widget_lod_mode: EnumProperty(
+        name="Widget Detail",
+        description="Which level of detail of the library shapes new widgets use. Shapes get their levels of detail when they're added to the library",
+        items=[
+            ("FULL", "Full", "Always use the full detail of the shapes"),
+            ("BONE_LENGTH", "By Bone Length", "Use less detail for shorter bones"),
+            ("DENSITY", "Fixed", "Use the same level of detail for all bones"),
+        ],
+        default="FULL",
+    )
+
+    widget_lod_length: FloatProperty(
+        name="Full Detail Length",
+        description="Bones at least this long get the full detail. Every halving of the length uses the next lower level of detail",
+        default=0.2,
+        min=0.001,
+        subtype="DISTANCE",
+    )
+
+    widget_lod_density: IntProperty(
+        name="Detail Reduction",
+        description="The level of detail for all bones. 0 is the full detail, every level halves the vertices",
+        default=1,
+        min=0,
+        max=3,
+    )
+
+    # encoded widget library
+    library_compression: EnumProperty(
+        name="Compression",
+        description="Compression of the encoded widget library",
+        items=[
+            ("NONE", "None", "Don't compress the library"),
+            ("ZLIB", "Zlib", "Fast compression"),
+            ("LZMA", "LZMA", "Smallest files, slower compression"),
+        ],
+        default="ZLIB",
+    )
+
+    library_quantization: EnumProperty(
+        name="Vertex Precision",
+        description="How the vertices of the widgets are stored in the encoded widget library",
+        items=[
+            ("LOSSLESS", "Lossless", "Store the vertices with full precision"),
+            ("DECIMALS", "Decimals", "Round the vertices to a number of decimals"),
+            ("INT16", "16 Bit", "Store the vertices as 16 bit integers within the bounding box of each widget"),
+        ],
+        default="LOSSLESS",
+    )
+
+    library_precision: IntProperty(
+        name="Decimals",
+        description="Number of decimals to round the vertices to",
+        default=5,
+        min=1,
+        max=12,
+    )
+
     def panel_category_update_fn(self, context: 'Context'):
         has_panel = hasattr(bpy.types, BONEWIDGET_PT_posemode_panel.bl_idname)
         if has_panel:
@@ -85,8 +170,61 @@ class BONEWIDGET_APT_Preferences(AddonPreferences):
         row.prop(self, "symmetry_suffix", text="Symmetry suffix")
 
         row = layout.row()
+        row.prop(self, "widget_collection_mode")
+        row = layout.row()
+        row.prop(self, "use_bone_shape_transform")
+
+        row = layout.row()
+        row.prop(self, "widget_lod_mode")
+        if self.widget_lod_mode == "BONE_LENGTH":
+            row.prop(self, "widget_lod_length")
+        elif self.widget_lod_mode == "DENSITY":
+            row.prop(self, "widget_lod_density")
 
         row = layout.row()
         col = row.column()
         col.label(text="Set the category to show Bone-Widgets panel:")
         col.prop(self, "panel_category")
+
+        self.draw_library_settings(context, layout)
+        self.draw_library_diagnostics(context, layout)
+
+    def draw_library_settings(self, context: 'Context', layout: 'UILayout'):
+        box = layout.box()
+        box.label(text="Widget Library:")
+
+        col = box.column()
+        col.prop(self, "library_compression")
+        col.prop(self, "library_quantization")
+        if self.library_quantization == "DECIMALS":
+            col.prop(self, "library_precision")
+
+        row = box.row()
+        row.operator("bonewidget.convert_library",
+                     text="Convert to Encoded Library").encoded = True
+        row.operator("bonewidget.convert_library",
+                     text="Convert to JSON Library").encoded = False
+
+    def draw_library_diagnostics(self, context: 'Context', layout: 'UILayout'):
+        stats = get_library_stats()
+
+        box = layout.box()
+        box.label(text="Library Diagnostics:")
+
+        col = box.column(align=True)
+        col.label(text=f"Path: {stats['path']}")
+        col.label(text=f"Shapes: {stats['shapes']}, last invalidation: {stats['last_invalidation'] or 'none'}")
+        col.label(text=f"Loads: {stats['loads']}, last load {stats['last_load_time'] * 1e3:.1f} ms, "
+                       f"total {stats['load_time'] * 1e3:.1f} ms "
+                       f"(read {stats['read_time'] * 1e3:.1f} ms, parse {stats['parse_time'] * 1e3:.1f} ms), "
+                       f"{stats['bytes_read'] / 1024:.1f} KiB read")
+
+        hit_rate = "-" if stats["cache_hit_rate"] is None else f"{stats['cache_hit_rate']:.1%}"
+        col.label(text=f"Cache: {stats['cache_hits']} hits, {stats['cache_misses']} misses ({hit_rate}), "
+                       f"{stats['check_time'] * 1e3:.1f} ms checking for changes")
+        col.label(text=f"Writes: {stats['writes']}, {stats['write_time'] * 1e3:.1f} ms, "
+                       f"{stats['bytes_written'] / 1024:.1f} KiB written, {stats['write_conflicts']} conflicts")
+
+        row = box.row()
+        row.operator("bonewidget.dump_library_stats", icon="EXPORT")
+        row.operator("bonewidget.reset_library_stats", icon="FILE_REFRESH")
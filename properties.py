@@ -0,0 +1,146 @@
+# ##### BEGIN GPL LICENSE BLOCK #####
+#
+# Copyright (C) 2020 Manuel Rais
+# manu@g-lul.com
+
+# Created by Manuel Rais and Christophe Seux
+
+#     This program is free software: you can redistribute it and/or modify
+#     it under the terms of the GNU General Public License as published by
+#     the Free Software Foundation, either version 3 of the License, or
+#     (at your option) any later version.
+
+#     This program is distributed in the hope that it will be useful,
+#     but WITHOUT ANY WARRANTY; without even the implied warranty of
+#     MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#     GNU General Public License for more details.
+
+#     You should have received a copy of the GNU General Public License
+#     along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import bpy
+from bpy.types import (
+    Context,
+    Object,
+    PropertyGroup,
+    Scene,
+    WindowManager
+)
+from bpy.props import (
+    BoolProperty,
+    CollectionProperty,
+    EnumProperty,
+    IntProperty,
+    PointerProperty,
+    StringProperty
+)
+
+from .functions import (
+    PROCEDURAL_WIDGETS,
+    read_widgets,
+)
+
+
+def get_widget_list_items(self, context: 'Context'):
+    items = []
+    wgts = read_widgets()
+
+    for key in sorted(set(wgts.keys()) | set(PROCEDURAL_WIDGETS.keys())):
+        description = "" if key in wgts else "Procedural shape"
+        items.append((key, key, description))
+
+    return items
+
+
+def widget_object_poll(self, object: 'Object'):
+    return object and object.type == "MESH"
+
+
+class BONEWIDGET_PG_widget_cost(PropertyGroup):
+    """The draw cost of a single widget object."""
+
+    # The name of the property group is the name of the widget object.
+    bone_count: IntProperty(name="Bones")
+    vertices: IntProperty(name="Vertices")
+    edges: IntProperty(name="Edges")
+    faces: IntProperty(name="Faces")
+    triangles: IntProperty(name="Triangles")
+    draw_load: IntProperty(
+        name="Draw Load",
+        description="Edges and triangles drawn per frame, multiplied by the number of bones using the widget"
+    )
+
+
+class BONEWIDGET_PG_widget_audit(PropertyGroup):
+    """The results of the last widget draw cost audit."""
+
+    widgets: CollectionProperty(type=BONEWIDGET_PG_widget_cost)
+
+    armature_name: StringProperty(name="Armature")
+    total_vertices: IntProperty(name="Vertices")
+    total_edges: IntProperty(name="Edges")
+    total_faces: IntProperty(name="Faces")
+    total_draw_load: IntProperty(name="Draw Load")
+
+    show_audit: BoolProperty(
+        name="Show Widget Audit",
+        default=False,
+    )
+
+
+class BONEWIDGET_PG_session_bone(PropertyGroup):
+    """A bone whose widget is edited. The name of the property group is the name of the bone."""
+
+    armature: PointerProperty(type=Object)
+
+
+class BONEWIDGET_PG_session_widget(PropertyGroup):
+    """A widget object that is edited."""
+
+    object: PointerProperty(type=Object)
+
+
+class BONEWIDGET_PG_edit_session(PropertyGroup):
+    """The bones and widgets of the current widget edit session, to return to the armature without searching the scene."""
+
+    bones: CollectionProperty(type=BONEWIDGET_PG_session_bone)
+    widgets: CollectionProperty(type=BONEWIDGET_PG_session_widget)
+
+    active_armature: PointerProperty(type=Object)
+    active_bone: StringProperty(name="Active Bone")
+
+
+classes = (
+    BONEWIDGET_PG_widget_cost,
+    BONEWIDGET_PG_widget_audit,
+    BONEWIDGET_PG_session_bone,
+    BONEWIDGET_PG_session_widget,
+    BONEWIDGET_PG_edit_session,
+)
+
+
+def register():
+    from bpy.utils import register_class
+    for cls in classes:
+        register_class(cls)
+
+    Scene.widget_list = EnumProperty(
+        items=get_widget_list_items, name="Shape", description="Shape")
+    Scene.widget_object = PointerProperty(
+        type=Object, poll=widget_object_poll)
+
+    WindowManager.bonewidget_audit = PointerProperty(
+        type=BONEWIDGET_PG_widget_audit)
+    WindowManager.bonewidget_edit_session = PointerProperty(
+        type=BONEWIDGET_PG_edit_session)
+
+
+def unregister():
+    del WindowManager.bonewidget_edit_session
+    del WindowManager.bonewidget_audit
+    del Scene.widget_object
+    del Scene.widget_list
+
+    from bpy.utils import unregister_class
+    for cls in reversed(classes):
+        unregister_class(cls)